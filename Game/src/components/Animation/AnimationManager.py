@@ -1,14 +1,30 @@
 import pygame
-from src.components.Animation.BulletAnimation import BulletAnimation
+from src.components.Animation.ProjectilePool import ProjectilePool
+from src.components.Animation.TrailAtlas import trail_atlas_cache
 
 class AnimationManager:
-    """动画管理器类，用于管理多个动画实例"""
+    """动画管理器类，用于管理多个动画实例
     
-    def __init__(self):
-        """初始化动画管理器"""
-        self.animations = []
+    子弹保存在ProjectilePool中，所有子弹每帧一次向量化更新，完成后回收槽位。
+    每个子弹可以带一个完成回调，在子弹到达目标的那一帧调用，只处理本帧完成的子弹。
+    """
     
-    def add_bullet_animation(self, start_pos, target_pos, color=(255, 0, 0), size=10, speed=10):
+    def __init__(self, capacity=64):
+        """
+        初始化动画管理器
+        
+        参数:
+            capacity (int): 子弹池的初始容量，不够时自动扩容
+        """
+        self.bullets = ProjectilePool(capacity)
+        # 子弹编号 -> 完成回调
+        self.callbacks = {}
+        # 不需要飞行的子弹的回调，在下一次update时调用
+        self.ready_callbacks = []
+        # 上一帧绘制的动画区域，用于脏矩形渲染
+        self.last_drawn_rects = []
+    
+    def add_bullet_animation(self, start_pos, target_pos, color=(255, 0, 0), size=10, speed=10, on_complete=None):
         """
         添加一个新的子弹动画
         
@@ -18,34 +34,40 @@ class AnimationManager:
             color (tuple): 子弹颜色
             size (int): 子弹大小
             speed (int): 子弹飞行速度
+            on_complete (callable): 子弹到达目标时调用的无参数函数；起点和终点重合时在下一次update中调用
         
         返回:
-            BulletAnimation: 创建的子弹动画实例
+            int: 子弹编号，起点和终点重合（不需要动画）时返回None
         """
-        bullet = BulletAnimation(start_pos, target_pos, color, size, speed)
-        self.animations.append(bullet)
-        return bullet
+        bullet_id = self.bullets.spawn(start_pos, target_pos, color, size, speed)
+        if on_complete is not None:
+            if bullet_id is None:
+                self.ready_callbacks.append(on_complete)
+            else:
+                self.callbacks[bullet_id] = on_complete
+        return bullet_id
     
     def update(self):
         """
-        更新所有动画，移除已完成的动画
+        更新所有动画，移除已完成的动画并调用它们的完成回调（按子弹编号顺序）
         
         返回:
             bool: 是否所有动画都已完成
         """
-        # 使用列表推导式过滤掉已完成的动画
-        active_animations = []
-        
-        for anim in self.animations:
-            anim.update()
-            if not anim.is_completed():
-                active_animations.append(anim)
+        # 所有子弹一次更新，已完成的子弹自动回收
+        completed = self.bullets.update()
         
-        # 更新动画列表
-        self.animations = active_animations
+        ready, self.ready_callbacks = self.ready_callbacks, []
+        callbacks = self.callbacks
+        for bullet_id in sorted(completed):
+            callback = callbacks.pop(bullet_id, None)
+            if callback is not None:
+                ready.append(callback)
+        for callback in ready:
+            callback()
         
         # 返回是否还有活跃的动画
-        return len(self.animations) == 0
+        return len(self.bullets) == 0
     
     def draw(self, screen):
         """
@@ -54,12 +76,43 @@ class AnimationManager:
         参数:
             screen: pygame屏幕对象
         """
-        for anim in self.animations:
-            anim.draw(screen)
+        bullets = self.bullets
+        for slot in bullets.active_slots().tolist():
+            color = tuple(bullets.color[slot].tolist())
+            size = int(bullets.size[slot])
+            trail = bullets.get_trail(slot)
+            
+            # 绘制拖尾效果：透明度和大小逐渐变化的圆直接取自共享的拖尾图集，不创建新的Surface
+            if trail:
+                atlas = trail_atlas_cache.get_atlas(color, size, bullets.trail_length)
+                for (trail_x, trail_y), (s, sprite) in zip(trail, atlas.get_steps(len(trail))):
+                    if sprite is not None:
+                        screen.blit(sprite, (trail_x - s, trail_y - s))
+            
+            # 绘制子弹
+            x, y = bullets.pos[slot].tolist()
+            pygame.draw.circle(screen, color, (int(x), int(y)), size)
+    
+    def get_dirty_rects(self):
+        """
+        返回自上次调用以来发生变化的屏幕区域：上一帧和当前帧所有子弹占据的区域
+        
+        返回:
+            list: 需要重绘的pygame.Rect列表
+        """
+        current_rects = self.bullets.get_rects()
+        rects = self.last_drawn_rects + current_rects
+        self.last_drawn_rects = current_rects
+        return rects
     
     def clear(self):
-        """清除所有动画"""
-        self.animations.clear()
+        """清除所有动画，未完成子弹的回调立即调用，使它们对应的结果不会丢失"""
+        self.bullets.clear()
+        ready = self.ready_callbacks + [self.callbacks[bullet_id] for bullet_id in sorted(self.callbacks)]
+        self.callbacks = {}
+        self.ready_callbacks = []
+        for callback in ready:
+            callback()
     
     def has_active_animations(self):
         """
@@ -68,4 +121,4 @@ class AnimationManager:
         返回:
             bool: 是否有活跃的动画
         """
-        return len(self.animations) > 0 
\ No newline at end of file
+        return len(self.bullets) > 0 
\ No newline at end of file
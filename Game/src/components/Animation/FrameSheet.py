@@ -0,0 +1,141 @@
+import pygame
+import math
+import threading
+from src.components.Asset.AssetPack import asset_pack
+
+class FrameSheet:
+    """
+    按需加载的动画帧图集
+
+    所有帧打包在同一张SRCALPHA图上，每帧是图上一个格子的子表面。
+    第0帧在创建时立即加载，其余帧由后台线程解码和缩放，
+    主线程在取帧时把已完成的帧拷贝进图集；取到尚未加载的帧时在主线程同步加载。
+    """
+    def __init__(self, frame_paths, frame_size, fallback_size=None, background=True):
+        """
+        初始化帧图集
+
+        参数:
+            frame_paths (list): 每一帧图片的路径
+            frame_size (tuple): 每一帧缩放后的尺寸(宽, 高)
+            fallback_size (tuple): 图片加载失败时使用的浅灰色方块尺寸，为None时与frame_size相同
+            background (bool): 是否在后台线程预加载其余帧，False时只在第一次使用时加载
+        """
+        self.frame_paths = list(frame_paths)
+        self.frame_size = tuple(frame_size)
+        self.fallback_size = tuple(fallback_size) if fallback_size else self.frame_size
+
+        # 图集布局：尽量接近正方形
+        self.columns = max(1, math.ceil(math.sqrt(len(self.frame_paths))))
+        self.rows = max(1, math.ceil(len(self.frame_paths) / self.columns))
+        self.sheet = pygame.Surface((self.columns * self.frame_size[0], self.rows * self.frame_size[1]), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            self.sheet = self.sheet.convert_alpha()
+
+        # 已放入图集的帧（子表面），None表示尚未加载
+        self.frames = [None] * len(self.frame_paths)
+        # 后台线程已解码缩放、等待主线程放入图集的帧: 索引 -> Surface
+        self._ready = {}
+        # 已经开始加载的帧（后台线程或主线程），避免重复加载
+        self._claimed = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        # 第0帧立即加载，用于确定按钮的大小和首次显示
+        if self.frame_paths:
+            self._claimed.add(0)
+            self._place(0, self._load_frame(0))
+
+        if background and len(self.frame_paths) > 1:
+            self._thread = threading.Thread(target=self._load_remaining, name="FrameSheetLoader", daemon=True)
+            self._thread.start()
+
+    def _load_frame(self, index):
+        """解码并缩放一帧图片，失败时返回浅灰色半透明方块（可在后台线程调用）"""
+        try:
+            # 资源包中有预先缩放好的图片时直接使用
+            image = asset_pack.get_surface(self.frame_paths[index], self.frame_size)
+            if image is not None:
+                return image
+            image = pygame.image.load(self.frame_paths[index])
+            return pygame.transform.scale(image, self.frame_size)
+        except Exception as e:
+            print(f"无法加载图片: {self.frame_paths[index]} - 错误: {e}")
+            # 创建一个默认图片（浅灰色方块）
+            image = pygame.Surface(self.fallback_size, pygame.SRCALPHA)
+            image.fill((200, 200, 200, 180))  # 浅灰色半透明
+            return image
+
+    def _load_remaining(self):
+        """后台线程：依次加载除第0帧外尚未被主线程加载的帧"""
+        for index in range(1, len(self.frame_paths)):
+            with self._lock:
+                if index in self._claimed:
+                    continue
+                self._claimed.add(index)
+            image = self._load_frame(index)
+            with self._lock:
+                self._ready[index] = image
+
+    def _place(self, index, image):
+        """在主线程中把一帧拷贝到图集对应的格子上"""
+        cell_x = (index % self.columns) * self.frame_size[0]
+        cell_y = (index // self.columns) * self.frame_size[1]
+        width = min(image.get_width(), self.frame_size[0])
+        height = min(image.get_height(), self.frame_size[1])
+        frame = self.sheet.subsurface((cell_x, cell_y, width, height))
+        frame.fill((0, 0, 0, 0))
+        frame.blit(image, (0, 0))
+        self.frames[index] = frame
+
+    def _collect_ready(self):
+        """把后台线程已完成的帧放入图集"""
+        if not self._ready:
+            return
+        with self._lock:
+            ready, self._ready = self._ready, {}
+        for index, image in ready.items():
+            self._place(index, image)
+
+    def get_frame(self, index):
+        """
+        获取一帧
+
+        参数:
+            index (int): 帧索引
+
+        返回:
+            Surface: 图集上该帧的子表面（共享，不应直接修改）
+        """
+        self._collect_ready()
+        frame = self.frames[index]
+        if frame is not None:
+            return frame
+
+        with self._lock:
+            claimed_by_loader = index in self._claimed
+            self._claimed.add(index)
+        if claimed_by_loader:
+            # 后台线程正在加载这一帧，等待它完成；线程意外退出时不再等待
+            while index not in self._ready and self._thread.is_alive():
+                self._thread.join(0.001)
+            self._collect_ready()
+        if self.frames[index] is None:
+            self._place(index, self._load_frame(index))
+        return self.frames[index]
+
+    def __len__(self):
+        """帧数"""
+        return len(self.frame_paths)
+
+    def is_fully_loaded(self):
+        """是否所有帧都已放入图集"""
+        self._collect_ready()
+        return all(frame is not None for frame in self.frames)
+
+    def wait_until_loaded(self):
+        """阻塞直到所有帧加载完成（例如基准测试或截图前）"""
+        if self._thread is not None:
+            self._thread.join()
+        for index in range(len(self.frames)):
+            self.get_frame(index)
@@ -0,0 +1,185 @@
+import pygame
+import numpy as np
+
+class ProjectilePool:
+    """
+    子弹对象池，以结构数组（每个属性一个NumPy数组）的方式存储所有子弹
+
+    位置、速度、剩余距离、颜色和拖尾都保存在预分配的数组中，
+    每帧用一次向量化计算更新所有活跃子弹；子弹完成后其槽位被回收复用，不再分配新对象。
+    容量不足时数组按两倍扩容。
+    """
+    def __init__(self, capacity=64, trail_length=5):
+        """
+        初始化子弹池
+
+        参数:
+            capacity (int): 初始容量
+            trail_length (int): 每个子弹拖尾保留的位置数
+        """
+        self.trail_length = trail_length
+        self.capacity = 0
+        self.next_id = 0
+
+        self.active = np.zeros(0, dtype=bool)        # 槽位是否正在使用
+        self.ids = np.zeros(0, dtype=np.int64)        # 子弹编号
+        self.pos = np.zeros((0, 2), dtype=np.float64)  # 当前位置
+        self.velocity = np.zeros((0, 2), dtype=np.float64)  # 每帧的移动量
+        self.target = np.zeros((0, 2), dtype=np.float64)    # 目标位置
+        self.remaining = np.zeros(0, dtype=np.float64)      # 剩余飞行距离
+        self.speed = np.zeros(0, dtype=np.float64)          # 每帧飞行距离
+        self.color = np.zeros((0, 3), dtype=np.uint8)       # 颜色
+        self.size = np.zeros(0, dtype=np.int32)             # 子弹半径
+        # 拖尾使用环形缓冲区：trail_head指向下一个写入位置，trail_count为已记录的位置数
+        self.trail = np.zeros((0, trail_length, 2), dtype=np.float64)
+        self.trail_head = np.zeros(0, dtype=np.int32)
+        self.trail_count = np.zeros(0, dtype=np.int32)
+
+        # 空闲槽位栈
+        self.free_slots = []
+        self._grow(capacity)
+
+    def _grow(self, new_capacity):
+        """扩容所有数组，新槽位加入空闲栈"""
+        old_capacity = self.capacity
+        extra = new_capacity - old_capacity
+        if extra <= 0:
+            return
+
+        def extend(array):
+            return np.concatenate([array, np.zeros((extra,) + array.shape[1:], dtype=array.dtype)])
+
+        self.active = extend(self.active)
+        self.ids = extend(self.ids)
+        self.pos = extend(self.pos)
+        self.velocity = extend(self.velocity)
+        self.target = extend(self.target)
+        self.remaining = extend(self.remaining)
+        self.speed = extend(self.speed)
+        self.color = extend(self.color)
+        self.size = extend(self.size)
+        self.trail = extend(self.trail)
+        self.trail_head = extend(self.trail_head)
+        self.trail_count = extend(self.trail_count)
+
+        # 低编号的槽位优先使用
+        self.free_slots.extend(range(new_capacity - 1, old_capacity - 1, -1))
+        self.capacity = new_capacity
+
+    def spawn(self, start_pos, target_pos, color, size, speed):
+        """
+        发射一颗子弹
+
+        参数:
+            start_pos (tuple): 起始位置 (x, y)
+            target_pos (tuple): 目标位置 (x, y)
+            color (tuple): 颜色
+            size (int): 子弹半径
+            speed (int): 每帧飞行距离
+
+        返回:
+            int: 子弹编号；起点和终点重合时不会发射，返回None
+        """
+        dx = target_pos[0] - start_pos[0]
+        dy = target_pos[1] - start_pos[1]
+        distance = (dx * dx + dy * dy) ** 0.5
+        if distance <= 0:
+            return None
+
+        if not self.free_slots:
+            self._grow(max(1, self.capacity * 2))
+        slot = self.free_slots.pop()
+
+        bullet_id = self.next_id
+        self.next_id += 1
+
+        self.active[slot] = True
+        self.ids[slot] = bullet_id
+        self.pos[slot] = start_pos
+        self.velocity[slot] = (dx / distance * speed, dy / distance * speed)
+        self.target[slot] = target_pos
+        self.remaining[slot] = distance
+        self.speed[slot] = speed
+        self.color[slot] = color
+        self.size[slot] = size
+        # 拖尾的空位先填充为起点，使包围盒计算不必区分有效位置
+        self.trail[slot] = start_pos
+        self.trail_head[slot] = 0
+        self.trail_count[slot] = 0
+        return bullet_id
+
+    def update(self):
+        """
+        所有活跃子弹前进一帧，回收到达目标的子弹
+
+        返回:
+            list: 本帧完成的子弹编号
+        """
+        slots = np.flatnonzero(self.active)
+        if len(slots) == 0:
+            return []
+
+        # 把当前位置写入拖尾环形缓冲区
+        heads = self.trail_head[slots]
+        self.trail[slots, heads] = self.pos[slots]
+        self.trail_head[slots] = (heads + 1) % self.trail_length
+        self.trail_count[slots] = np.minimum(self.trail_count[slots] + 1, self.trail_length)
+
+        # 更新位置和剩余距离
+        self.pos[slots] += self.velocity[slots]
+        self.remaining[slots] -= self.speed[slots]
+
+        # 到达目标的子弹停在目标位置并回收槽位
+        done = slots[self.remaining[slots] <= 0]
+        if len(done) == 0:
+            return []
+        self.pos[done] = self.target[done]
+        self.active[done] = False
+        self.free_slots.extend(done.tolist())
+        return self.ids[done].tolist()
+
+    def active_slots(self):
+        """返回所有活跃子弹的槽位（按槽位顺序）"""
+        return np.flatnonzero(self.active)
+
+    def get_trail(self, slot):
+        """
+        获取子弹的拖尾位置，从最旧到最新
+
+        返回:
+            list: 位置 (x, y) 列表
+        """
+        count = int(self.trail_count[slot])
+        start = int(self.trail_head[slot]) - count
+        order = [(start + i) % self.trail_length for i in range(count)]
+        return [tuple(point) for point in self.trail[slot, order].tolist()]
+
+    def get_rects(self):
+        """
+        一次性计算所有活跃子弹及其拖尾的包围矩形
+
+        返回:
+            list: pygame.Rect列表
+        """
+        slots = self.active_slots()
+        if len(slots) == 0:
+            return []
+
+        points = np.concatenate([self.trail[slots], self.pos[slots][:, None, :]], axis=1)
+        low = points.min(axis=1).astype(np.int64)
+        high = points.max(axis=1).astype(np.int64)
+        size = self.size[slots].astype(np.int64)
+        left = low[:, 0] - size - 1
+        top = low[:, 1] - size - 1
+        width = high[:, 0] - left + size + 2
+        height = high[:, 1] - top + size + 2
+        return [pygame.Rect(*rect) for rect in np.stack([left, top, width, height], axis=1).tolist()]
+
+    def clear(self):
+        """回收所有子弹"""
+        self.active[:] = False
+        self.free_slots = list(range(self.capacity - 1, -1, -1))
+
+    def __len__(self):
+        """活跃子弹数量"""
+        return int(np.count_nonzero(self.active))
@@ -0,0 +1,113 @@
+import pygame
+from collections import OrderedDict
+
+class TrailAtlas:
+    """
+    子弹拖尾图集
+
+    拖尾有n个位置时，第i个位置（从旧到新）绘制透明度为 255*(i+1)/n、
+    半径为 size*(i+1)/n 的圆。所有 (n, i) 组合预先画在同一张图上，
+    第n-1行存放拖尾长度为n时的各个圆，每个圆是图上的一个子表面。
+    """
+    def __init__(self, color, size, trail_length):
+        """
+        生成拖尾图集
+
+        参数:
+            color (tuple): 子弹颜色
+            size (int): 子弹半径
+            trail_length (int): 拖尾的最大长度
+        """
+        self.color = tuple(color)
+        self.size = size
+        self.trail_length = trail_length
+
+        cell = max(1, size * 2)
+        self.sheet = pygame.Surface((cell * trail_length, cell * trail_length), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            self.sheet = self.sheet.convert_alpha()
+
+        # steps[n - 1][i] 为 (圆的半径, 子表面)，半径为0时子表面为None
+        self.steps = []
+        for n in range(1, trail_length + 1):
+            row = []
+            for i in range(n):
+                alpha = int(255 * (i + 1) / n)
+                s = int(size * (i + 1) / n)
+                if s > 0:
+                    sprite = self.sheet.subsurface((i * cell, (n - 1) * cell, s * 2, s * 2))
+                    pygame.draw.circle(sprite, (*self.color, alpha), (s, s), s)
+                    row.append((s, sprite))
+                else:
+                    row.append((0, None))
+            self.steps.append(row)
+
+    def get_steps(self, count):
+        """
+        获取拖尾长度为count时各位置对应的圆
+
+        返回:
+            list: (半径, 子表面) 列表，从旧到新
+        """
+        return self.steps[count - 1]
+
+class TrailAtlasCache:
+    """
+    拖尾图集缓存
+
+    以 (颜色, 半径, 拖尾长度) 为键缓存TrailAtlas，所有子弹共享。
+    """
+    def __init__(self, max_entries=64):
+        """
+        初始化拖尾图集缓存
+
+        参数:
+            max_entries (int): 缓存的最大图集数，超过后按LRU淘汰
+        """
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+
+        # 命中统计
+        self.hits = 0
+        self.misses = 0
+
+    def get_atlas(self, color, size, trail_length):
+        """
+        获取拖尾图集，不存在时生成
+
+        参数:
+            color (tuple): 子弹颜色
+            size (int): 子弹半径
+            trail_length (int): 拖尾的最大长度
+
+        返回:
+            TrailAtlas: 共享的拖尾图集
+        """
+        key = (tuple(color), size, trail_length)
+        atlas = self._cache.get(key)
+        if atlas is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return atlas
+
+        self.misses += 1
+        atlas = TrailAtlas(color, size, trail_length)
+        self._cache[key] = atlas
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return atlas
+
+    def clear(self):
+        """清空缓存"""
+        self._cache.clear()
+
+    def get_stats(self):
+        """获取缓存统计信息"""
+        return {
+            'cached': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+# 全局共享的拖尾图集缓存实例
+trail_atlas_cache = TrailAtlasCache()
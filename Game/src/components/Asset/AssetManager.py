@@ -0,0 +1,171 @@
+import pygame
+import os
+from collections import OrderedDict
+from src.components.Asset.AssetPack import asset_pack
+
+class AssetManager:
+    """
+    资源管理器，统一加载并缓存图片
+
+    同一路径（以及同一目标尺寸）的图片只从磁盘读取一次，所有使用者共享同一个Surface。
+    显示窗口创建后，图片会被转换为屏幕像素格式，使blit走SDL的同格式快速路径。
+    共享的Surface不应被使用者直接修改，需要修改时请先copy()。
+    资源包(asset_pack)已打开时优先从中获取预先缩放好的图片，资源包中没有或已过期时再从磁盘解码。
+    """
+    def __init__(self, max_unused=8):
+        """
+        初始化资源管理器
+
+        参数:
+            max_unused (int): 引用计数为0时仍保留在缓存中的图片数量上限（按LRU淘汰）
+        """
+        self.max_unused = max_unused
+
+        # 缓存: key -> Surface，key为 (规范化路径, 目标尺寸)
+        self._cache = OrderedDict()
+        # 引用计数: key -> 次数
+        self._refcounts = {}
+        # 尚未转换为屏幕格式的key（在显示窗口创建前加载的图片）
+        self._unconverted = set()
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.disk_loads = 0
+
+    def _make_key(self, path, size):
+        """生成缓存键"""
+        norm_path = os.path.normcase(os.path.abspath(path))
+        return (norm_path, tuple(size) if size else None)
+
+    def _convert(self, surface):
+        """
+        将图片转换为屏幕像素格式
+
+        返回:
+            tuple: (转换后的Surface, 是否转换成功)
+        """
+        display = pygame.display.get_surface()
+        if display is None:
+            # 显示窗口尚未创建，无法转换
+            return surface, False
+        if (surface.get_flags() & pygame.SRCALPHA and surface.get_bitsize() == 32
+                and surface.get_masks()[:3] == display.get_masks()[:3]):
+            # 已经是屏幕像素格式（例如来自资源包），不需要再拷贝一次
+            return surface, True
+        if surface.get_flags() & pygame.SRCALPHA:
+            return surface.convert_alpha(), True
+        return surface.convert(), True
+
+    def _load_source(self, path):
+        """从缓存或磁盘获取原始尺寸的图片"""
+        key = self._make_key(path, None)
+        surface = self.get_cached(key)
+        if surface is None:
+            surface = pygame.image.load(path)
+            self.disk_loads += 1
+            surface, converted = self._convert(surface)
+            self._cache[key] = surface
+            self._refcounts.setdefault(key, 0)
+            if not converted:
+                self._unconverted.add(key)
+            self._evict()
+        return surface
+
+    def load_image(self, path, size=None):
+        """
+        获取图片（增加引用计数）
+
+        参数:
+            path (str): 图片路径
+            size (tuple): 目标尺寸(宽, 高)，为None时返回原始尺寸
+
+        返回:
+            Surface: 共享的图片Surface
+
+        异常:
+            pygame.error / FileNotFoundError: 图片无法加载时抛出，与pygame.image.load一致
+        """
+        key = self._make_key(path, size)
+        surface = self.get_cached(key)
+        if surface is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            surface = asset_pack.get_surface(path, size)
+            if surface is not None:
+                surface, converted = self._convert(surface)
+                self._cache[key] = surface
+                if not converted:
+                    self._unconverted.add(key)
+            else:
+                surface = self._load_image(path, size, key)
+
+        self._refcounts[key] = self._refcounts.get(key, 0) + 1
+        self._cache.move_to_end(key)
+        self._evict()
+        return surface
+
+    def _load_image(self, path, size, key):
+        """从磁盘解码图片（必要时缩放）并加入缓存"""
+        source = self._load_source(path)
+        if not size:
+            return source
+        surface = pygame.transform.scale(source, tuple(size))
+        self._cache[key] = surface
+        if self._make_key(path, None) in self._unconverted:
+            self._unconverted.add(key)
+        return surface
+
+    def get_cached(self, key):
+        """按缓存键获取图片，必要时补做屏幕格式转换"""
+        surface = self._cache.get(key)
+        if surface is not None and key in self._unconverted:
+            surface, converted = self._convert(surface)
+            if converted:
+                self._cache[key] = surface
+                self._unconverted.discard(key)
+        return surface
+
+    def release_image(self, path, size=None):
+        """
+        释放一次图片引用
+
+        引用计数降为0的图片不会立即删除，而是进入LRU队列，超过max_unused时被淘汰。
+        """
+        key = self._make_key(path, size)
+        if self._refcounts.get(key, 0) > 0:
+            self._refcounts[key] -= 1
+        self._evict()
+
+    def _evict(self):
+        """淘汰最久未使用且没有引用的图片"""
+        unused = [key for key in self._cache if self._refcounts.get(key, 0) == 0]
+        excess = len(unused) - self.max_unused
+        for key in unused[:max(0, excess)]:
+            del self._cache[key]
+            self._refcounts.pop(key, None)
+            self._unconverted.discard(key)
+
+    def convert_all(self):
+        """显示窗口创建后调用，将之前加载的图片全部转换为屏幕格式"""
+        for key in list(self._unconverted):
+            self.get_cached(key)
+
+    def clear(self):
+        """清空缓存（例如分辨率改变后）"""
+        self._cache.clear()
+        self._refcounts.clear()
+        self._unconverted.clear()
+
+    def get_stats(self):
+        """获取缓存统计信息"""
+        return {
+            'cached': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_loads': self.disk_loads
+        }
+
+# 全局共享的资源管理器实例
+asset_manager = AssetManager()
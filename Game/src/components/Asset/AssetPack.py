@@ -0,0 +1,222 @@
+import pygame
+import os
+import mmap
+import json
+import struct
+import hashlib
+
+class AssetPack:
+    """
+    预烘焙资源包
+
+    资源包由 tools/bake_assets.py 离线生成，保存预先缩放好的、屏幕像素格式（BGRA，即ARGB8888）的像素数据。
+    运行时将资源包以写时复制方式内存映射，用pygame.image.frombuffer直接在映射的内存上创建Surface，不解码也不拷贝；
+    修改这些Surface只会改动进程私有的页面，不会写回文件。
+
+    文件结构:
+        文件头: 魔数、版本号、索引长度
+        索引(JSON): sources - 相对路径 -> 源文件的内容哈希、大小和修改时间
+                    images  - "内容哈希@宽x高" 或 "内容哈希@raw" -> 像素数据的偏移和尺寸
+        像素数据: 从索引之后第一个ALIGN字节对齐的位置开始，每张图片按ALIGN字节对齐，
+                  索引中的偏移相对于像素数据的起始位置
+
+    源文件被修改后（大小或修改时间变化时重新计算内容哈希），对应的条目视为过期，
+    get_surface返回None，调用者回退到普通的加载路径。像素数据超出文件范围的条目（资源包被截断或没有拷贝完整）
+    在打开时就从索引中去掉，同样返回None。
+    """
+    MAGIC = b"AGPK"
+    VERSION = 1
+    HEADER = struct.Struct("<4sII")
+    ALIGN = 64
+    PIXEL_FORMAT = "BGRA"
+
+    def __init__(self):
+        """初始化资源包（尚未打开）"""
+        self.root = None
+        self.index = None
+        self._file = None
+        self._mmap = None
+        self._view = None
+        self.data_start = 0
+        # 已校验的源文件: 相对路径 -> 内容哈希（过期时为None）
+        self._validated = {}
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    @staticmethod
+    def relative_key(path, root):
+        """源文件相对于资源根目录的路径，统一使用/分隔"""
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(root)).replace(os.sep, "/")
+
+    @staticmethod
+    def image_key(content_hash, size):
+        """像素数据的索引键"""
+        if size:
+            return f"{content_hash}@{size[0]}x{size[1]}"
+        return f"{content_hash}@raw"
+
+    @classmethod
+    def align(cls, offset):
+        """向上对齐到ALIGN字节"""
+        return (offset + cls.ALIGN - 1) // cls.ALIGN * cls.ALIGN
+
+    @staticmethod
+    def hash_file(path):
+        """计算源文件的内容哈希"""
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+    def open(self, pack_path, root):
+        """
+        打开并映射资源包
+
+        参数:
+            pack_path (str): 资源包路径
+            root (str): 资源根目录，资源包中的路径相对于它
+
+        返回:
+            bool: 是否成功打开；文件不存在或格式不符时返回False，此时所有查询都返回None
+        """
+        self.close()
+        try:
+            f = open(pack_path, "rb")
+        except OSError:
+            return False
+
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            magic, version, index_length = self.HEADER.unpack_from(mapped, 0)
+            if magic != self.MAGIC or version != self.VERSION:
+                raise ValueError(f"资源包版本不匹配: {magic!r} v{version}")
+            index_start = self.HEADER.size
+            index = json.loads(bytes(mapped[index_start:index_start + index_length]).decode("utf-8"))
+            if index.get("format") != self.PIXEL_FORMAT:
+                raise ValueError(f"资源包像素格式不匹配: {index.get('format')}")
+            data_start = self.align(index_start + index_length)
+            images = self._valid_images(index["images"], len(mapped) - data_start)
+        except (OSError, ValueError, KeyError, TypeError, struct.error) as e:
+            print(f"忽略资源包 {pack_path}: {e}")
+            f.close()
+            return False
+
+        self._file = f
+        self._mmap = mapped
+        self._view = memoryview(mapped)
+        if len(images) < len(index["images"]):
+            print(f"资源包 {pack_path} 不完整: 忽略 {len(index['images']) - len(images)} 张超出文件范围的图片")
+        index["images"] = images
+        self.index = index
+        self.data_start = data_start
+        self.root = root
+        self._validated = {}
+        return True
+
+    @staticmethod
+    def _valid_images(images, data_length):
+        """
+        去掉像素数据不完全在文件中的条目
+
+        参数:
+            images (dict): 索引中的图片条目
+            data_length (int): 像素数据区的实际长度
+
+        返回:
+            dict: 可以安全读取的条目
+        """
+        valid = {}
+        for key, entry in images.items():
+            width, height, offset = entry["width"], entry["height"], entry["offset"]
+            if width > 0 and height > 0 and 0 <= offset and offset + width * height * 4 <= data_length:
+                valid[key] = entry
+        return valid
+
+    def is_open(self):
+        """资源包是否已打开"""
+        return self.index is not None
+
+    def _source_hash(self, path):
+        """获取源文件的内容哈希，源文件不在资源包中或已被修改时返回None"""
+        key = self.relative_key(path, self.root)
+        if key in self._validated:
+            return self._validated[key]
+
+        source = self.index["sources"].get(key)
+        content_hash = None
+        if source is not None:
+            try:
+                stat = os.stat(path)
+                if stat.st_size == source["size"] and stat.st_mtime_ns == source["mtime_ns"]:
+                    content_hash = source["hash"]
+                elif self.hash_file(path) == source["hash"]:
+                    # 只是修改时间变了，内容未变
+                    content_hash = source["hash"]
+                else:
+                    self.stale += 1
+            except OSError:
+                pass
+        self._validated[key] = content_hash
+        return content_hash
+
+    def get_surface(self, path, size=None):
+        """
+        从资源包获取图片
+
+        参数:
+            path (str): 源图片路径
+            size (tuple): 目标尺寸(宽, 高)，为None时获取原始尺寸
+
+        返回:
+            Surface: 直接引用映射内存的Surface（共享，修改只影响本进程的副本）；资源包中没有或已过期时返回None
+        """
+        if self.index is None:
+            return None
+
+        content_hash = self._source_hash(path)
+        entry = None
+        if content_hash is not None:
+            entry = self.index["images"].get(self.image_key(content_hash, size))
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        width, height = entry["width"], entry["height"]
+        offset = self.data_start + entry["offset"]
+        pixels = self._view[offset:offset + width * height * 4]
+        return pygame.image.frombuffer(pixels, (width, height), self.PIXEL_FORMAT)
+
+    def close(self):
+        """
+        关闭资源包
+
+        仍在使用资源包Surface时不能关闭（映射的内存仍被引用），此时保持打开并返回False。
+        """
+        if self._mmap is None:
+            return True
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            self._view = memoryview(self._mmap)
+            return False
+        self._file.close()
+        self._file = None
+        self._mmap = None
+        self._view = None
+        self.index = None
+        return True
+
+    def get_stats(self):
+        """获取统计信息"""
+        return {
+            'images': len(self.index["images"]) if self.index else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale
+        }
+
+# 全局共享的资源包实例，在显示窗口创建后打开
+asset_pack = AssetPack()
@@ -0,0 +1,67 @@
+import pygame
+from collections import OrderedDict
+
+class SpriteCache:
+    """
+    预缩放精灵缓存
+
+    以 (原始图片, 目标尺寸, 缩放比例) 为键缓存缩放后的图片，
+    同一图片在同一布局下只缩放一次，绘制时直接blit缓存结果。
+    """
+    def __init__(self, max_entries=256):
+        """
+        初始化精灵缓存
+
+        参数:
+            max_entries (int): 缓存的最大条目数，超过后按LRU淘汰
+        """
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+
+        # 命中统计
+        self.hits = 0
+        self.misses = 0
+
+    def get_scaled(self, source, size, scale_factor=1.0):
+        """
+        获取缩放后的图片
+
+        参数:
+            source (Surface): 原始图片
+            size (tuple): 目标尺寸(宽, 高)
+            scale_factor (float): 当前布局的缩放比例
+
+        返回:
+            Surface: 缩放后的图片（共享，不应直接修改）
+        """
+        key = (source, tuple(size), scale_factor)
+        sprite = self._cache.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return sprite
+
+        self.misses += 1
+        if source.get_size() == tuple(size):
+            sprite = source
+        else:
+            sprite = pygame.transform.scale(source, tuple(size))
+        self._cache[key] = sprite
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return sprite
+
+    def clear(self):
+        """清空缓存（例如分辨率改变后）"""
+        self._cache.clear()
+
+    def get_stats(self):
+        """获取缓存统计信息"""
+        return {
+            'cached': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+# 全局共享的精灵缓存实例
+sprite_cache = SpriteCache()
@@ -0,0 +1,133 @@
+import pygame
+from src.components.Font.FontRegistry import font_registry
+
+class StaticLayer:
+    """
+    静态背景层，将每帧不变的背景内容预先合成到一张Surface上
+
+    包括背景图片和遮罩、上下区域之间的渐变过渡、游戏标题及阴影、金色装饰线和版本信息。
+    只在启动和分辨率改变时重新合成，主循环每帧只需一次blit。
+    """
+    # 下方1/3区域的背景颜色
+    BOTTOM_BG_COLOR = (200, 200, 200)
+    # 没有背景图片时使用的颜色
+    WHITE = (255, 255, 255)
+    # 渐变过渡区域的高度
+    GRADIENT_HEIGHT = 30
+
+    def __init__(self, screen_size, background_image=None, title_font=None, title="卡牌战棋", version="Version 1.0"):
+        """
+        初始化静态背景层
+
+        参数:
+            screen_size (tuple): 屏幕大小
+            background_image (Surface): 原始背景图片，为None时使用纯色背景
+            title_font (Font): 标题字体，为None时使用默认字体
+            title (str): 标题文字
+            version (str): 版本信息文字
+        """
+        self.background_image = background_image
+        self.title_font = title_font
+        self.title = title
+        self.version = version
+        self.surface = None
+        self.rebuild(screen_size)
+
+    def rebuild(self, screen_size):
+        """
+        按新的屏幕大小重新合成背景层，在启动和分辨率改变时调用
+
+        参数:
+            screen_size (tuple): 屏幕大小
+        """
+        self.screen_size = screen_size
+        # 计算缩放比例（基于参考分辨率1920*1200）
+        self.scale_factor = min(screen_size[0] / 1920, screen_size[1] / 1200)
+
+        surface = pygame.Surface(screen_size)
+        if pygame.display.get_surface() is not None:
+            # 转换为屏幕像素格式，使每帧的blit走快速路径
+            surface = surface.convert()
+
+        self._draw_background(surface)
+        self._draw_title(surface)
+        self._draw_version(surface)
+        self.surface = surface
+        return surface
+
+    def _draw_background(self, surface):
+        """绘制背景图片、遮罩和渐变过渡"""
+        if self.background_image is None:
+            surface.fill(self.WHITE)  # 如果没有背景图片，使用白色背景
+            return
+
+        # 计算背景图片的尺寸，只占据屏幕上方2/3
+        bg_width = self.screen_size[0]
+        bg_height = int(self.screen_size[1] * 2/3)  # 屏幕高度的2/3
+
+        # 调整背景图片大小，高度增加50像素，以便向上移动
+        background = pygame.transform.scale(self.background_image, (bg_width, bg_height + 50))
+
+        # 创建半透明遮罩，使游戏元素更加突出
+        overlay = pygame.Surface((bg_width, bg_height + 50), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 100))  # 黑色半透明遮罩，alpha=100
+        background.blit(overlay, (0, 0))
+
+        # 先填充整个屏幕为底部背景色
+        surface.fill(self.BOTTOM_BG_COLOR)
+
+        # 绘制背景图片在上方2/3区域，向上偏移50像素
+        surface.blit(background, (0, -50))
+
+        # 创建上下部分之间的渐变过渡效果
+        gradient_start_y = bg_height - self.GRADIENT_HEIGHT
+        line_surface = pygame.Surface((bg_width, 1), pygame.SRCALPHA)
+        for i in range(self.GRADIENT_HEIGHT):
+            # 计算当前渐变线的颜色
+            ratio = i / self.GRADIENT_HEIGHT
+            r = int(self.BOTTOM_BG_COLOR[0] * ratio)
+            g = int(self.BOTTOM_BG_COLOR[1] * ratio)
+            b = int(self.BOTTOM_BG_COLOR[2] * ratio)
+
+            # 半透明线条，越往下越不透明
+            alpha = int(150 * (1 - ratio))
+            line_surface.fill((r, g, b, alpha))
+            surface.blit(line_surface, (0, gradient_start_y + i))
+
+    def _draw_title(self, surface):
+        """绘制游戏标题、阴影和标题下的装饰线"""
+        title_font = self.title_font or font_registry.get_font(None, int(60 * self.scale_factor))
+        title_text = title_font.render(self.title, True, (255, 215, 0))  # 金色标题
+        title_shadow = title_font.render(self.title, True, (50, 50, 50))  # 深灰色阴影
+
+        # 添加阴影效果
+        center_x = self.screen_size[0] // 2
+        shadow_offset = int(3 * self.scale_factor)
+        shadow_rect = title_shadow.get_rect(center=(center_x + shadow_offset, 40 + shadow_offset))
+        surface.blit(title_shadow, shadow_rect)
+
+        # 绘制主标题
+        title_rect = title_text.get_rect(center=(center_x, 40))
+        surface.blit(title_text, title_rect)
+
+        # 绘制标题下的渐变装饰线
+        line_width = int(400 * self.scale_factor)
+        line_height = int(2 * self.scale_factor)
+        line_y = title_rect.bottom + int(10 * self.scale_factor)
+        line_surf = pygame.Surface((line_width, 1), pygame.SRCALPHA)
+        for i in range(line_height):
+            alpha = 255 - int(i * (255 / line_height))
+            line_surf.fill((255, 215, 0, alpha))  # 金色带透明度
+            surface.blit(line_surf, (center_x - line_width // 2, line_y + i))
+
+    def _draw_version(self, surface):
+        """绘制右下角的版本信息"""
+        version_font = font_registry.get_font(None, int(20 * self.scale_factor))
+        version_text = version_font.render(self.version, True, (200, 200, 200))
+        version_rect = version_text.get_rect(bottomright=(self.screen_size[0] - int(10 * self.scale_factor),
+                                                          self.screen_size[1] - int(10 * self.scale_factor)))
+        surface.blit(version_text, version_rect)
+
+    def draw(self, screen):
+        """将合成好的背景层绘制到屏幕上"""
+        screen.blit(self.surface, (0, 0))
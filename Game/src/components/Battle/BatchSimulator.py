@@ -0,0 +1,175 @@
+import numpy as np
+from src.components.Battle.BattleEngine import BattlePiece, ROWS, COLS
+
+class BatchSimulator:
+    """
+    批量战斗模拟器
+
+    同时模拟N对玩家/敌方棋盘，每方棋盘用形状为(N, 3, 3)的攻击力、生命值、是否有棋子和是否可攻击数组表示。
+    每个阶段用一次向量化计算完成所有棋盘对的目标选择和伤害结算，规则与BattleEngine完全一致:
+    攻击同一列的第一个棋子（玩家从第2行往第0行找，敌方从第0行往第2行找），
+    目标在阶段开始时选定，伤害在阶段结束时按行优先的攻击顺序结算，已死亡的棋子不再受到伤害。
+    """
+    PLAYER_WIN = 1
+    ENEMY_WIN = -1
+    DRAW = 0
+
+    def __init__(self, player_attack, player_hp, enemy_attack, enemy_hp,
+                 player_occupied=None, enemy_occupied=None, player_ready=None, enemy_ready=None):
+        """
+        初始化批量模拟器（数组会被复制，不修改传入的数组）
+
+        参数:
+            player_attack, player_hp (ndarray): 玩家棋子的攻击力和生命值，形状(N, 3, 3)
+            enemy_attack, enemy_hp (ndarray): 敌方棋子的攻击力和生命值，形状(N, 3, 3)
+            player_occupied, enemy_occupied (ndarray): 格子上是否有棋子，为None时以生命值>0判断
+            player_ready, enemy_ready (ndarray): 第一回合中棋子是否可以攻击，为None时全部可以攻击
+        """
+        self.player_attack = np.array(player_attack, dtype=np.int64)
+        self.player_hp = np.array(player_hp, dtype=np.int64)
+        self.enemy_attack = np.array(enemy_attack, dtype=np.int64)
+        self.enemy_hp = np.array(enemy_hp, dtype=np.int64)
+        self.player_occupied = self._mask(player_occupied, self.player_hp > 0)
+        self.enemy_occupied = self._mask(enemy_occupied, self.enemy_hp > 0)
+        self.player_ready = self._mask(player_ready, np.ones_like(self.player_occupied))
+        self.enemy_ready = self._mask(enemy_ready, np.ones_like(self.enemy_occupied))
+        self.count = self.player_hp.shape[0]
+
+    @staticmethod
+    def _mask(mask, default):
+        """复制布尔数组，为None时使用默认值"""
+        return np.array(default if mask is None else mask, dtype=bool)
+
+    @classmethod
+    def from_boards(cls, board_pairs):
+        """
+        从棋盘对创建批量模拟器
+
+        参数:
+            board_pairs (list): (玩家棋盘, 敌方棋盘) 列表，棋盘为BattleBoard或其子类（例如Chessboard）
+
+        返回:
+            BatchSimulator: 批量模拟器
+        """
+        count = len(board_pairs)
+        arrays = {name: np.zeros((count, ROWS, COLS), dtype=np.int64) for name in ("pa", "ph", "ea", "eh")}
+        masks = {name: np.zeros((count, ROWS, COLS), dtype=bool) for name in ("po", "eo", "pr", "er")}
+        for index, (player_board, enemy_board) in enumerate(board_pairs):
+            for board, attack, hp, occupied, ready in ((player_board, "pa", "ph", "po", "pr"),
+                                                       (enemy_board, "ea", "eh", "eo", "er")):
+                for row in range(ROWS):
+                    for col in range(COLS):
+                        piece = board.grid[row][col]
+                        if isinstance(piece, BattlePiece):
+                            arrays[attack][index, row, col] = piece.attack
+                            arrays[hp][index, row, col] = piece.lifepoint
+                            masks[occupied][index, row, col] = True
+                            masks[ready][index, row, col] = piece.can_attack()
+        return cls(arrays["pa"], arrays["ph"], arrays["ea"], arrays["eh"],
+                   masks["po"], masks["eo"], masks["pr"], masks["er"])
+
+    @staticmethod
+    def _resolve_phase(attack, occupied, ready, defender_hp, defender_occupied, is_player):
+        """
+        一方所有棋子同时发动攻击（原地修改防守方的生命值和棋子数组）
+
+        为了让每一步都是长度为M的连续数组运算，这里的数组布局为(3, 3, M)，即 [行][列][棋盘对]。
+
+        参数:
+            attack, occupied, ready (ndarray): 攻击方的攻击力、是否有棋子、是否可以攻击
+            defender_hp, defender_occupied (ndarray): 防守方的生命值和是否有棋子
+            is_player (bool): 攻击方是否为玩家
+
+        返回:
+            ndarray: 形状(M,)，每个棋盘对本阶段的攻击次数
+        """
+        # 在阶段开始时的棋盘上为每一列选定目标行：玩家从第2行往第0行找，敌方从第0行往第2行找
+        d0, d1, d2 = defender_occupied
+        if is_player:
+            target_row = np.where(d2, 2, np.where(d1, 1, 0))
+        else:
+            target_row = np.where(d0, 0, np.where(d1, 1, 2))
+        has_target = d0 | d1 | d2  # (3, M)
+
+        # 有目标的列中，所有可以攻击的棋子都攻击同一个目标
+        attacking = occupied & ready & has_target  # (3, 3, M)
+        damage = np.where(attacking, attack, 0)
+
+        # 按行优先的攻击顺序逐个结算：任一次攻击后生命值<=0即死亡，之后的攻击不再生效
+        cumulative = np.cumsum(damage, axis=0)  # 沿攻击方的行累加
+        target_hp = np.choose(target_row, defender_hp)  # (3, M)
+        killed = ((target_hp - cumulative <= 0) & attacking).any(axis=0)
+        new_hp = np.where(killed, target_hp, target_hp - cumulative[-1])
+
+        for row in range(ROWS):
+            selected = target_row == row
+            defender_hp[row] = np.where(selected, new_hp, defender_hp[row])
+            defender_occupied[row] &= ~(selected & killed)
+
+        return attacking.sum(axis=(0, 1))
+
+    def simulate(self, max_rounds=50):
+        """
+        模拟所有棋盘对直到分出胜负、陷入僵局或达到最大回合数
+
+        每回合结束后把已经结束的棋盘对移出工作数组，后面的回合只计算仍在进行的棋盘对。
+
+        返回:
+            tuple: (胜负数组, 回合数数组)，形状均为(N,)；
+                   胜负为PLAYER_WIN、ENEMY_WIN或DRAW，回合数为结束时进行的回合数
+        """
+        winner = np.full(self.count, self.DRAW, dtype=np.int8)
+        rounds = np.full(self.count, max_rounds, dtype=np.int32)
+
+        # 工作数组使用(3, 3, M)布局，index为工作数组中每一列对应的原始棋盘对编号
+        def working(array):
+            return np.moveaxis(array, 0, -1).copy()
+
+        player_attack, player_hp = working(self.player_attack), working(self.player_hp)
+        enemy_attack, enemy_hp = working(self.enemy_attack), working(self.enemy_hp)
+        player_occupied, enemy_occupied = working(self.player_occupied), working(self.enemy_occupied)
+        player_ready, enemy_ready = working(self.player_ready), working(self.enemy_ready)
+        index = np.arange(self.count)
+
+        for round_index in range(1, max_rounds + 1):
+            if len(index) == 0:
+                break
+            attack_count = self._resolve_phase(player_attack, player_occupied, player_ready,
+                                               enemy_hp, enemy_occupied, True)
+            attack_count += self._resolve_phase(enemy_attack, enemy_occupied, enemy_ready,
+                                                player_hp, player_occupied, False)
+            # 回合结束时重置攻击状态
+            player_ready = enemy_ready = True
+
+            player_empty = ~player_occupied.any(axis=(0, 1))
+            enemy_empty = ~enemy_occupied.any(axis=(0, 1))
+            finished = player_empty | enemy_empty | (attack_count == 0)
+            if not finished.any():
+                continue
+
+            winner[index[finished & enemy_empty & ~player_empty]] = self.PLAYER_WIN
+            winner[index[finished & player_empty & ~enemy_empty]] = self.ENEMY_WIN
+            rounds[index[finished]] = round_index
+
+            # 移出已经结束的棋盘对
+            keep = ~finished
+            index = index[keep]
+            player_attack, player_hp = player_attack[..., keep], player_hp[..., keep]
+            enemy_attack, enemy_hp = enemy_attack[..., keep], enemy_hp[..., keep]
+            player_occupied, enemy_occupied = player_occupied[..., keep], enemy_occupied[..., keep]
+
+        return winner, rounds
+
+    @classmethod
+    def summarize(cls, winner):
+        """
+        统计胜负次数
+
+        返回:
+            dict: 玩家胜、敌方胜和平局的次数
+        """
+        return {
+            'player': int(np.count_nonzero(winner == cls.PLAYER_WIN)),
+            'enemy': int(np.count_nonzero(winner == cls.ENEMY_WIN)),
+            'draw': int(np.count_nonzero(winner == cls.DRAW))
+        }
@@ -0,0 +1,369 @@
+"""
+无界面的战斗核心
+
+只包含棋子属性、棋盘和攻击规则，不依赖pygame，可以在普通的测试进程中大量创建和模拟棋盘。
+界面层的Chess继承BattlePiece，Chessboard继承BattleBoard，两者共用同一套目标选择和伤害规则。
+
+规则:
+    - 棋子攻击对手棋盘上同一列的第一个棋子。玩家攻击时从下往上（第2行到第0行）查找，
+      敌方攻击时从上往下（第0行到第2行）查找。
+      目标通过棋盘的占用掩码查Targeting中预先计算的目标表得到，不需要逐格扫描。
+    - 伤害等于攻击者的攻击力。一个阶段内的所有目标都在阶段开始时的棋盘状态上选定，
+      伤害在阶段结束时按攻击顺序结算；生命值降到0及以下的棋子被移除，已死亡的棋子不再受到后续伤害。
+    - 每个棋子在一个回合内只能攻击一次，回合结束时重置攻击状态。
+"""
+
+from src.components.Battle.Targeting import ROWS, COLS, cell_bit, FRONTLINE
+
+class BattlePiece:
+    """
+    棋子的战斗属性：攻击力、生命值、职业、是否融合和本回合是否已攻击
+    """
+    __slots__ = ("attack", "lifepoint", "job", "isFusion", "isAttack", "__weakref__")  # 录像只保存弱引用
+
+    def __init__(self, attack=0, lifepoint=0, job="", is_fusion=False):
+        """
+        初始化棋子
+
+        参数:
+            attack (int): 攻击力
+            lifepoint (int): 生命值
+            job (str): 棋子职业/类型
+            is_fusion (bool): 是否为融合棋子
+        """
+        self.attack = attack
+        self.lifepoint = lifepoint
+        self.job = job
+        self.isFusion = is_fusion
+        self.isAttack = 0  # 标记棋子是否已经攻击过
+
+    def mark_changed(self):
+        """属性改变后调用，界面层的棋子在这里通知容器重绘"""
+        pass
+
+    def get_attack(self):
+        """获取攻击力"""
+        return self.attack
+
+    def get_lifepoint(self):
+        """获取生命值"""
+        return self.lifepoint
+
+    def get_job(self):
+        """获取职业"""
+        return self.job
+
+    def is_fusion(self):
+        """检查是否为融合棋子"""
+        return self.isFusion
+
+    def set_attack(self, attack):
+        """设置攻击力"""
+        self.attack = attack
+        self.mark_changed()
+
+    def set_lifepoint(self, lifepoint):
+        """设置生命值"""
+        self.lifepoint = lifepoint
+        self.mark_changed()
+
+    def set_job(self, job):
+        """设置职业"""
+        self.job = job
+        self.mark_changed()
+
+    def set_fusion(self, is_fusion):
+        """设置是否为融合棋子"""
+        self.isFusion = is_fusion
+        self.mark_changed()
+
+    def take_damage(self, damage):
+        """
+        受到伤害
+
+        参数:
+            damage (int): 伤害值
+
+        返回:
+            bool: 如果棋子死亡返回True，否则返回False
+        """
+        self.lifepoint -= damage
+        self.mark_changed()
+        return self.lifepoint <= 0
+
+    def reset_attack_status(self):
+        """重置攻击状态"""
+        self.isAttack = 0
+
+    def mark_as_attacked(self):
+        """标记为已攻击"""
+        self.isAttack = 1
+
+    def can_attack(self):
+        """检查是否可以攻击"""
+        return self.isAttack == 0
+
+    def to_battle_piece(self):
+        """复制出一个只有战斗属性的棋子（用于模拟，不影响原棋子）"""
+        piece = BattlePiece(self.attack, self.lifepoint, self.job, self.isFusion)
+        piece.isAttack = self.isAttack
+        return piece
+
+    def __str__(self):
+        """返回棋子的字符串表示"""
+        fusion_status = "融合棋子" if self.isFusion else "普通棋子"
+        return f"{self.job} - 攻击力:{self.attack} 生命值:{self.lifepoint} ({fusion_status})"
+
+class BattleBoard:
+    """
+    3x3的战斗棋盘，grid[row][col]为BattlePiece或None
+
+    occupancy是有棋子的格子的位掩码（参见Targeting），所有对grid的修改都应通过set_cell，
+    以便同时更新掩码；目标选择只需要用掩码查预先计算的目标表。
+    """
+    __slots__ = ("grid", "occupancy")
+
+    def __init__(self):
+        """初始化空棋盘"""
+        self.grid = [[None for _ in range(COLS)] for _ in range(ROWS)]
+        self.occupancy = 0
+
+    def set_cell(self, row, col, piece):
+        """直接设置指定格子的内容（可以为None）并更新占用掩码，界面层的棋盘在这里更新位置和重绘"""
+        self.grid[row][col] = piece
+        if isinstance(piece, BattlePiece):
+            self.occupancy |= cell_bit(row, col)
+        else:
+            self.occupancy &= ~cell_bit(row, col)
+
+    def place_piece(self, piece, row, col):
+        """在指定位置放置棋子"""
+        if 0 <= row < ROWS and 0 <= col < COLS and self.grid[row][col] is None:
+            self.set_cell(row, col, piece)
+            return True
+        return False
+
+    def remove_piece(self, row, col):
+        """移除指定位置的棋子"""
+        if 0 <= row < ROWS and 0 <= col < COLS:
+            piece = self.grid[row][col]
+            self.set_cell(row, col, None)
+            return piece
+        return None
+
+    def find_target(self, col, is_player):
+        """
+        查找作为攻击目标的行
+
+        参数:
+            col (int): 列索引
+            is_player (bool): 是否为玩家攻击（攻击方是玩家时，本棋盘是敌方棋盘）
+
+        返回:
+            int: 目标所在的行，该列没有棋子时返回None
+        """
+        targets = FRONTLINE.table[is_player][self.occupancy][col]
+        return targets[0][0] if targets else None
+
+    def find_targets(self, col, is_player, table=FRONTLINE):
+        """
+        按指定的目标规则查找攻击目标
+
+        参数:
+            col (int): 攻击者所在列
+            is_player (bool): 是否为玩家攻击
+            table (TargetTable): 目标表，默认为攻击同一列最靠前的棋子
+
+        返回:
+            tuple: 目标格子 ((行, 列), ...)
+        """
+        return table.lookup(self.occupancy, col, is_player)
+
+    def pieces(self):
+        """
+        遍历棋盘上的所有棋子（按行优先顺序）
+
+        返回:
+            generator: (行, 列, 棋子)
+        """
+        for row in range(ROWS):
+            for col in range(COLS):
+                piece = self.grid[row][col]
+                if isinstance(piece, BattlePiece):
+                    yield row, col, piece
+
+    def is_empty(self):
+        """棋盘上是否没有棋子"""
+        return self.occupancy == 0
+
+    def reset_attack_status(self):
+        """重置棋盘上所有棋子的攻击状态"""
+        for row, col, piece in self.pieces():
+            piece.reset_attack_status()
+
+    def to_battle_board(self):
+        """复制出一个只有战斗属性的棋盘（用于模拟，不影响原棋盘和棋子）"""
+        board = BattleBoard()
+        for row, col, piece in self.pieces():
+            board.set_cell(row, col, piece.to_battle_piece())
+        return board
+
+def apply_damage(board, hits):
+    """
+    结算一个阶段内对一个棋盘的所有攻击：按目标累加伤害，每个目标只调用一次take_damage
+
+    与逐次结算的结果相同（死亡的棋子不再受到后续伤害，但它已经被移除），而且与攻击的先后顺序无关。
+    即时模拟（BattleEngine）通过这里结算；动画模式（TurnQueue）由CombatSystem.apply_board_damage按相同的规则结算。
+
+    参数:
+        board (BattleBoard): 防守方棋盘
+        hits (list): 按攻击顺序排列的 (目标行, 目标列, 伤害)
+
+    返回:
+        list: 被击败的 (行, 列, 棋子) 列表，按每个目标第一次被攻击的顺序排列
+    """
+    totals = {}
+    for row, col, damage in hits:
+        cell = row * COLS + col
+        totals[cell] = totals.get(cell, 0) + damage
+    killed = []
+    grid = board.grid
+    for cell, damage in totals.items():
+        row, col = divmod(cell, COLS)
+        target = grid[row][col]
+        if isinstance(target, BattlePiece) and target.take_damage(damage):
+            board.remove_piece(row, col)
+            killed.append((row, col, target))
+    return killed
+
+class BattleEngine:
+    """
+    战斗模拟器，按规则结算玩家棋盘和敌方棋盘之间的攻击
+    """
+    __slots__ = ("player_board", "enemy_board")
+
+    def __init__(self, player_board, enemy_board):
+        """
+        初始化战斗模拟器
+
+        参数:
+            player_board (BattleBoard): 玩家棋盘
+            enemy_board (BattleBoard): 敌方棋盘
+        """
+        self.player_board = player_board
+        self.enemy_board = enemy_board
+
+    def plan_attack(self, row, col, is_player):
+        """
+        为一个棋子选择攻击目标
+
+        参数:
+            row (int): 攻击者所在行
+            col (int): 攻击者所在列
+            is_player (bool): 攻击者是否为玩家棋子
+
+        返回:
+            tuple: (攻击者行, 列, 目标行, 伤害)，不能攻击或没有目标时返回None
+        """
+        attacker_board, defender_board = self.get_boards(is_player)
+        attacker = attacker_board.grid[row][col]
+        if not isinstance(attacker, BattlePiece) or not attacker.can_attack():
+            return None
+        target_row = defender_board.find_target(col, is_player)
+        if target_row is None:
+            return None
+        return row, col, target_row, attacker.attack
+
+    def plan_phase(self, is_player):
+        """
+        在当前棋盘状态上为一方所有可以攻击的棋子选择目标（按行优先顺序）
+
+        返回:
+            list: (攻击者行, 列, 目标行, 伤害) 列表
+        """
+        attacks = []
+        attacker_board = self.get_boards(is_player)[0]
+        for row, col, piece in attacker_board.pieces():
+            attack = self.plan_attack(row, col, is_player)
+            if attack is not None:
+                attacks.append(attack)
+        return attacks
+
+    def apply_attacks(self, attacks, is_player):
+        """
+        阶段结束时结算伤害（同一目标的伤害先累加再一次结算），移除死亡的棋子
+
+        参数:
+            attacks (list): plan_phase返回的攻击列表
+            is_player (bool): 攻击方是否为玩家
+
+        返回:
+            list: 被击败的 (行, 列, 棋子) 列表
+        """
+        defender_board = self.get_boards(is_player)[1]
+        return apply_damage(defender_board, ((target_row, col, damage) for row, col, target_row, damage in attacks))
+
+    def resolve_phase(self, is_player):
+        """
+        一方所有棋子发动攻击：先选定全部目标，再统一结算伤害
+
+        返回:
+            tuple: (攻击列表, 被击败的棋子列表)
+        """
+        attacks = self.plan_phase(is_player)
+        attacker_board = self.get_boards(is_player)[0]
+        for row, col, target_row, damage in attacks:
+            attacker_board.grid[row][col].mark_as_attacked()
+        return attacks, self.apply_attacks(attacks, is_player)
+
+    def play_round(self):
+        """
+        进行一个完整的回合：玩家阶段、敌方阶段，然后重置所有棋子的攻击状态
+
+        返回:
+            tuple: (回合结束后的胜负（参见get_winner）, 本回合双方的攻击次数)
+        """
+        player_attacks = self.resolve_phase(True)[0]
+        enemy_attacks = self.resolve_phase(False)[0]
+        self.player_board.reset_attack_status()
+        self.enemy_board.reset_attack_status()
+        return self.get_winner(), len(player_attacks) + len(enemy_attacks)
+
+    def simulate(self, max_rounds=50):
+        """
+        模拟到一方被消灭或达到最大回合数
+
+        返回:
+            tuple: (胜负, 进行的回合数)
+        """
+        for round_index in range(1, max_rounds + 1):
+            winner, attack_count = self.play_round()
+            if winner is not None:
+                return winner, round_index
+            if attack_count == 0:
+                # 双方都没有可攻击的目标，之后的回合棋盘不会再变化
+                return "draw", round_index
+        return "draw", max_rounds
+
+    def get_winner(self):
+        """
+        获取胜负
+
+        返回:
+            str: "player"、"enemy"、双方都被消灭时为"draw"，战斗未结束时返回None
+        """
+        player_empty = self.player_board.is_empty()
+        enemy_empty = self.enemy_board.is_empty()
+        if player_empty and enemy_empty:
+            return "draw"
+        if enemy_empty:
+            return "player"
+        if player_empty:
+            return "enemy"
+        return None
+
+    def get_boards(self, is_player):
+        """获取 (攻击方棋盘, 防守方棋盘)"""
+        if is_player:
+            return self.player_board, self.enemy_board
+        return self.enemy_board, self.player_board
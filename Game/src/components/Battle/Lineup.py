@@ -0,0 +1,129 @@
+"""
+阵容：一个棋盘上9个格子的棋子属性，用于离线评估（锦标赛、AI）
+
+阵容是长度为9的元组，按行优先顺序保存每个格子的 (攻击力, 生命值)，空格子为None。
+阵容统一按玩家方向保存（第0行是最靠前、最先被敌方攻击的一行）；作为敌方棋盘使用时上下翻转，
+使阵容的前排仍然是最先被攻击的一行。
+"""
+import random
+import numpy as np
+from src.components.Battle.BattleEngine import BattleBoard, BattlePiece, ROWS, COLS
+
+# main.py中玩家棋盘上的初始棋子：战士(1号格)、法师(5号格)、融合战士(9号格)、弓箭手(4号格)
+DEFAULT_PLAYER_LINEUP = (
+    (5, 10), None, None,
+    (7, 7), (8, 5), None,
+    None, None, (12, 12),
+)
+
+# main.py中对手棋盘上的初始棋子（位置与玩家相同，这里已翻转为玩家方向）
+DEFAULT_ENEMY_LINEUP = (
+    None, None, (13, 11),
+    (8, 6), (9, 4), None,
+    (6, 9), None, None,
+)
+
+# main.py中背包和奖励盒子里的备用棋子
+RESERVE_UNITS = ((6, 8), (7, 7), (9, 4), (15, 15), (10, 12))
+
+def to_board(lineup, as_enemy=False):
+    """
+    把阵容放到战斗棋盘上
+
+    参数:
+        lineup (tuple): 阵容
+        as_enemy (bool): 是否作为敌方棋盘（上下翻转）
+
+    返回:
+        BattleBoard: 新的战斗棋盘
+    """
+    board = BattleBoard()
+    for index, unit in enumerate(lineup):
+        if unit is not None:
+            row, col = divmod(index, COLS)
+            if as_enemy:
+                row = ROWS - 1 - row
+            board.set_cell(row, col, BattlePiece(unit[0], unit[1]))
+    return board
+
+def from_board(board, as_enemy=False):
+    """
+    从棋盘（BattleBoard或Chessboard）读取阵容
+
+    参数:
+        board: 棋盘
+        as_enemy (bool): 棋盘是否为敌方棋盘（上下翻转为玩家方向）
+
+    返回:
+        tuple: 阵容
+    """
+    lineup = [None] * (ROWS * COLS)
+    for row, col, piece in board.pieces():
+        if as_enemy:
+            row = ROWS - 1 - row
+        lineup[row * COLS + col] = (piece.attack, piece.lifepoint)
+    return tuple(lineup)
+
+def to_arrays(lineups, as_enemy=False):
+    """
+    把一组阵容转换为BatchSimulator使用的数组
+
+    返回:
+        tuple: (攻击力, 生命值, 是否有棋子)，形状均为(L, 3, 3)
+    """
+    count = len(lineups)
+    attack = np.zeros((count, ROWS * COLS), dtype=np.int64)
+    hp = np.zeros((count, ROWS * COLS), dtype=np.int64)
+    occupied = np.zeros((count, ROWS * COLS), dtype=bool)
+    for index, lineup in enumerate(lineups):
+        for cell, unit in enumerate(lineup):
+            if unit is not None:
+                attack[index, cell], hp[index, cell] = unit
+                occupied[index, cell] = True
+    arrays = tuple(array.reshape(count, ROWS, COLS) for array in (attack, hp, occupied))
+    if as_enemy:
+        arrays = tuple(array[:, ::-1, :].copy() for array in arrays)
+    return arrays
+
+def generate_variants(base_lineups, count, seed=0, reserve_units=RESERVE_UNITS):
+    """
+    从基础阵容生成变体：随机重新摆放棋子，并有一定概率用备用棋子替换或补充
+
+    参数:
+        base_lineups (list): 基础阵容
+        count (int): 生成的变体数量
+        seed (int): 随机种子，相同的种子生成相同的变体
+        reserve_units (tuple): 可以换入的备用棋子
+
+    返回:
+        list: 变体阵容列表（不包含基础阵容本身）
+    """
+    rng = random.Random(seed)
+    variants = []
+    for index in range(count):
+        units = [unit for unit in base_lineups[index % len(base_lineups)] if unit is not None]
+        # 随机替换一个棋子，或在还有空位时补充一个备用棋子
+        if reserve_units and rng.random() < 0.5:
+            units[rng.randrange(len(units))] = rng.choice(reserve_units)
+        if reserve_units and len(units) < ROWS * COLS and rng.random() < 0.3:
+            units.append(rng.choice(reserve_units))
+        cells = rng.sample(range(ROWS * COLS), len(units))
+        lineup = [None] * (ROWS * COLS)
+        for cell, unit in zip(cells, units):
+            lineup[cell] = unit
+        variants.append(tuple(lineup))
+    return variants
+
+def default_pool(size, seed=0):
+    """
+    锦标赛默认的阵容池：main.py中的玩家和敌方阵容，加上由它们生成的变体
+
+    参数:
+        size (int): 阵容总数（至少为2）
+        seed (int): 生成变体的随机种子
+
+    返回:
+        list: 阵容列表
+    """
+    base = [DEFAULT_PLAYER_LINEUP, DEFAULT_ENEMY_LINEUP]
+    return base + generate_variants(base, max(0, size - len(base)), seed)
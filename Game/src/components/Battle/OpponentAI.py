@@ -0,0 +1,415 @@
+"""
+对手AI：在3x3棋盘上用alpha-beta搜索为敌方选择换位和攻击顺序
+
+搜索状态是18个格子的元组（0-8为敌方棋盘，9-17为玩家棋盘，按行优先顺序），
+每个格子为None或 (职业, 攻击力, 生命值)。一步棋为"交换己方两个格子（或不换位）+ 己方所有棋子攻击"，
+攻击按BattleEngine的规则结算：目标在阶段开始时选定，同一列的攻击都打向同一个目标。
+
+    - 局面用Zobrist哈希标识，每个格子上的 (职业, 攻击力, 生命值) 对应一个随机64位键，
+      换位和结算伤害时只异或发生变化的格子。
+    - 置换表大小固定（2的幂），按哈希低位索引，深度优先替换，每次搜索递增代数淘汰旧局面。
+    - 迭代加深，每层搜索完成后才更新最佳着法；超过时间预算时中止当前层，返回上一层的结果，
+      保证在游戏主循环中调用时不会明显卡顿。
+"""
+import time
+import random
+from src.components.Battle.BattleEngine import BattlePiece
+from src.components.Battle.Targeting import ROWS, COLS, target_rows
+
+CELLS = ROWS * COLS
+ENEMY = 0   # 敌方（AI）行动
+PLAYER = 1  # 玩家行动
+
+# 胜负分数，减去步数使AI更快取胜、更晚落败
+WIN_SCORE = 1000000
+MATE_THRESHOLD = WIN_SCORE - 1000
+
+# 置换表中的分数类型
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+class SearchTimeout(Exception):
+    """搜索超过时间预算"""
+    pass
+
+class ZobristHasher:
+    """
+    Zobrist哈希：为每个 (格子, 职业, 攻击力, 生命值) 按需生成固定的随机键
+    """
+
+    def __init__(self, seed=0):
+        """
+        初始化哈希器
+
+        参数:
+            seed (int): 随机种子，相同的种子对相同的局面得到相同的哈希
+        """
+        self.rng = random.Random(seed)
+        self.keys = {}
+        self.side_key = self.rng.getrandbits(64)
+
+    def key(self, cell, piece):
+        """获取格子上某个棋子的随机键，空格子为0"""
+        if piece is None:
+            return 0
+        entry = (cell, piece)
+        value = self.keys.get(entry)
+        if value is None:
+            value = self.keys[entry] = self.rng.getrandbits(64)
+        return value
+
+    def hash_cells(self, cells):
+        """计算整个局面（不含行动方）的哈希"""
+        value = 0
+        for cell, piece in enumerate(cells):
+            if piece is not None:
+                value ^= self.key(cell, piece)
+        return value
+
+class TranspositionTable:
+    """
+    固定大小的置换表，各字段分别保存在并行的列表中
+
+    每个槽位保存 (哈希, 代数, 深度, 分数, 分数类型, 最佳着法)；同一代中深度更深的结果优先保留，
+    旧一代的结果总是可以被覆盖。
+    """
+
+    def __init__(self, size_bits=16):
+        """
+        初始化置换表
+
+        参数:
+            size_bits (int): 槽位数量为 2**size_bits
+        """
+        size = 1 << size_bits
+        self.mask = size - 1
+        self.keys = [None] * size
+        self.generations = [0] * size
+        self.depths = [0] * size
+        self.values = [0] * size
+        self.flags = [EXACT] * size
+        self.moves = [None] * size
+        self.generation = 0
+        self.used = 0
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self):
+        """开始新的一次搜索，之前的结果变为可覆盖"""
+        self.generation += 1
+
+    def probe(self, key):
+        """
+        查找局面
+
+        返回:
+            int: 命中时返回槽位索引，否则返回None
+        """
+        self.probes += 1
+        slot = key & self.mask
+        if self.keys[slot] == key:
+            self.hits += 1
+            return slot
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        """保存搜索结果（深度优先替换）"""
+        slot = key & self.mask
+        stored = self.keys[slot]
+        if stored is not None and stored != key and self.generations[slot] == self.generation \
+                and self.depths[slot] > depth:
+            return
+        if stored is None:
+            self.used += 1
+        self.keys[slot] = key
+        self.generations[slot] = self.generation
+        self.depths[slot] = depth
+        self.values[slot] = value
+        self.flags[slot] = flag
+        self.moves[slot] = move
+
+    def clear(self):
+        """清空置换表"""
+        size = self.mask + 1
+        self.keys = [None] * size
+        self.moves = [None] * size
+        self.used = 0
+
+    def __len__(self):
+        """已使用的槽位数"""
+        return self.used
+
+class TurnPlan:
+    """
+    AI为敌方选择的一回合行动
+    """
+    __slots__ = ("swap", "attack_order", "score", "depth")
+
+    def __init__(self, swap, attack_order, score, depth):
+        """
+        参数:
+            swap (tuple): 换位的两个格子 ((行, 列), (行, 列))，不换位时为None
+            attack_order (list): 换位之后按顺序发动攻击的棋子位置 [(行, 列), ...]
+            score (int): 搜索得到的局面分数（敌方视角）
+            depth (int): 完成的搜索深度（半回合数）
+        """
+        self.swap = swap
+        self.attack_order = attack_order
+        self.score = score
+        self.depth = depth
+
+class OpponentAI:
+    """
+    敌方AI，每回合选择一次换位（可以不换）和攻击顺序
+    """
+
+    def __init__(self, time_budget_ms=8, max_depth=8, table_bits=16, seed=0):
+        """
+        初始化AI
+
+        参数:
+            time_budget_ms (float): 每次决策的时间预算（毫秒），60FPS下一帧约16毫秒
+            max_depth (int): 最大搜索深度（半回合数）
+            table_bits (int): 置换表大小为 2**table_bits
+            seed (int): Zobrist键的随机种子
+        """
+        self.time_budget_ms = time_budget_ms
+        self.max_depth = max_depth
+        self.hasher = ZobristHasher(seed)
+        self.table = TranspositionTable(table_bits)
+        self.stats = {}
+        self.nodes = 0
+        self.deadline = 0.0
+
+    @staticmethod
+    def read_cells(enemy_board, player_board):
+        """从棋盘读取搜索状态"""
+        cells = []
+        for board in (enemy_board, player_board):
+            for row in range(ROWS):
+                for col in range(COLS):
+                    piece = board.grid[row][col]
+                    cells.append((piece.job, piece.attack, piece.lifepoint) if isinstance(piece, BattlePiece) else None)
+        return tuple(cells)
+
+    @staticmethod
+    def evaluate(cells, side):
+        """
+        局面评估：双方剩余棋子的攻击力与生命值之和的差（行动方视角）
+        """
+        score = 0
+        for cell in range(CELLS):
+            piece = cells[cell]
+            if piece is not None:
+                score += piece[1] + piece[2]
+            piece = cells[cell + CELLS]
+            if piece is not None:
+                score -= piece[1] + piece[2]
+        return score if side == ENEMY else -score
+
+    def apply_swap(self, cells, key, first, second):
+        """交换两个格子，返回 (新状态, 新哈希)"""
+        a, b = cells[first], cells[second]
+        key ^= self.hasher.key(first, a) ^ self.hasher.key(second, b) \
+            ^ self.hasher.key(first, b) ^ self.hasher.key(second, a)
+        cells = list(cells)
+        cells[first], cells[second] = b, a
+        return tuple(cells), key
+
+    def apply_attacks(self, cells, key, side):
+        """
+        行动方所有棋子发动攻击（目标在阶段开始时选定，每一列的攻击打向同一个目标）
+
+        返回:
+            tuple: (新状态, 新哈希)
+        """
+        attacker = CELLS * side
+        defender = CELLS * (1 - side)
+        rows = target_rows(side == PLAYER)
+        hasher = self.hasher
+        result = None
+        for col in range(COLS):
+            damage = 0
+            for row in range(ROWS):
+                piece = cells[attacker + row * COLS + col]
+                if piece is not None:
+                    damage += piece[1]
+            if damage == 0:
+                continue
+            for row in rows:
+                cell = defender + row * COLS + col
+                target = cells[cell]
+                if target is not None:
+                    if result is None:
+                        result = list(cells)
+                    hp = target[2] - damage
+                    damaged = (target[0], target[1], hp) if hp > 0 else None
+                    result[cell] = damaged
+                    key ^= hasher.key(cell, target) ^ hasher.key(cell, damaged)
+                    break
+        if result is None:
+            return cells, key
+        return tuple(result), key
+
+    def generate_moves(self, cells, side):
+        """
+        行动方的所有换位：None表示不换位，否则为 (格子1, 格子2)，两个格子中至少有一个棋子且内容不同
+        """
+        offset = CELLS * side
+        moves = [None]
+        for first in range(offset, offset + CELLS):
+            for second in range(first + 1, offset + CELLS):
+                if cells[first] != cells[second]:
+                    moves.append((first, second))
+        return moves
+
+    def play(self, cells, key, side, move):
+        """执行一步棋（换位后攻击），返回 (新状态, 新哈希)"""
+        if move is not None:
+            cells, key = self.apply_swap(cells, key, move[0], move[1])
+        return self.apply_attacks(cells, key, side)
+
+    def search(self, cells, key, side, depth, alpha, beta, ply):
+        """
+        负极大值alpha-beta搜索
+
+        返回:
+            tuple: (分数（行动方视角）, 最佳着法)
+        """
+        self.nodes += 1
+        if self.nodes & 127 == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        own = CELLS * side
+        other = CELLS * (1 - side)
+        own_alive = any(piece is not None for piece in cells[own:own + CELLS])
+        other_alive = any(piece is not None for piece in cells[other:other + CELLS])
+        if not own_alive or not other_alive:
+            if own_alive:
+                return WIN_SCORE - ply, None
+            if other_alive:
+                return -WIN_SCORE + ply, None
+            return 0, None
+        if depth == 0:
+            return self.evaluate(cells, side), None
+
+        table = self.table
+        full_key = key ^ self.hasher.side_key if side == PLAYER else key
+        best_move = None
+        slot = table.probe(full_key)
+        if slot is not None:
+            best_move = table.moves[slot]
+            if table.depths[slot] >= depth:
+                value = table.values[slot]
+                # 胜负分数按当前步数还原
+                if value > MATE_THRESHOLD:
+                    value -= ply
+                elif value < -MATE_THRESHOLD:
+                    value += ply
+                flag = table.flags[slot]
+                if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                    return value, best_move
+
+        moves = self.generate_moves(cells, side)
+        if best_move in moves:
+            # 置换表中的最佳着法先搜索
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+
+        original_alpha = alpha
+        best_value = -WIN_SCORE - 1
+        best_move = None
+        for move in moves:
+            child, child_key = self.play(cells, key, side, move)
+            value = -self.search(child, child_key, 1 - side, depth - 1, -beta, -alpha, ply + 1)[0]
+            if value > best_value:
+                best_value, best_move = value, move
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        stored = best_value
+        if stored > MATE_THRESHOLD:
+            stored += ply
+        elif stored < -MATE_THRESHOLD:
+            stored -= ply
+        table.store(full_key, depth, stored, flag, best_move)
+        return best_value, best_move
+
+    def choose_turn(self, enemy_board, player_board):
+        """
+        为敌方选择本回合的换位和攻击顺序（迭代加深，受时间预算限制）
+
+        参数:
+            enemy_board: 敌方棋盘（BattleBoard或Chessboard）
+            player_board: 玩家棋盘
+
+        返回:
+            TurnPlan: 本回合的行动
+        """
+        start = time.perf_counter()
+        self.deadline = start + self.time_budget_ms / 1000.0
+        self.nodes = 0
+        probes, hits = self.table.probes, self.table.hits
+        self.table.new_search()
+
+        cells = self.read_cells(enemy_board, player_board)
+        key = self.hasher.hash_cells(cells)
+        best_move, best_score, completed_depth = None, self.evaluate(cells, ENEMY), 0
+        timed_out = False
+        for depth in range(1, self.max_depth + 1):
+            try:
+                best_score, best_move = self.search(cells, key, ENEMY, depth, -WIN_SCORE - 1, WIN_SCORE + 1, 0)
+            except SearchTimeout:
+                timed_out = True
+                break
+            completed_depth = depth
+            if abs(best_score) > MATE_THRESHOLD:
+                # 已经找到必胜或必败的着法，更深的搜索不会改变结果
+                break
+
+        elapsed = time.perf_counter() - start
+        probes, hits = self.table.probes - probes, self.table.hits - hits
+        self.stats = {
+            'nodes': self.nodes,
+            'elapsed_ms': elapsed * 1000.0,
+            'nodes_per_second': self.nodes / elapsed if elapsed > 0 else 0.0,
+            'depth': completed_depth,
+            'timed_out': timed_out,
+            'score': best_score,
+            'tt_probes': probes,
+            'tt_hits': hits,
+            'tt_hit_rate': hits / probes if probes else 0.0,
+            'tt_used': len(self.table),
+            'tt_size': self.table.mask + 1
+        }
+        return self._make_plan(cells, best_move, best_score, completed_depth)
+
+    def _make_plan(self, cells, move, score, depth):
+        """
+        把着法转换为棋盘坐标，并确定攻击顺序
+
+        同一阶段的目标在开始时就已选定，攻击顺序不影响结果；这里让攻击力高的棋子先攻击，
+        使击杀尽量由前几次攻击完成，后面多余的攻击落在已被击败的目标上。
+        """
+        swap = None
+        if move is not None:
+            swap = (divmod(move[0], COLS), divmod(move[1], COLS))
+            cells = self.apply_swap(cells, 0, move[0], move[1])[0]
+        attackers = [cell for cell in range(CELLS) if cells[cell] is not None]
+        attackers.sort(key=lambda cell: (-cells[cell][1], cell))
+        return TurnPlan(swap, [divmod(cell, COLS) for cell in attackers], score, depth)
+
+    def get_stats(self):
+        """
+        获取上一次决策的搜索统计（节点数、每秒节点数、完成深度、置换表命中率等）
+        """
+        return dict(self.stats)
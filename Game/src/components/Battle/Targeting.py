@@ -0,0 +1,86 @@
+"""
+预先计算的目标表
+
+棋盘用一个9位的占用掩码记录哪些格子上有棋子（第 row*3+col 位），放置和移除棋子时更新。
+目标表为每个攻击方向、每种占用掩码（512种）和每个攻击列预先算好目标格子，攻击时只需一次查表。
+
+新的目标规则（整行、对角线、溅射等）只需要提供一个函数 pattern(占用掩码, 攻击列, 是否玩家攻击)，
+返回目标格子 ((行, 列), ...)，再用register_pattern注册即可，棋盘不需要修改。
+"""
+
+# 棋盘大小
+ROWS = 3
+COLS = 3
+
+def target_rows(is_player):
+    """
+    获取攻击时查找目标的行顺序
+
+    参数:
+        is_player (bool): 是否为玩家攻击
+
+    返回:
+        tuple: 行索引顺序
+    """
+    return (2, 1, 0) if is_player else (0, 1, 2)
+
+def cell_bit(row, col):
+    """格子在占用掩码中对应的位"""
+    return 1 << (row * COLS + col)
+
+def frontline(occupancy, col, is_player):
+    """
+    默认规则：攻击同一列中最靠前的棋子（玩家从第2行往第0行找，敌方从第0行往第2行找）
+
+    返回:
+        tuple: ((行, 列),)，该列没有棋子时为空元组
+    """
+    for row in target_rows(is_player):
+        if occupancy & cell_bit(row, col):
+            return ((row, col),)
+    return ()
+
+class TargetTable:
+    """
+    一种目标规则的查找表：table[是否玩家攻击][占用掩码][攻击列] -> 目标格子元组
+    """
+    __slots__ = ("name", "table")
+
+    def __init__(self, name, pattern):
+        """
+        预先计算目标表
+
+        参数:
+            name (str): 规则名称
+            pattern (callable): pattern(占用掩码, 攻击列, 是否玩家攻击) -> 目标格子元组
+        """
+        self.name = name
+        self.table = tuple(
+            tuple(tuple(pattern(occupancy, col, is_player) for col in range(COLS))
+                  for occupancy in range(1 << (ROWS * COLS)))
+            for is_player in (False, True)
+        )
+
+    def lookup(self, occupancy, col, is_player):
+        """查找目标格子"""
+        return self.table[is_player][occupancy][col]
+
+FRONTLINE = TargetTable("frontline", frontline)
+
+# 已注册的目标规则
+target_tables = {FRONTLINE.name: FRONTLINE}
+
+def register_pattern(name, pattern):
+    """
+    注册新的目标规则
+
+    返回:
+        TargetTable: 预先计算好的目标表
+    """
+    table = TargetTable(name, pattern)
+    target_tables[name] = table
+    return table
+
+def get_table(name):
+    """按名称获取目标表"""
+    return target_tables[name]
@@ -0,0 +1,144 @@
+"""
+回合结算队列
+
+界面中每次攻击都会先发射子弹，子弹到达后才结算伤害。队列把攻击按阶段（一方的一批攻击）记录下来，
+每个攻击有一个全局递增的序号；一个阶段关闭并且所有攻击都已到达后，才按BattleEngine的规则
+（apply_damage：同一目标的伤害先累加，每个目标只结算一次）统一结算，然后按顺序报告被击败的棋子。
+界面中的棋子保存在实体存储中，由CombatSystem.apply_board_damage按同样的规则批量结算。
+
+阶段按创建顺序先进先出地结算，后面的阶段即使子弹先到达，也要等前面的阶段结算完成，
+所以结算结果只取决于攻击的记录顺序，与子弹的飞行时间无关。不播放动画时关闭阶段即立即结算，
+与动画模式使用完全相同的规则。
+"""
+from collections import deque
+from src.components.Entity.CombatSystem import combat_system
+
+class QueuedAttack:
+    """
+    队列中的一次攻击
+    """
+    __slots__ = ("sequence", "phase", "board", "row", "col", "damage", "landed")
+
+    def __init__(self, sequence, phase, board, row, col, damage):
+        """
+        参数:
+            sequence (int): 全局序号
+            phase (TurnPhase): 所属阶段
+            board: 目标棋盘
+            row (int): 目标行
+            col (int): 目标列
+            damage (int): 伤害值
+        """
+        self.sequence = sequence
+        self.phase = phase
+        self.board = board
+        self.row = row
+        self.col = col
+        self.damage = damage
+        self.landed = False
+
+class TurnPhase:
+    """
+    一方的一批攻击
+    """
+    __slots__ = ("is_player", "attacks", "pending", "closed")
+
+    def __init__(self, is_player):
+        """
+        参数:
+            is_player (bool): 攻击方是否为玩家
+        """
+        self.is_player = is_player
+        self.attacks = []
+        self.pending = 0  # 还没有到达的攻击数
+        self.closed = False
+
+class TurnQueue:
+    """
+    回合结算队列，按阶段先进先出地结算攻击
+    """
+
+    def __init__(self, on_defeat=None):
+        """
+        初始化队列
+
+        参数:
+            on_defeat (callable): 棋子被击败时调用 on_defeat(棋子, 攻击方是否为玩家)，
+                                  在阶段结算完成后按顺序调用
+        """
+        self.phases = deque()
+        self.sequence = 0
+        self.on_defeat = on_defeat
+
+    def begin_phase(self, is_player):
+        """
+        开始新的阶段
+
+        参数:
+            is_player (bool): 攻击方是否为玩家
+
+        返回:
+            TurnPhase: 新的阶段，记录完攻击后需要调用close_phase
+        """
+        phase = TurnPhase(is_player)
+        self.phases.append(phase)
+        return phase
+
+    def add_attack(self, phase, board, row, col, damage):
+        """
+        在阶段中记录一次攻击（目标在攻击发起时选定）
+
+        返回:
+            QueuedAttack: 攻击记录，动画结束时传给land
+        """
+        attack = QueuedAttack(self.sequence, phase, board, row, col, damage)
+        self.sequence += 1
+        phase.attacks.append(attack)
+        phase.pending += 1
+        return attack
+
+    def land(self, attack):
+        """攻击到达目标（子弹动画完成），可能触发阶段结算"""
+        if attack.landed:
+            return
+        attack.landed = True
+        attack.phase.pending -= 1
+        self._drain()
+
+    def close_phase(self, phase):
+        """阶段的攻击已全部记录，所有攻击到达后结算"""
+        phase.closed = True
+        self._drain()
+
+    def _drain(self):
+        """按顺序结算队首所有已经可以结算的阶段"""
+        phases = self.phases
+        while phases and phases[0].closed and phases[0].pending == 0:
+            self._resolve(phases.popleft())
+
+    def _resolve(self, phase):
+        """
+        结算一个阶段：按棋盘分组，每个棋盘上按目标累加伤害后一次结算，最后统一报告被击败的棋子
+
+        返回:
+            list: 被击败的棋子
+        """
+        hits_by_board = {}
+        for attack in phase.attacks:
+            hits_by_board.setdefault(attack.board, []).append((attack.row, attack.col, attack.damage))
+        defeated = []
+        for board, hits in hits_by_board.items():
+            defeated.extend(piece for row, col, piece in combat_system.apply_board_damage(board, hits))
+        if self.on_defeat is not None:
+            for piece in defeated:
+                self.on_defeat(piece, phase.is_player)
+        return defeated
+
+    def flush(self):
+        """不等待动画，立即按顺序结算所有阶段（包括还没关闭的阶段）"""
+        while self.phases:
+            self._resolve(self.phases.popleft())
+
+    def __len__(self):
+        """还没有结算的阶段数"""
+        return len(self.phases)
@@ -7,10 +7,23 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-class Chess:
+from src.components.Asset.AssetManager import asset_manager
+from src.components.Battle.BattleEngine import BattlePiece
+from src.components.Replay.Replay import replay_recorder, KIND_PIECE
+from src.components.Entity.EntityWorld import entity_world, FLAG_FUSION, FLAG_ATTACKED
+
+class Chess(BattlePiece):
     """
-    棋子基类，提供基本属性和方法
+    棋子基类，在战斗属性（BattlePiece）的基础上添加图片和重绘通知
+    
+    攻击力、生命值、融合和攻击状态、版本号和图片都保存在实体存储（entity_world）的组件数组中，
+    对象本身只保存实体编号、所在的容器和图片路径，下面的属性直接读写数组。
     """
+    __slots__ = ("entity", "container", "image_path")
+    
+    # 默认图片
+    default_image_path = os.path.join(project_root, "assets", "images", "MainChar.jpg")
+    
     def __init__(self, attack=0, lifepoint=0, job="", is_fusion=False, image_path=None):
         """
         初始化棋子
@@ -22,18 +35,70 @@ class Chess:
             is_fusion (bool): 是否为融合棋子
             image_path (str): 棋子图片路径，如果为None则使用默认图片
         """
-        self.attack = attack
-        self.lifepoint = lifepoint
-        self.job = job
-        self.isFusion = is_fusion
-        self.isAttack = 0  # 新增属性，标记棋子是否已经攻击过
-        
-        # 图片相关属性
-        self.image = None
-        self.default_image_path = os.path.join(project_root, "assets", "images", "MainChar.jpg")
+        # 先创建实体，BattlePiece的初始化会通过下面的属性写入数组
+        self.entity = entity_world.create(KIND_PIECE)
+        # 所在的容器，属性改变时通知容器重绘
+        self.container = None
+        self.image_path = None  # 当前图片路径，用于向资源管理器释放引用
+        super().__init__(attack, lifepoint, job, is_fusion)
         
         # 加载图片
         self.load_image(image_path)
+    
+    def __del__(self):
+        """对象被回收时释放图片引用并回收实体"""
+        image_path = getattr(self, "image_path", None)
+        if image_path:
+            asset_manager.release_image(image_path, (80, 80))
+        entity = getattr(self, "entity", None)
+        if entity is not None:
+            entity_world.destroy(entity)
+    
+    @property
+    def attack(self):
+        """攻击力"""
+        return int(entity_world.attack[self.entity])
+    
+    @attack.setter
+    def attack(self, value):
+        entity_world.attack[self.entity] = value
+    
+    @property
+    def lifepoint(self):
+        """生命值"""
+        return int(entity_world.lifepoint[self.entity])
+    
+    @lifepoint.setter
+    def lifepoint(self, value):
+        entity_world.lifepoint[self.entity] = value
+    
+    @property
+    def isFusion(self):
+        """是否为融合棋子"""
+        return bool(entity_world.flags[self.entity] & FLAG_FUSION)
+    
+    @isFusion.setter
+    def isFusion(self, value):
+        entity_world.set_flag(self.entity, FLAG_FUSION, value)
+    
+    @property
+    def isAttack(self):
+        """本回合是否已经攻击过（0或1）"""
+        return 1 if entity_world.flags[self.entity] & FLAG_ATTACKED else 0
+    
+    @isAttack.setter
+    def isAttack(self, value):
+        entity_world.set_flag(self.entity, FLAG_ATTACKED, value)
+    
+    @property
+    def version(self):
+        """属性版本号，属性改变时增加"""
+        return int(entity_world.version[self.entity])
+    
+    @property
+    def image(self):
+        """棋子图片（共享，不应直接修改），没有图片时为None"""
+        return entity_world.get_sprite(self.entity)
         
     def load_image(self, custom_path=None):
         """
@@ -44,18 +109,29 @@ class Chess:
         """
         path = custom_path if custom_path else self.default_image_path
         
+        # 释放之前图片的引用
+        if self.image_path:
+            asset_manager.release_image(self.image_path, (80, 80))
+            self.image_path = None
+        
         try:
-            # 加载图片
-            self.image = pygame.image.load(path)
-            
-            # 将图片缩放为适合棋盘格子的大小 (80x80像素)
-            self.image = pygame.transform.scale(self.image, (80, 80))
+            # 通过资源管理器获取缩放为格子大小 (80x80像素) 的共享图片
+            entity_world.set_sprite(self.entity, asset_manager.load_image(path, (80, 80)))
+            self.image_path = path
+            self.mark_changed()
             return True
         except (pygame.error, FileNotFoundError) as e:
             print(f"无法加载棋子图片 {path}: {e}")
-            self.image = None
+            entity_world.set_sprite(self.entity, None)
             return False
     
+    def mark_changed(self):
+        """属性改变后调用，增加版本号、通知所在的容器重绘并记录到录像"""
+        entity_world.version[self.entity] += 1
+        if self.container is not None:
+            self.container.invalidate()
+        replay_recorder.record_stats(self)
+    
     def set_image(self, image_path):
         """设置新的棋子图片"""
         return self.load_image(image_path)
@@ -63,65 +139,3 @@ class Chess:
     def get_image(self):
         """获取棋子图片"""
         return self.image
-    
-    def get_attack(self):
-        """获取攻击力"""
-        return self.attack
-        
-    def get_lifepoint(self):
-        """获取生命值"""
-        return self.lifepoint
-        
-    def get_job(self):
-        """获取职业"""
-        return self.job
-        
-    def is_fusion(self):
-        """检查是否为融合棋子"""
-        return self.isFusion
-        
-    def set_attack(self, attack):
-        """设置攻击力"""
-        self.attack = attack
-        
-    def set_lifepoint(self, lifepoint):
-        """设置生命值"""
-        self.lifepoint = lifepoint
-        
-    def set_job(self, job):
-        """设置职业"""
-        self.job = job
-        
-    def set_fusion(self, is_fusion):
-        """设置是否为融合棋子"""
-        self.isFusion = is_fusion
-        
-    def take_damage(self, damage):
-        """
-        受到伤害
-        
-        参数:
-            damage (int): 伤害值
-            
-        返回:
-            bool: 如果棋子死亡返回True，否则返回False
-        """
-        self.lifepoint -= damage
-        return self.lifepoint <= 0
-        
-    def __str__(self):
-        """返回棋子的字符串表示"""
-        fusion_status = "融合棋子" if self.isFusion else "普通棋子"
-        return f"{self.job} - 攻击力:{self.attack} 生命值:{self.lifepoint} ({fusion_status})"
-
-    def reset_attack_status(self):
-        """重置攻击状态"""
-        self.isAttack = 0
-
-    def mark_as_attacked(self):
-        """标记为已攻击"""
-        self.isAttack = 1
-
-    def can_attack(self):
-        """检查是否可以攻击"""
-        return self.isAttack == 0 
\ No newline at end of file
@@ -1,4 +1,3 @@
-import pygame
 import os
 import sys
 
@@ -8,11 +7,19 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from src.components.Chess.Chess import Chess
+from src.components.Entity.EntityWorld import entity_world
+from src.components.Entity.RenderSystem import render_system, piece_sprite
 
 class ChessPiece(Chess):
     """
     具体的棋子类，继承自Chess基类，添加了绘制和位置功能
+    
+    棋盘上的位置也保存在实体存储的组件数组中，绘制由渲染系统（RenderSystem）完成。
     """
+    __slots__ = ("color", "ability")
+    
+    base_radius = 40  # 基础棋子绘制半径，仅在图片无法加载时使用
+    
     def __init__(self, attack=0, lifepoint=0, job="", is_fusion=False, position=None, color=(255, 0, 0), image_path=None, ability=""):
         """
         初始化棋子
@@ -30,82 +37,51 @@ class ChessPiece(Chess):
         super().__init__(attack, lifepoint, job, is_fusion, image_path)
         self.position = position  # (row, col)
         self.color = color
-        self.base_radius = 40  # 基础棋子绘制半径，仅在图片无法加载时使用
         self.ability = ability  # 新增ability属性
-        self.attacked = False  # 是否已经攻击过
+    
+    @property
+    def position(self):
+        """棋子在棋盘上的位置 (row, col)，不在棋盘上时为None"""
+        row = int(entity_world.row[self.entity])
+        if row < 0:
+            return None
+        return row, int(entity_world.col[self.entity])
+    
+    @position.setter
+    def position(self, position):
+        entity_world.row[self.entity], entity_world.col[self.entity] = position if position is not None else (-1, -1)
         
-    def draw(self, screen, board_position, grid_size):
+    def prepare_sprite(self, scale_factor):
         """
-        在屏幕上绘制棋子
+        预先生成当前缩放比例下的棋子图片，在放置棋子或布局改变时调用
         
         参数:
-            screen: pygame屏幕对象
-            board_position: 棋盘左上角位置
-            grid_size: 格子大小
-        """
-        if self.position is None:
-            return
-        
-        # 计算屏幕大小
-        screen_width, screen_height = screen.get_size()
-        # 计算缩放比例（基于参考分辨率1920*1200）
-        scale_factor = min(screen_width / 1920, screen_height / 1200)
-        # 计算缩放后的棋子半径
-        radius = int(self.base_radius * scale_factor)
-            
-        row, col = self.position
-        board_x, board_y = board_position
-        
-        # 计算棋子中心位置
-        center_x = board_x + col * grid_size + grid_size // 2
-        center_y = board_y + row * grid_size + grid_size // 2
-        
-        # 绘制棋子
-        if self.image:
-            # 调整图片大小以适应缩放
-            scaled_size = int(80 * scale_factor)
-            
-            # 保持宽高比例缩放
-            original_width, original_height = self.image.get_size()
-            scaled_height = int(original_height * scaled_size / original_width)
-            scaled_image = pygame.transform.scale(self.image, (scaled_size, scaled_height))
-            
-            # 计算图片左上角位置（使图片居中）
-            img_x = center_x - scaled_image.get_width() // 2
-            img_y = center_y - scaled_image.get_height() // 2
-            
-            # 绘制棋子图片
-            screen.blit(scaled_image, (img_x, img_y))
-        else:
-            # 如果图片加载失败，使用圆形代替
-            pygame.draw.circle(screen, self.color, (center_x, center_y), radius)
+            scale_factor (float): 缩放比例
             
-        # 如果是融合棋子，添加特殊标记
-        if self.isFusion:
-            pygame.draw.circle(screen, (255, 255, 0), (center_x, center_y - int(25 * scale_factor)), int(5 * scale_factor))
-        
-        # 创建半透明黑色背景使属性文字更清晰
-        text_bg_width = int(60 * scale_factor)
-        text_bg_height = int(24 * scale_factor)
-        text_bg = pygame.Surface((text_bg_width, text_bg_height))
-        text_bg.set_alpha(150)  # 半透明
-        text_bg.fill((0, 0, 0))
-        
-        # 计算背景位置（棋子底部）
-        bg_x = center_x - text_bg_width // 2
-        bg_y = center_y + (grid_size // 2) - text_bg_height - int(10 * scale_factor)
-        
-        # 绘制背景
-        screen.blit(text_bg, (bg_x, bg_y))
+        返回:
+            Surface: 缩放后的图片，没有图片时返回None
+        """
+        image = self.image
+        if image is None:
+            return None
+        return piece_sprite(image, scale_factor)
         
-        # 绘制棋子属性（攻击力和生命值）
-        font = pygame.font.Font(None, int(24 * scale_factor))
-        attack_text = font.render(str(self.attack), True, (255, 0, 0))  # 攻击力红色
-        lifepoint_text = font.render(str(self.lifepoint), True, (0, 255, 0))  # 生命值绿色
+    def draw(self, screen, board_position, grid_size, scale_factor=None):
+        """
+        在屏幕上绘制棋子（容器绘制多个棋子时直接把它们一起交给渲染系统）
         
-        # 在背景上显示攻击力和生命值
-        screen.blit(attack_text, (bg_x + int(10 * scale_factor), bg_y + int(4 * scale_factor)))
-        screen.blit(lifepoint_text, (bg_x + int(35 * scale_factor), bg_y + int(4 * scale_factor)))
+        参数:
+            screen: pygame屏幕对象或面板Surface
+            board_position: 棋盘左上角位置
+            grid_size: 格子大小
+            scale_factor: 缩放比例，为None时根据screen大小计算
+        """
+        if scale_factor is None:
+            # 计算屏幕大小
+            screen_width, screen_height = screen.get_size()
+            # 计算缩放比例（基于参考分辨率1920*1200）
+            scale_factor = min(screen_width / 1920, screen_height / 1200)
+        render_system.draw(screen, [self], board_position, grid_size, scale_factor)
         
     def set_position(self, row, col):
         """设置棋子在棋盘上的位置"""
@@ -1,8 +1,14 @@
 import pygame
 from src.components.Chess.ChessPiece import ChessPiece
+from src.components.Font.FontRegistry import font_registry
+from src.components.Battle.BattleEngine import BattleBoard
+from src.components.Replay.Replay import replay_recorder
+from src.components.Entity.RenderSystem import render_system
 
-class Chessboard:
+class Chessboard(BattleBoard):
+    """棋盘类，在战斗棋盘（BattleBoard）的基础上添加绘制、拖动和右键菜单"""
     def __init__(self, screen):
+        super().__init__()
         self.screen = screen
         # 获取屏幕尺寸
         self.screen_width, self.screen_height = screen.get_size()
@@ -25,9 +31,6 @@ class Chessboard:
         self.GRAY = (169, 169, 169)  # 棋盘背景色
         self.BLACK = (0, 0, 0)  # 网格线颜色
         
-        # 初始化棋盘状态 (3x3网格，初始为空)
-        self.grid = [[None for _ in range(3)] for _ in range(3)]
-        
         # 新增属性用于拖动功能
         self.dragging = False
         self.dragged_piece = None
@@ -39,38 +42,63 @@ class Chessboard:
         self.menu_options = ["Attck", "Cancel"]
         self.menu_selected = None
         self.menu_target = None
-        self.menu_font = pygame.font.Font(None, int(24 * self.scale_factor))  # 菜单字体也缩放
+        self.menu_font = font_registry.get_font(None, int(24 * self.scale_factor))  # 菜单字体也缩放
+        
+        # 版本号，棋盘内容（棋子放置、移除、拖动、属性变化）改变时增加
+        self.version = 0
+        # 缓存的棋盘面板及其对应的 (版本号, 格子大小, 缩放比例)
+        self.panel = None
+        self.panel_key = None
+        
+        # 脏矩形渲染相关：上一次报告时的状态和跟随鼠标的区域
+        self.last_dirty_state = None
+        self.last_overlay_rects = []
 
-    def draw(self):
+    def invalidate(self):
+        """棋盘内容改变时调用，增加版本号使缓存的面板在下次绘制时重建"""
+        self.version += 1
+
+    def render_panel(self):
+        """将棋盘背景、网格线和棋子绘制到离屏面板上，面板区域与get_rect一致"""
+        panel = pygame.Surface(self.get_rect().size, pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            panel = panel.convert_alpha()
+        
         # 绘制棋盘背景
-        x, y = self.position
-        pygame.draw.rect(self.screen, self.GRAY, pygame.Rect(x, y, self.size, self.size))
+        panel.fill(self.GRAY, pygame.Rect(0, 0, self.size, self.size))
         
         # 绘制3x3网格线
         for i in range(1, 3):
             # 垂直线
             pygame.draw.line(
-                self.screen, 
+                panel, 
                 self.BLACK, 
-                (x + i * self.grid_size, y), 
-                (x + i * self.grid_size, y + self.size), 
+                (i * self.grid_size, 0), 
+                (i * self.grid_size, self.size), 
                 max(1, int(2 * self.scale_factor))  # 线宽也缩放，但最小为1
             )
             # 水平线
             pygame.draw.line(
-                self.screen, 
+                panel, 
                 self.BLACK, 
-                (x, y + i * self.grid_size), 
-                (x + self.size, y + i * self.grid_size), 
+                (0, i * self.grid_size), 
+                (self.size, i * self.grid_size), 
                 max(1, int(2 * self.scale_factor))  # 线宽也缩放，但最小为1
             )
             
-        # 绘制棋子
-        for row in range(3):
-            for col in range(3):
-                piece = self.grid[row][col]
-                if piece and isinstance(piece, ChessPiece):
-                    piece.draw(self.screen, self.position, self.grid_size)
+        # 绘制棋子：按行优先顺序一次交给渲染系统
+        pieces = [piece for line in self.grid for piece in line if isinstance(piece, ChessPiece)]
+        render_system.draw(panel, pieces, (0, 0), self.grid_size, self.scale_factor)
+        
+        return panel
+
+    def draw(self):
+        # 版本号或布局改变时重建面板，否则直接使用缓存的面板
+        panel_key = (self.version, self.grid_size, self.scale_factor)
+        if self.panel is None or self.panel_key != panel_key:
+            self.panel = self.render_panel()
+            self.panel_key = panel_key
+        self.screen.blit(self.panel, self.position)
         
         # 绘制拖动中的棋子
         if self.dragging and self.dragged_piece:
@@ -83,6 +111,54 @@ class Chessboard:
         if self.show_menu:
             self.draw_menu()
 
+    def get_rect(self):
+        """获取棋盘在屏幕上占据的区域（包括网格线末端超出棋盘的1像素）"""
+        x, y = self.position
+        return pygame.Rect(x, y, self.size + 1, self.size + 1)
+    
+    def get_hit_rect(self):
+        """获取格子所在的点击区域（与绘制区域相同，与get_grid_position一致，包括右边和下边的边界）"""
+        return self.get_rect()
+    
+    def get_menu_rect(self):
+        """获取右键菜单在屏幕上占据的区域"""
+        menu_x, menu_y = self.menu_position
+        menu_width = int(100 * self.scale_factor)
+        menu_height = int(len(self.menu_options) * 30 * self.scale_factor)
+        return pygame.Rect(menu_x, menu_y, menu_width, menu_height)
+    
+    def get_dirty_rects(self):
+        """
+        返回自上次调用以来发生变化的屏幕区域
+        
+        返回:
+            list: 需要重绘的pygame.Rect列表
+        """
+        rects = []
+        
+        # 棋盘位置或版本号发生变化时，整个棋盘需要重绘
+        state = (self.position, self.version)
+        if state != self.last_dirty_state:
+            rects.append(self.get_rect())
+            # 位置改变时，旧位置也需要重绘
+            if self.last_dirty_state and self.last_dirty_state[0] != self.position:
+                old_x, old_y = self.last_dirty_state[0]
+                rects.append(pygame.Rect(old_x, old_y, self.size, self.size))
+            self.last_dirty_state = state
+        
+        # 拖动中的棋子和右键菜单每帧都可能变化，需要同时刷新上一帧和当前帧的位置
+        overlay_rects = []
+        if self.dragging and self.dragged_piece and self.dragged_piece.image:
+            image_rect = self.dragged_piece.image.get_rect(center=pygame.mouse.get_pos()).inflate(2, 2)
+            overlay_rects.append(image_rect)
+        if self.show_menu:
+            overlay_rects.append(self.get_menu_rect())
+        rects.extend(self.last_overlay_rects)
+        rects.extend(overlay_rects)
+        self.last_overlay_rects = overlay_rects
+        
+        return rects
+    
     def draw_menu(self):
         """绘制右键菜单"""
         menu_width = int(100 * self.scale_factor)
@@ -106,7 +182,7 @@ class Chessboard:
                 self.menu_selected = i
             
             # 绘制选项文本
-            text = self.menu_font.render(option, True, (0, 0, 0))
+            text = font_registry.render(self.menu_font, option, (0, 0, 0), True)
             text_rect = text.get_rect(center=(menu_x + menu_width // 2, option_y + int(15 * self.scale_factor)))
             self.screen.blit(text, text_rect)
 
@@ -144,25 +220,28 @@ class Chessboard:
                 
         return False
     
-    def place_piece(self, piece, row, col):
-        """在指定位置放置棋子"""
-        if 0 <= row < 3 and 0 <= col < 3 and self.grid[row][col] is None:
-            self.grid[row][col] = piece
-            
-            # 更新棋子的位置
-            if isinstance(piece, ChessPiece):
-                piece.set_position(row, col)
-                
-            return True
-        return False
-    
     def remove_piece(self, row, col):
         """移除指定位置的棋子"""
-        if 0 <= row < 3 and 0 <= col < 3:
-            piece = self.grid[row][col]
-            self.grid[row][col] = None
-            return piece
-        return None
+        piece = super().remove_piece(row, col)
+        if piece is not None and piece.container is self:
+            piece.container = None
+        return piece
+    
+    def set_cell(self, row, col, piece):
+        """
+        直接设置指定格子的内容（可以为None），并使棋盘面板失效
+        
+        所有对grid的修改都应通过此方法，包括跨容器的拖放
+        """
+        super().set_cell(row, col, piece)
+        if piece is not None:
+            piece.container = self
+            # 更新位置（物品也可能从背包换到棋盘上），棋子预先生成缩放后的图片
+            piece.set_position(row, col)
+            if isinstance(piece, ChessPiece):
+                piece.prepare_sprite(self.scale_factor)
+        self.invalidate()
+        replay_recorder.record_cell(self, row, col, piece)
     
     def get_grid_position(self, mouse_pos):
         """根据鼠标位置返回对应的网格坐标"""
@@ -217,7 +296,7 @@ class Chessboard:
                 self.dragging = True
                 self.dragged_piece = piece
                 self.original_position = (row, col)
-                self.grid[row][col] = None
+                self.set_cell(row, col, None)
 
     def end_drag(self, mouse_pos):
         """结束拖动棋子"""
@@ -228,62 +307,46 @@ class Chessboard:
                 if self.grid[new_row][new_col]:
                     # 如果目标位置有棋子，交换位置
                     old_piece = self.grid[new_row][new_col]
-                    old_piece.set_position(*self.original_position)
-                    self.grid[self.original_position[0]][self.original_position[1]] = old_piece
-                self.dragged_piece.set_position(new_row, new_col)
-                self.grid[new_row][new_col] = self.dragged_piece
+                    self.set_cell(self.original_position[0], self.original_position[1], old_piece)
+                self.set_cell(new_row, new_col, self.dragged_piece)
             else:
                 # 如果拖动到棋盘外，放回原位
-                self.dragged_piece.set_position(*self.original_position)
-                self.grid[self.original_position[0]][self.original_position[1]] = self.dragged_piece
+                self.set_cell(self.original_position[0], self.original_position[1], self.dragged_piece)
 
             self.dragging = False
             self.dragged_piece = None
             self.original_position = None
 
     def attack_opponent(self, opponent_board, row, col, is_player=True):
-        """攻击对手棋盘上同一列的第一个棋子，方向根据攻击方决定"""
+        """
+        攻击对手棋盘上同一列的第一个棋子，方向根据攻击方决定
+
+        返回:
+            tuple: (是否成功, 攻击消息, 攻击者中心位置, 目标中心位置, 目标所在行)
+        """
         attacker = self.grid[row][col]
         if not attacker or not isinstance(attacker, ChessPiece):
-            return False, "没有棋子可以攻击", None, None
-
-        # 根据攻击方决定检查方向
-        if is_player:
-            # 玩家棋子从下往上检查
-            target_rows = range(2, -1, -1)
-        else:
-            # 敌方棋子从上往下检查
-            target_rows = range(3)
+            return False, "没有棋子可以攻击", None, None, None
 
         # 获取攻击者在棋盘上的绝对位置（中心点）
         attacker_pos = self.get_piece_center_position(row, col)
-        target_pos = None  # 目标位置，初始为None
-        target_piece = None  # 攻击的目标，初始为None
 
-        # 在对手棋盘上寻找同一列的第一个棋子
-        for target_row in target_rows:
-            target_piece = opponent_board.grid[target_row][col]
-            if target_piece and isinstance(target_piece, ChessPiece):
-                # 找到目标，获取目标中心位置
-                target_pos = opponent_board.get_piece_center_position(target_row, col)
-                
-                # 构造攻击消息
-                attack_message = f"{attacker.get_job()} 攻击了 {target_piece.get_job()}，造成 {attacker.get_attack()} 点伤害"
-                print(attack_message)
-                
-                # 因为伤害应用延迟到动画完成后，这里不再直接扣减生命值
-                # 但保留原先的代码逻辑注释，以便理解流程
-                # target_piece.take_damage(attacker.get_attack())
-                # 检查目标棋子是否死亡
-                # if target_piece.get_lifepoint() <= 0:
-                #    opponent_board.remove_piece(target_row, col)
-                #    death_message = f"{target_piece.get_job()} 被击败"
-                #    print(death_message)
-                #    attack_message += f"，{death_message}"
-                
-                return True, attack_message, attacker_pos, target_pos
-                
-        return False, "没有找到攻击目标", None, None
+        # 在对手棋盘的目标索引中查找同一列的第一个棋子，方向由战斗规则决定（玩家从下往上，敌方从上往下）
+        target_row = opponent_board.find_target(col, is_player)
+        if target_row is None:
+            return False, "没有找到攻击目标", None, None, None
+
+        target_piece = opponent_board.grid[target_row][col]
+        replay_recorder.record_attack(self, row, col, opponent_board, target_row, col, attacker.get_attack())
+        # 获取目标中心位置
+        target_pos = opponent_board.get_piece_center_position(target_row, col)
+        
+        # 构造攻击消息
+        attack_message = f"{attacker.get_job()} 攻击了 {target_piece.get_job()}，造成 {attacker.get_attack()} 点伤害"
+        print(attack_message)
+        
+        # 伤害在子弹动画完成后才结算（子弹的on_complete调用TurnQueue.land，阶段的攻击全部到达后统一结算）
+        return True, attack_message, attacker_pos, target_pos, target_row
     
     def get_piece_center_position(self, row, col):
         """获取棋子中心点的屏幕坐标"""
@@ -0,0 +1,98 @@
+import numpy as np
+from src.components.Replay.Replay import KIND_PIECE
+from src.components.Battle.BattleEngine import BattlePiece
+from src.components.Entity.EntityWorld import entity_world, FLAG_ATTACKED
+
+class CombatSystem:
+    """
+    批量处理实体的战斗属性
+
+    回合结束时重置攻击状态、一次结算多个目标的伤害，都是对组件数组的一次向量化操作。
+    apply_damage只修改数组中的数值；apply_board_damage在此基础上对受伤的棋子调用mark_changed
+    （增加版本号、通知容器重绘、记录录像）并移除被击败的棋子，TurnQueue通过它结算界面中的攻击。
+    """
+
+    def __init__(self, world):
+        """
+        参数:
+            world (EntityWorld): 实体存储
+        """
+        self.world = world
+
+    def reset_attacks(self, entities=None):
+        """
+        重置攻击状态
+
+        参数:
+            entities (list): 棋子，为None时重置所有存活的棋子
+        """
+        world = self.world
+        ids = world.alive_ids(KIND_PIECE) if entities is None else [entity.entity for entity in entities]
+        world.flags[ids] &= ~FLAG_ATTACKED & 0xFF
+
+    def apply_damage(self, ids, damages):
+        """
+        结算伤害：同一个实体出现多次时伤害累加，每个目标的生命值只修改一次
+
+        参数:
+            ids (list): 目标实体编号
+            damages (list): 对应的伤害
+
+        返回:
+            ndarray: 生命值降到0及以下的实体编号（不重复，按编号排序）
+        """
+        world = self.world
+        targets, inverse = np.unique(np.asarray(ids, dtype=np.intp), return_inverse=True)
+        if len(targets) == 0:
+            return targets
+        totals = np.bincount(inverse, weights=damages).astype(np.int32)
+        world.lifepoint[targets] -= totals
+        return targets[world.lifepoint[targets] <= 0]
+
+    def apply_board_damage(self, board, hits):
+        """
+        结算一个阶段内对一个棋盘的所有攻击，规则和返回值与BattleEngine.apply_damage相同
+
+        实体存储中的棋子一次批量扣除生命值，再各调用一次mark_changed；
+        其他战斗棋子（例如模拟用的BattlePiece）仍然逐个调用take_damage。
+
+        参数:
+            board: 防守方棋盘（BattleBoard或Chessboard）
+            hits (list): 按攻击顺序排列的 (目标行, 目标列, 伤害)
+
+        返回:
+            list: 被击败的 (行, 列, 棋子) 列表，按每个目标第一次被攻击的顺序排列
+        """
+        totals = {}
+        for row, col, damage in hits:
+            totals[row, col] = totals.get((row, col), 0) + damage
+        targets = []
+        entity_targets = []
+        damages = []
+        defeated = set()
+        grid = board.grid
+        for (row, col), damage in totals.items():
+            target = grid[row][col]
+            if not isinstance(target, BattlePiece):
+                continue
+            targets.append((row, col, target))
+            if getattr(target, "entity", None) is not None:
+                entity_targets.append(target)
+                damages.append(damage)
+            elif target.take_damage(damage):
+                defeated.add(id(target))
+        if entity_targets:
+            defeated_ids = set(self.apply_damage([target.entity for target in entity_targets], damages).tolist())
+            for target in entity_targets:
+                target.mark_changed()
+                if target.entity in defeated_ids:
+                    defeated.add(id(target))
+        killed = []
+        for row, col, target in targets:
+            if id(target) in defeated:
+                board.remove_piece(row, col)
+                killed.append((row, col, target))
+        return killed
+
+# 全局战斗系统
+combat_system = CombatSystem(entity_world)
@@ -0,0 +1,216 @@
+"""
+棋子和物品的实体-组件存储
+
+每个棋子或物品是一个整数编号（实体），它的数据按组件保存在连续的NumPy数组中，与ProjectilePool相同，
+每个属性一个数组，编号就是数组下标:
+
+    属性        attack, lifepoint, flags（融合、本回合已攻击）
+    格子位置    row, col（不在格子上时为-1）
+    精灵        sprite（SpriteTable中的编号，没有图片时为-1）
+    版本号      version（属性改变时增加）
+
+ChessPiece和Item只保存实体编号和少量文本，读写属性都转到这些数组上；
+系统（RenderSystem、CombatSystem）一次处理一批实体编号，用数组的批量索引读取数据。
+子弹的动画状态本来就按同样的方式保存在ProjectilePool中，由AnimationManager每帧批量更新。
+
+实体被回收后编号放回空闲栈复用，容量不足时所有数组按两倍扩容。
+"""
+import numpy as np
+
+# flags中的标志位
+FLAG_FUSION = 1    # 融合棋子
+FLAG_ATTACKED = 2  # 本回合已攻击
+
+class SpriteTable:
+    """
+    精灵表：共享的原始图片 -> 编号，同一张图片只占一个编号，按引用计数回收
+    """
+
+    def __init__(self):
+        self.images = []      # 编号 -> 图片（已回收的编号为None）
+        self.refcounts = []   # 编号 -> 使用该图片的实体数量
+        self.handles = {}     # 图片 -> 编号
+        self.free_handles = []
+
+    def acquire(self, image):
+        """
+        获取图片的编号并增加引用计数
+
+        返回:
+            int: 编号，image为None时返回-1
+        """
+        if image is None:
+            return -1
+        handle = self.handles.get(image)
+        if handle is None:
+            if self.free_handles:
+                handle = self.free_handles.pop()
+                self.images[handle] = image
+                self.refcounts[handle] = 0
+            else:
+                handle = len(self.images)
+                self.images.append(image)
+                self.refcounts.append(0)
+            self.handles[image] = handle
+        self.refcounts[handle] += 1
+        return handle
+
+    def release(self, handle):
+        """减少引用计数，没有实体使用时回收编号"""
+        if handle < 0:
+            return
+        self.refcounts[handle] -= 1
+        if self.refcounts[handle] == 0:
+            del self.handles[self.images[handle]]
+            self.images[handle] = None
+            self.free_handles.append(handle)
+
+    def get(self, handle):
+        """获取编号对应的图片，编号为-1时返回None"""
+        return self.images[handle] if handle >= 0 else None
+
+    def __len__(self):
+        """正在使用的图片数量"""
+        return len(self.handles)
+
+class EntityWorld:
+    """
+    实体和组件数组
+    """
+
+    def __init__(self, capacity=64):
+        """
+        初始化存储
+
+        参数:
+            capacity (int): 初始容量，不够时自动扩容
+        """
+        self.capacity = 0
+        self.alive = np.zeros(0, dtype=bool)
+        self.kind = np.zeros(0, dtype=np.uint8)
+        self.attack = np.zeros(0, dtype=np.int32)
+        self.lifepoint = np.zeros(0, dtype=np.int32)
+        self.flags = np.zeros(0, dtype=np.uint8)
+        self.row = np.zeros(0, dtype=np.int16)
+        self.col = np.zeros(0, dtype=np.int16)
+        self.sprite = np.zeros(0, dtype=np.int32)
+        self.version = np.zeros(0, dtype=np.uint32)
+
+        self.sprites = SpriteTable()
+        # 空闲编号栈，低编号优先使用
+        self.free_ids = []
+        self._grow(capacity)
+
+        # 统计信息
+        self.created = 0
+        self.destroyed = 0
+
+    def _grow(self, new_capacity):
+        """扩容所有组件数组，新编号加入空闲栈"""
+        old_capacity = self.capacity
+        extra = new_capacity - old_capacity
+        if extra <= 0:
+            return
+
+        def extend(array):
+            return np.concatenate([array, np.zeros(extra, dtype=array.dtype)])
+
+        self.alive = extend(self.alive)
+        self.kind = extend(self.kind)
+        self.attack = extend(self.attack)
+        self.lifepoint = extend(self.lifepoint)
+        self.flags = extend(self.flags)
+        self.row = extend(self.row)
+        self.col = extend(self.col)
+        self.sprite = extend(self.sprite)
+        self.version = extend(self.version)
+
+        self.free_ids.extend(range(new_capacity - 1, old_capacity - 1, -1))
+        self.capacity = new_capacity
+
+    def create(self, kind, attack=0, lifepoint=0, flags=0):
+        """
+        创建实体
+
+        参数:
+            kind (int): 实体种类（Replay中的KIND_PIECE或KIND_ITEM）
+            attack (int): 攻击力
+            lifepoint (int): 生命值
+            flags (int): 标志位
+
+        返回:
+            int: 实体编号
+        """
+        if not self.free_ids:
+            self._grow(max(1, self.capacity * 2))
+        entity = self.free_ids.pop()
+        self.alive[entity] = True
+        self.kind[entity] = kind
+        self.attack[entity] = attack
+        self.lifepoint[entity] = lifepoint
+        self.flags[entity] = flags
+        self.row[entity] = -1
+        self.col[entity] = -1
+        self.sprite[entity] = -1
+        self.version[entity] = 0
+        self.created += 1
+        return entity
+
+    def destroy(self, entity):
+        """回收实体和它的精灵引用"""
+        if not self.alive[entity]:
+            return
+        self.sprites.release(int(self.sprite[entity]))
+        self.alive[entity] = False
+        self.free_ids.append(entity)
+        self.destroyed += 1
+
+    def set_sprite(self, entity, image):
+        """设置实体的图片（None表示没有图片）"""
+        old_handle = int(self.sprite[entity])
+        self.sprite[entity] = self.sprites.acquire(image)
+        self.sprites.release(old_handle)
+
+    def get_sprite(self, entity):
+        """获取实体的原始图片，没有图片时返回None"""
+        return self.sprites.get(int(self.sprite[entity]))
+
+    def set_flag(self, entity, flag, value):
+        """设置或清除标志位"""
+        if value:
+            self.flags[entity] |= flag
+        else:
+            self.flags[entity] &= ~flag & 0xFF
+
+    def alive_ids(self, kind=None):
+        """
+        所有存活的实体编号
+
+        参数:
+            kind (int): 只返回这一种实体，为None时返回全部
+
+        返回:
+            ndarray: 实体编号
+        """
+        mask = self.alive if kind is None else self.alive & (self.kind == kind)
+        return np.flatnonzero(mask)
+
+    def __len__(self):
+        """存活的实体数量"""
+        return int(np.count_nonzero(self.alive))
+
+    def get_stats(self):
+        """获取统计信息"""
+        return {
+            'entities': len(self),
+            'capacity': self.capacity,
+            'sprites': len(self.sprites),
+            'created': self.created,
+            'destroyed': self.destroyed,
+            'bytes_per_entity': sum(array.itemsize for array in (
+                self.alive, self.kind, self.attack, self.lifepoint, self.flags,
+                self.row, self.col, self.sprite, self.version))
+        }
+
+# 全局实体存储，所有棋子和物品共用
+entity_world = EntityWorld()
@@ -0,0 +1,158 @@
+import pygame
+from src.components.Asset.SpriteCache import sprite_cache
+from src.components.Font.FontRegistry import font_registry
+from src.components.Replay.Replay import KIND_PIECE
+from src.components.Entity.EntityWorld import entity_world, FLAG_FUSION
+
+def piece_sprite(image, scale_factor):
+    """
+    棋子图片按缩放比例保持宽高比例缩放后的精灵
+
+    返回:
+        Surface: 缩放后的图片（共享，不应直接修改）
+    """
+    scaled_size = int(80 * scale_factor)
+    original_width, original_height = image.get_size()
+    scaled_height = int(original_height * scaled_size / original_width)
+    return sprite_cache.get_scaled(image, (scaled_size, scaled_height), scale_factor)
+
+def item_sprite(image, grid_size):
+    """
+    物品图片缩放到适合格子大小的精灵
+
+    返回:
+        Surface: 缩放后的图片（共享，不应直接修改）
+    """
+    width, height = image.get_size()
+    scale = grid_size / max(width, height)
+    return sprite_cache.get_scaled(image, (int(width * scale), int(height * scale)), scale)
+
+class RenderSystem:
+    """
+    批量绘制容器中的棋子和物品
+
+    一次读取一批实体的种类、格子位置、属性和精灵编号，计算出所有图片、文字背景和文字的位置，
+    再用一次Surface.blits提交；只有没有图片的棋子和融合标记需要单独画圆，在这之前先提交已经排好的图片，
+    所以绘制顺序与逐个绘制完全相同。
+    """
+
+    def __init__(self, world):
+        """
+        参数:
+            world (EntityWorld): 实体存储
+        """
+        self.world = world
+        # 半透明的文字背景: (宽, 高) -> Surface
+        self.text_backgrounds = {}
+
+        # 统计信息
+        self.batches = 0
+        self.entities_drawn = 0
+
+    def text_background(self, width, height):
+        """获取半透明黑色的文字背景（面板上也能保留透明度）"""
+        key = (width, height)
+        background = self.text_backgrounds.get(key)
+        if background is None:
+            background = pygame.Surface(key, pygame.SRCALPHA)
+            background.fill((0, 0, 0, 150))
+            self.text_backgrounds[key] = background
+        return background
+
+    def draw(self, surface, entities, origin, grid_size, scale_factor):
+        """
+        绘制一批棋子或物品
+
+        参数:
+            surface: 绘制目标Surface
+            entities (list): 棋子或物品（按绘制顺序）
+            origin (tuple): 格子(0, 0)左上角在surface上的位置
+            grid_size (int): 格子大小
+            scale_factor (float): 缩放比例
+        """
+        if not entities:
+            return
+        world = self.world
+        ids = [entity.entity for entity in entities]
+        rows = world.row[ids].tolist()
+        cols = world.col[ids].tolist()
+        kinds = world.kind[ids].tolist()
+        attacks = world.attack[ids].tolist()
+        lifepoints = world.lifepoint[ids].tolist()
+        flags = world.flags[ids].tolist()
+        handles = world.sprite[ids].tolist()
+        images = world.sprites.images
+
+        origin_x, origin_y = origin
+        half = grid_size // 2
+        piece_font = font_registry.get_font(None, int(24 * scale_factor))
+        item_font = font_registry.get_font(None, int(20 * scale_factor))
+        piece_background = self.text_background(int(60 * scale_factor), int(24 * scale_factor))
+        item_background = self.text_background(int(50 * scale_factor), int(20 * scale_factor))
+        radius = int(40 * scale_factor)
+        marker_offset, marker_radius = int(25 * scale_factor), int(5 * scale_factor)
+        text_x1, text_x2 = int(10 * scale_factor), int(35 * scale_factor)
+        item_text_x2 = int(30 * scale_factor)
+        piece_text_y, item_text_y = int(4 * scale_factor), int(2 * scale_factor)
+        piece_bg_bottom = half - piece_background.get_height() - int(10 * scale_factor)
+
+        blits = []
+        for index, entity in enumerate(entities):
+            row, col = rows[index], cols[index]
+            if row < 0:
+                continue
+            image = images[handles[index]] if handles[index] >= 0 else None
+            attack_text = str(attacks[index])
+            lifepoint_text = str(lifepoints[index])
+            if kinds[index] == KIND_PIECE:
+                center_x = origin_x + col * grid_size + half
+                center_y = origin_y + row * grid_size + half
+                if image is not None:
+                    sprite = piece_sprite(image, scale_factor)
+                    blits.append((sprite, (center_x - sprite.get_width() // 2, center_y - sprite.get_height() // 2)))
+                else:
+                    # 图片加载失败时使用圆形代替
+                    surface.blits(blits, False)
+                    blits = []
+                    pygame.draw.circle(surface, entity.color, (center_x, center_y), radius)
+                # 融合棋子的特殊标记
+                if flags[index] & FLAG_FUSION:
+                    surface.blits(blits, False)
+                    blits = []
+                    pygame.draw.circle(surface, (255, 255, 0), (center_x, center_y - marker_offset), marker_radius)
+                # 棋子底部的攻击力（红色）和生命值（绿色）
+                bg_x = center_x - piece_background.get_width() // 2
+                bg_y = center_y + piece_bg_bottom
+                blits.append((piece_background, (bg_x, bg_y)))
+                blits.append((font_registry.render(piece_font, attack_text, (255, 0, 0), True),
+                              (bg_x + text_x1, bg_y + piece_text_y)))
+                blits.append((font_registry.render(piece_font, lifepoint_text, (0, 255, 0), True),
+                              (bg_x + text_x2, bg_y + piece_text_y)))
+            elif image is not None:
+                # 物品居中放在格子中，属性显示在图片底部
+                sprite = item_sprite(image, grid_size)
+                width, height = sprite.get_size()
+                x = origin_x + col * grid_size + (grid_size - width) // 2
+                y = origin_y + row * grid_size + (grid_size - height) // 2
+                blits.append((sprite, (x, y)))
+                bg_x = x + width // 2 - item_background.get_width() // 2
+                bg_y = y + height - item_background.get_height() // 2
+                blits.append((item_background, (bg_x, bg_y)))
+                blits.append((font_registry.render(item_font, attack_text, (255, 0, 0), True),
+                              (bg_x + text_x1, bg_y + item_text_y)))
+                blits.append((font_registry.render(item_font, lifepoint_text, (0, 255, 0), True),
+                              (bg_x + item_text_x2, bg_y + item_text_y)))
+        surface.blits(blits, False)
+
+        self.batches += 1
+        self.entities_drawn += len(entities)
+
+    def get_stats(self):
+        """获取统计信息"""
+        return {
+            'batches': self.batches,
+            'entities_drawn': self.entities_drawn
+        }
+
+# 全局渲染系统
+render_system = RenderSystem(entity_world)
@@ -0,0 +1,89 @@
+import pygame
+from collections import OrderedDict
+
+class FontRegistry:
+    """
+    字体注册表和文字渲染缓存
+
+    同一 (字体文件, 字号) 在整个进程中只创建一个Font对象；
+    渲染出的文字Surface按 (字体, 文本, 颜色, 抗锯齿) 缓存，使用LRU限制数量。
+    """
+    def __init__(self, max_text_surfaces=512):
+        """
+        初始化字体注册表
+
+        参数:
+            max_text_surfaces (int): 文字Surface缓存的最大数量
+        """
+        self.max_text_surfaces = max_text_surfaces
+        self._fonts = {}
+        self._texts = OrderedDict()
+
+        # 统计信息
+        self.font_creations = 0
+        self.text_hits = 0
+        self.text_misses = 0
+
+    def get_font(self, face=None, size=24):
+        """
+        获取字体
+
+        参数:
+            face (str): 字体文件路径，为None时使用pygame默认字体
+            size (int): 字号
+
+        返回:
+            Font: 共享的字体对象
+        """
+        key = (face, size)
+        font = self._fonts.get(key)
+        if font is None:
+            font = pygame.font.Font(face, size)
+            self._fonts[key] = font
+            self.font_creations += 1
+        return font
+
+    def render(self, font, text, color, antialias=True):
+        """
+        渲染文字，相同参数直接返回缓存的Surface
+
+        参数:
+            font (Font): 字体对象
+            text (str): 文本
+            color (tuple): 文字颜色
+            antialias (bool): 是否抗锯齿
+
+        返回:
+            Surface: 渲染好的文字（共享，不应直接修改）
+        """
+        key = (font, text, tuple(color), antialias)
+        surface = self._texts.get(key)
+        if surface is not None:
+            self.text_hits += 1
+            self._texts.move_to_end(key)
+            return surface
+
+        self.text_misses += 1
+        surface = font.render(text, antialias, color)
+        self._texts[key] = surface
+        if len(self._texts) > self.max_text_surfaces:
+            self._texts.popitem(last=False)
+        return surface
+
+    def clear(self):
+        """清空所有缓存（例如分辨率改变后）"""
+        self._fonts.clear()
+        self._texts.clear()
+
+    def get_stats(self):
+        """获取缓存统计信息"""
+        return {
+            'fonts': len(self._fonts),
+            'font_creations': self.font_creations,
+            'texts': len(self._texts),
+            'text_hits': self.text_hits,
+            'text_misses': self.text_misses
+        }
+
+# 全局共享的字体注册表实例
+font_registry = FontRegistry()
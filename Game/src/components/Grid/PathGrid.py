@@ -1,10 +1,40 @@
 import pygame
 import os
+from array import array
+from src.components.Font.FontRegistry import font_registry
+from src.components.Replay.Replay import replay_recorder
+from src.components.Grid.RoutePlanner import get_planner
+from src.components.Grid.ProceduralMap import EVENT_NONE, EVENT_FIGHT, EVENT_REWARD, EVENT_SHOP, EVENT_NAMES
+
+# 格子状态标志位
+OCCUPIED = 1   # 被玩家占用
+HIGHLIGHT = 2  # 高亮显示
 
 class PathGrid:
-    """玩家走格子的网格类，不同列有不同数量的格子"""
+    """
+    玩家走格子的网格类，不同列有不同数量的格子
+    
+    所有格子按列依次编号存放在一个bytearray中（每个格子一个字节的状态标志），
+    第col列第row行的格子编号为 col_starts[col - base_col] + row；占用格子的玩家单独保存在字典中。
+    每列格子相对于网格左上角的纵向偏移（居中和第5、7列的半格偏移）按格子大小预先计算一次，
+    坐标换算和点击检测都只需查表。
     
-    def __init__(self, screen, chessboard=None):
+    使用ProceduralMap时只保存从base_col开始的view_cols列（也就是屏幕上显示的那一段），
+    玩家前进时窗口跟着向前滚动：丢弃落在后面的列，由地图生成新进入的列。
+    保存的格子数量和每帧的绘制量都与地图的总列数无关。
+    """
+    
+    def __init__(self, screen, chessboard=None, procedural_map=None, view_cols=11, keep_behind=2):
+        """
+        初始化路径网格
+        
+        参数:
+            screen: 绘制的屏幕
+            chessboard (Chessboard): 提供时使用与棋盘相同的格子大小
+            procedural_map (ProceduralMap): 提供时使用种子生成的长地图，否则使用固定的11列地图
+            view_cols (int): 长地图同时显示（保存）的列数
+            keep_behind (int): 长地图滚动时玩家所在列之前保留的列数
+        """
         self.screen = screen
         # 获取屏幕尺寸
         self.screen_width, self.screen_height = screen.get_size()
@@ -19,13 +49,24 @@ class PathGrid:
             self.base_grid_size = 80  # 基础格子大小，会根据屏幕缩放
             self.grid_size = int(self.base_grid_size * self.scale_factor)
         
-        # 定义每列的格子数量
-        self.cols_config = [1, 2, 3, 4, 4, 4, 4, 4, 3, 2, 1]
-        self.num_cols = len(self.cols_config)
-        self.max_rows = max(self.cols_config)
+        # 地图：map为None时是固定地图，cols_config为全部列；否则cols_config只包含窗口中的列
+        self.map = procedural_map
+        self.base_col = 0  # 窗口中第一列的列号
+        self.keep_behind = keep_behind
+        if procedural_map is None:
+            # 定义每列的格子数量
+            self.cols_config = [1, 2, 3, 4, 4, 4, 4, 4, 3, 2, 1]
+            self.num_cols = len(self.cols_config)
+            self.view_cols = self.num_cols
+            self.max_rows = max(self.cols_config)
+        else:
+            self.cols_config = []
+            self.num_cols = procedural_map.length
+            self.view_cols = min(view_cols, self.num_cols)
+            self.max_rows = procedural_map.max_rows
         
-        # 计算网格总宽度和高度
-        self.width = self.num_cols * self.grid_size
+        # 计算网格总宽度和高度（长地图只显示窗口中的列）
+        self.width = self.view_cols * self.grid_size
         self.height = self.max_rows * self.grid_size
         
         # 设置网格位置（默认在屏幕中央）
@@ -38,168 +79,392 @@ class PathGrid:
         self.GRID_COLOR = (220, 220, 220)  # 网格背景色
         self.BORDER_COLOR = (100, 100, 100)  # 网格边框色
         self.HIGHLIGHT_COLOR = (200, 255, 200)  # 高亮色
+        self.EVENT_COLORS = {
+            EVENT_FIGHT: (200, 60, 60),    # 战斗
+            EVENT_REWARD: (200, 150, 0),   # 奖励
+            EVENT_SHOP: (60, 110, 200)     # 商店
+        }
+        
+        # 当前高亮的格子 {(列, 行)}
+        self.highlighted = set()
+        
+        # 格子数据：每列第一个格子的编号（最后一项为格子总数）、每个格子的状态标志、事件和占用格子的玩家
+        if procedural_map is None:
+            self.col_starts = array('I', [0])
+            for num_rows in self.cols_config:
+                self.col_starts.append(self.col_starts[-1] + num_rows)
+            self.num_cells = self.col_starts[-1]
+            self.flags = bytearray(self.num_cells)
+            self.events = bytearray(self.num_cells)
+            self.players = {}  # 格子编号 -> 玩家
+        else:
+            self.col_starts = array('I', [0])
+            self.num_cells = 0
+            self.flags = bytearray()
+            self.events = bytearray()
+            self.players = {}
+            self._load_window(0)
+        
+        # 几何表：每列格子相对于网格左上角的纵向偏移，及其对应的 (格子大小, 窗口第一列)
+        self.col_offsets = None
+        self.geometry_key = None
+        
+        # 路线规划器：固定地图每种列配置只计算一次，长地图直接由地图按列号计算
+        self.planner = get_planner(self.cols_config) if procedural_map is None else procedural_map
+        
+        # 版本号，格子状态（占用、高亮）改变时增加
+        self.version = 0
+        # 缓存的网格面板及其对应的 (版本号, 格子大小, 缩放比例)
+        self.panel = None
+        self.panel_key = None
+        
+        # 脏矩形渲染相关：上一次报告时的状态
+        self.last_dirty_state = None
+    
+    def get_rect(self):
+        """获取网格在屏幕上占据的区域（包括上方的标题和第5、7列额外的半格偏移）"""
+        x, y = self.position
+        title_height = int(50 * self.scale_factor)
+        return pygame.Rect(x, y - title_height, self.width, self.height + title_height + self.grid_size // 2)
+    
+    def get_dirty_rects(self):
+        """
+        返回自上次调用以来发生变化的屏幕区域
+        
+        返回:
+            list: 需要重绘的pygame.Rect列表
+        """
+        state = (self.position, self.version)
+        if state == self.last_dirty_state:
+            return []
         
-        # 初始化网格数据
-        self.grid = []
-        for col_idx, num_rows in enumerate(self.cols_config):
-            col_cells = []
-            for row_idx in range(self.max_rows):
-                # 只有在有效的行范围内才创建格子
-                if row_idx < num_rows:
-                    col_cells.append({
-                        'occupied': False,  # 是否被占用
-                        'player': None,     # 占用的玩家
-                        'highlight': False, # 是否高亮显示
-                        'position': (row_idx, col_idx)  # 格子在网格中的位置 (row, col)
-                    })
-                else:
-                    col_cells.append(None)  # 无效的格子位置
-            self.grid.append(col_cells)
+        rects = [self.get_rect()]
+        # 位置改变时，旧位置也需要重绘
+        if self.last_dirty_state and self.last_dirty_state[0] != self.position:
+            old_x, old_y = self.last_dirty_state[0]
+            rects.append(self.get_rect().move(old_x - self.position[0], old_y - self.position[1]))
+        self.last_dirty_state = state
+        return rects
+    
+    def invalidate(self):
+        """格子状态改变时调用，增加版本号使缓存的面板在下次绘制时重建"""
+        self.version += 1
+    
+    def render_panel(self):
+        """将标题和所有格子绘制到离屏面板上，面板区域与get_rect一致"""
+        rect = self.get_rect()
+        panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            panel = panel.convert_alpha()
+        
+        # 网格左上角在面板中的位置
+        origin_x, origin_y = self.position[0] - rect.x, self.position[1] - rect.y
+        
+        # 绘制标题，长地图显示窗口的列范围
+        font = font_registry.get_font(None, int(36 * self.scale_factor))
+        title_text = "路径网格"
+        if self.map is not None:
+            title_text = f"路径网格 {self.base_col + 1}-{self.base_col + len(self.cols_config)}/{self.num_cols}"
+        title = font_registry.render(font, title_text, (0, 0, 0), True)
+        title_rect = title.get_rect(center=(origin_x + self.width // 2, origin_y - int(30 * self.scale_factor)))
+        panel.blit(title, title_rect)
+        
+        # 按几何表遍历每个有效格子
+        col_offsets = self.get_col_offsets()
+        border_width = max(1, int(2 * self.scale_factor))
+        event_font = font_registry.get_font(None, int(26 * self.scale_factor))
+        for col_idx, num_cells in enumerate(self.cols_config):
+            x = origin_x + col_idx * self.grid_size
+            start = self.col_starts[col_idx]
+            for row_idx in range(num_cells):
+                # 计算格子在面板中的坐标
+                y = origin_y + row_idx * self.grid_size + col_offsets[col_idx]
+                flags = self.flags[start + row_idx]
+                
+                # 选择颜色（高亮或普通）
+                color = self.HIGHLIGHT_COLOR if flags & HIGHLIGHT else self.GRID_COLOR
+                
+                # 绘制格子
+                pygame.draw.rect(panel, color, 
+                                pygame.Rect(x, y, self.grid_size, self.grid_size))
+                pygame.draw.rect(panel, self.BORDER_COLOR, 
+                                pygame.Rect(x, y, self.grid_size, self.grid_size), 
+                                border_width)
+                
+                # 绘制格子上的事件
+                event = self.events[start + row_idx]
+                if event != EVENT_NONE:
+                    label = font_registry.render(event_font, EVENT_NAMES[event], self.EVENT_COLORS[event], True)
+                    panel.blit(label, label.get_rect(midbottom=(x + self.grid_size // 2, y + self.grid_size - border_width)))
+                
+                # 如果格子被占用，绘制玩家标记
+                player = self.players.get(start + row_idx)
+                if flags & OCCUPIED and player:
+                    # 这里可以自定义如何绘制玩家标记
+                    player_color = player.get('color', (255, 0, 0))  # 默认红色
+                    pygame.draw.circle(panel, player_color,
+                                      (x + self.grid_size // 2, y + self.grid_size // 2),
+                                      int(self.grid_size * 0.3))
+        
+        return panel
     
     def draw(self):
         """绘制网格"""
-        # 绘制标题
-        font = pygame.font.Font(None, int(36 * self.scale_factor))
-        title = font.render("路径网格", True, (0, 0, 0))
-        title_rect = title.get_rect(center=(self.position[0] + self.width // 2, self.position[1] - int(30 * self.scale_factor)))
-        self.screen.blit(title, title_rect)
-        
-        # 遍历每列
-        for col_idx, col_cells in enumerate(self.grid):
-            # 计算这一列的有效格子数
-            num_cells = self.cols_config[col_idx]
-            # 计算这一列第一个格子的垂直偏移（使每列居中）
-            v_offset = (self.max_rows - num_cells) * self.grid_size // 2
-            
-            # 为第5列和第7列添加额外的半个格子偏移
-            additional_offset = 0
-            if col_idx == 4 or col_idx == 6:  # 第5列和第7列 (索引从0开始)
-                additional_offset = self.grid_size // 2
-            
-            # 遍历这一列的每个有效格子
-            for row_idx, cell in enumerate(col_cells):
-                if cell is not None:  # 只绘制有效的格子
-                    # 计算格子的屏幕坐标
-                    x = self.position[0] + col_idx * self.grid_size
-                    y = self.position[1] + row_idx * self.grid_size + v_offset + additional_offset
-                    
-                    # 选择颜色（高亮或普通）
-                    if cell['highlight']:
-                        color = self.HIGHLIGHT_COLOR
-                    else:
-                        color = self.GRID_COLOR
-                    
-                    # 绘制格子
-                    pygame.draw.rect(self.screen, color, 
-                                    pygame.Rect(x, y, self.grid_size, self.grid_size))
-                    pygame.draw.rect(self.screen, self.BORDER_COLOR, 
-                                    pygame.Rect(x, y, self.grid_size, self.grid_size), 
-                                    max(1, int(2 * self.scale_factor)))
-                    
-                    # 如果格子被占用，绘制玩家标记
-                    if cell['occupied'] and cell['player']:
-                        # 这里可以自定义如何绘制玩家标记
-                        player_color = cell['player'].get('color', (255, 0, 0))  # 默认红色
-                        pygame.draw.circle(self.screen, player_color,
-                                          (x + self.grid_size // 2, y + self.grid_size // 2),
-                                          int(self.grid_size * 0.3))
+        # 版本号或布局改变时重建面板，否则直接使用缓存的面板
+        panel_key = (self.version, self.grid_size, self.scale_factor)
+        if self.panel is None or self.panel_key != panel_key:
+            self.panel = self.render_panel()
+            self.panel_key = panel_key
+        self.screen.blit(self.panel, self.get_rect())
     
-    def get_cell_at_position(self, screen_pos):
-        """根据屏幕坐标获取对应的格子"""
-        x, y = screen_pos
-        grid_x, grid_y = self.position
+    def get_col_offsets(self):
+        """
+        获取几何表：窗口中每列第一个格子相对于网格左上角的纵向偏移（格子大小改变或窗口滚动时重新计算）
         
-        # 检查是否在网格范围内
-        if not (grid_x <= x < grid_x + self.width and grid_y <= y < grid_y + self.height):
-            return None
+        返回:
+            array: 每列的纵向偏移
+        """
+        geometry_key = (self.grid_size, self.base_col)
+        if self.geometry_key != geometry_key:
+            offsets = array('i')
+            for col_idx, num_cells in enumerate(self.cols_config):
+                # 使每列居中
+                v_offset = (self.max_rows - num_cells) * self.grid_size // 2
+                # 固定地图为第5列和第7列添加额外的半个格子偏移
+                if self.map is None and (col_idx == 4 or col_idx == 6):  # 第5列和第7列 (索引从0开始)
+                    v_offset += self.grid_size // 2
+                offsets.append(v_offset)
+            self.col_offsets = offsets
+            self.geometry_key = geometry_key
+        return self.col_offsets
+    
+    def _load_window(self, base_col):
+        """
+        把窗口移动到从base_col开始的view_cols列：仍在窗口中的列保留状态，新进入的列由地图生成
         
-        # 计算列索引
-        col_idx = (x - grid_x) // self.grid_size
-        if not (0 <= col_idx < self.num_cols):
-            return None
+        参数:
+            base_col (int): 窗口中第一列的列号
+        """
+        old_base, old_config, old_starts = self.base_col, self.cols_config, self.col_starts
+        old_flags, old_events, old_players = self.flags, self.events, self.players
+        config = []
+        starts = array('I', [0])
+        flags = bytearray()
+        events = bytearray()
+        players = {}
+        for col in range(base_col, base_col + self.view_cols):
+            old_col = col - old_base
+            if 0 <= old_col < len(old_config):
+                num_rows = old_config[old_col]
+                old_start = old_starts[old_col]
+                flags += old_flags[old_start:old_start + num_rows]
+                events += old_events[old_start:old_start + num_rows]
+                for row in range(num_rows):
+                    player = old_players.get(old_start + row)
+                    if player is not None:
+                        players[starts[-1] + row] = player
+            else:
+                num_rows, col_events = self.map.generate_column(col)
+                flags += bytes(num_rows)
+                events += col_events
+            config.append(num_rows)
+            starts.append(starts[-1] + num_rows)
         
-        # 获取这一列的有效格子数
-        num_cells = self.cols_config[col_idx]
+        self.base_col = base_col
+        self.cols_config = config
+        self.col_starts = starts
+        self.num_cells = starts[-1]
+        self.flags = flags
+        self.events = events
+        self.players = players
+        # 离开窗口的格子不再高亮
+        end_col = base_col + len(config)
+        self.highlighted = {(col, row) for col, row in self.highlighted if base_col <= col < end_col}
+    
+    def set_window(self, base_col):
+        """
+        滚动长地图的窗口（固定地图没有效果）
         
-        # 计算这一列的垂直偏移
-        v_offset = (self.max_rows - num_cells) * self.grid_size // 2
+        参数:
+            base_col (int): 窗口中第一列的列号，超出地图时调整到地图内
         
-        # 为第5列和第7列添加额外的半个格子偏移
-        additional_offset = 0
-        if col_idx == 4 or col_idx == 6:  # 第5列和第7列 (索引从0开始)
-            additional_offset = self.grid_size // 2
+        返回:
+            bool: 窗口是否改变
+        """
+        if self.map is None:
+            return False
+        base_col = max(0, min(base_col, self.num_cols - self.view_cols))
+        if base_col == self.base_col:
+            return False
+        self._load_window(base_col)
+        self.invalidate()
+        return True
+    
+    def follow(self, col):
+        """滚动窗口，使指定列之前只保留keep_behind列"""
+        return self.set_window(col - self.keep_behind)
+    
+    def cell_index(self, col, row):
+        """
+        获取格子编号
         
-        # 调整后的y坐标
-        adjusted_y = y - grid_y - v_offset - additional_offset
+        返回:
+            int: 格子编号，格子不存在或不在窗口中时为-1
+        """
+        local_col = col - self.base_col
+        if 0 <= local_col < len(self.cols_config) and 0 <= row < self.cols_config[local_col]:
+            return self.col_starts[local_col] + row
+        return -1
+    
+    def get_cell_at_position(self, screen_pos):
+        """
+        根据屏幕坐标获取对应的格子
         
-        # 计算行索引
-        row_idx = adjusted_y // self.grid_size
+        返回:
+            tuple: (列, 行)，不在任何格子上时返回None
+        """
+        x = screen_pos[0] - self.position[0]
+        y = screen_pos[1] - self.position[1]
         
-        # 检查行索引是否有效
-        if not (0 <= row_idx < num_cells):
+        # 检查是否在网格范围内
+        if not (0 <= x < self.width and 0 <= y < self.height):
             return None
         
-        # 返回对应的格子
-        return self.grid[col_idx][row_idx]
+        # 列由横坐标直接得到，行减去该列的纵向偏移后得到
+        local_col = x // self.grid_size
+        if local_col >= len(self.cols_config):
+            return None
+        row = (y - self.get_col_offsets()[local_col]) // self.grid_size
+        if not (0 <= row < self.cols_config[local_col]):
+            return None
+        return self.base_col + local_col, row
+    
+    def get_hit_rect(self):
+        """获取格子所在的点击区域（不包括标题）"""
+        x, y = self.position
+        return pygame.Rect(x, y, self.width, self.height)
+    
+    def get_grid_position(self, mouse_pos):
+        """
+        根据鼠标位置返回对应的格子，与棋盘、背包一致使用 (行, 列) 的顺序
+        
+        返回:
+            tuple: (行, 列)，不在任何格子上时返回None
+        """
+        cell = self.get_cell_at_position(mouse_pos)
+        return (cell[1], cell[0]) if cell else None
     
     def set_cell_state(self, col, row, occupied=False, player=None, highlight=False):
         """设置格子状态"""
-        # 检查索引是否有效
-        if 0 <= col < self.num_cols:
-            num_cells = self.cols_config[col]
-            if 0 <= row < num_cells:
-                cell = self.grid[col][row]
-                if cell is not None:
-                    cell['occupied'] = occupied
-                    cell['player'] = player
-                    cell['highlight'] = highlight
-                    return True
-        return False
+        index = self.cell_index(col, row)
+        if index < 0:
+            return False
+        self.flags[index] = (OCCUPIED if occupied else 0) | (HIGHLIGHT if highlight else 0)
+        if player is not None:
+            self.players[index] = player
+        else:
+            self.players.pop(index, None)
+        if highlight:
+            self.highlighted.add((col, row))
+        else:
+            self.highlighted.discard((col, row))
+        self.invalidate()
+        return True
+    
+    def is_occupied(self, col, row):
+        """格子是否被占用"""
+        index = self.cell_index(col, row)
+        return index >= 0 and bool(self.flags[index] & OCCUPIED)
+    
+    def is_highlighted(self, col, row):
+        """格子是否高亮"""
+        index = self.cell_index(col, row)
+        return index >= 0 and bool(self.flags[index] & HIGHLIGHT)
+    
+    def get_player(self, col, row):
+        """获取占用格子的玩家"""
+        return self.players.get(self.cell_index(col, row))
+    
+    def get_event(self, col, row):
+        """获取格子上的事件（EVENT_NONE表示没有事件）"""
+        index = self.cell_index(col, row)
+        return self.events[index] if index >= 0 else EVENT_NONE
+    
+    def iter_cells(self):
+        """
+        按列遍历窗口中的所有格子
+        
+        返回:
+            generator: (列, 行, 状态标志)
+        """
+        flags = self.flags
+        for local_col, num_cells in enumerate(self.cols_config):
+            start = self.col_starts[local_col]
+            for row in range(num_cells):
+                yield self.base_col + local_col, row, flags[start + row]
+    
+    def occupied_cells(self):
+        """
+        获取所有被占用的格子
+        
+        返回:
+            list: [(列, 行), ...]
+        """
+        return [(col, row) for col, row, flags in self.iter_cells() if flags & OCCUPIED]
     
     def highlight_cell(self, col, row, highlight=True):
         """高亮显示或取消高亮指定格子"""
         return self.set_cell_state(col, row, 
-                                  occupied=self.grid[col][row]['occupied'],
-                                  player=self.grid[col][row]['player'], 
+                                  occupied=self.is_occupied(col, row),
+                                  player=self.get_player(col, row), 
                                   highlight=highlight)
     
     def occupy_cell(self, col, row, player):
-        """玩家占据指定格子"""
-        return self.set_cell_state(col, row, occupied=True, player=player, 
-                                  highlight=self.grid[col][row]['highlight'])
+        """玩家占据指定格子，长地图的窗口跟着玩家滚动"""
+        replay_recorder.record_path(col, row, True)
+        result = self.set_cell_state(col, row, occupied=True, player=player, 
+                                    highlight=self.is_highlighted(col, row))
+        self.follow(col)
+        return result
     
     def clear_cell(self, col, row):
         """清除指定格子的占用状态"""
+        replay_recorder.record_path(col, row, False)
         return self.set_cell_state(col, row, occupied=False, player=None, 
-                                  highlight=self.grid[col][row]['highlight'])
+                                  highlight=self.is_highlighted(col, row))
     
     def clear_all_highlights(self):
-        """清除所有格子的高亮状态"""
-        for col_idx, col_cells in enumerate(self.grid):
-            for row_idx, cell in enumerate(col_cells):
-                if cell is not None:
-                    cell['highlight'] = False
+        """清除所有格子的高亮状态（只访问当前高亮的格子）"""
+        self.set_highlights(())
+    
+    def set_highlights(self, cells):
+        """
+        设置高亮的格子，只修改与当前高亮不同的格子
+        
+        参数:
+            cells: 要高亮的格子 [(列, 行), ...]，其余格子取消高亮
+        """
+        cells = {(col, row) for col, row in cells if self.cell_index(col, row) >= 0}
+        if cells == self.highlighted:
+            return
+        for col, row in self.highlighted - cells:
+            self.flags[self.cell_index(col, row)] &= ~HIGHLIGHT
+        for col, row in cells - self.highlighted:
+            self.flags[self.cell_index(col, row)] |= HIGHLIGHT
+        self.highlighted = cells
+        self.invalidate()
+    
+    def highlight_moves(self, col, row):
+        """高亮从指定格子出发可以移动到的格子"""
+        self.set_highlights(self.planner.next_moves(col, row))
     
     def get_cell_screen_position(self, col, row):
         """获取指定格子的屏幕坐标（左上角）"""
-        # 检查索引是否有效
-        if 0 <= col < self.num_cols:
-            num_cells = self.cols_config[col]
-            if 0 <= row < num_cells:
-                # 计算这一列的垂直偏移
-                v_offset = (self.max_rows - num_cells) * self.grid_size // 2
-                
-                # 为第5列和第7列添加额外的半个格子偏移
-                additional_offset = 0
-                if col == 4 or col == 6:  # 第5列和第7列 (索引从0开始)
-                    additional_offset = self.grid_size // 2
-                
-                # 计算格子的屏幕坐标
-                x = self.position[0] + col * self.grid_size
-                y = self.position[1] + row * self.grid_size + v_offset + additional_offset
-                
-                return (x, y)
-        return None
+        if self.cell_index(col, row) < 0:
+            return None
+        x = self.position[0] + (col - self.base_col) * self.grid_size
+        y = self.position[1] + row * self.grid_size + self.get_col_offsets()[col - self.base_col]
+        return (x, y)
     
     def get_cell_center(self, col, row):
         """获取指定格子的屏幕中心坐标"""
@@ -207,4 +472,4 @@ class PathGrid:
         if pos:
             x, y = pos
             return (x + self.grid_size // 2, y + self.grid_size // 2)
-        return None 
\ No newline at end of file
+        return None 
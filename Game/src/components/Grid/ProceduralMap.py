@@ -0,0 +1,137 @@
+"""
+种子生成的长路径地图
+
+每一列的格子数量和每个格子上的事件（战斗、奖励、商店）都只由种子和列号计算得到，不需要保存之前的列：
+任何一列都可以随时生成、丢弃、再重新生成出完全相同的内容，所以几万列的地图只需要保存屏幕上的那一段。
+
+格子数量先按列号取一个随机值raw，再取 max(raw(col - k) - k)（k = 0..max_rows-1），
+保证下一列的格子数最多比这一列少1，从任何格子出发都至少有一个可以移动到的格子，不会走进死路。
+
+ProceduralMap同时提供与RoutePlanner相同的移动查询接口（is_valid、next_moves、can_move），
+可以直接作为PathGrid的规划器使用。
+"""
+
+# 格子事件
+EVENT_NONE = 0
+EVENT_FIGHT = 1
+EVENT_REWARD = 2
+EVENT_SHOP = 3
+
+EVENT_NAMES = {
+    EVENT_NONE: "", EVENT_FIGHT: "战斗", EVENT_REWARD: "奖励", EVENT_SHOP: "商店"
+}
+
+MASK64 = (1 << 64) - 1
+
+def mix(seed, *values):
+    """
+    把种子和若干整数混合成一个64位的伪随机数（splitmix64），相同的输入总是得到相同的结果
+
+    返回:
+        int: 0 到 2**64-1 之间的整数
+    """
+    state = seed & MASK64
+    for value in values:
+        state = (state + 0x9E3779B97F4A7C15 + (value & MASK64)) & MASK64
+        state = ((state ^ (state >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        state = ((state ^ (state >> 27)) * 0x94D049BB133111EB) & MASK64
+        state ^= state >> 31
+    return state
+
+class ProceduralMap:
+    """
+    由种子确定的路径地图
+    """
+
+    def __init__(self, seed, length=10000, max_rows=4, event_weights=(5, 3, 2, 1)):
+        """
+        初始化地图
+
+        参数:
+            seed (int): 随机种子
+            length (int): 地图的列数
+            max_rows (int): 每列最多的格子数量
+            event_weights (tuple): 空格子、战斗、奖励、商店的权重
+        """
+        self.seed = seed
+        self.length = length
+        self.max_rows = max_rows
+        # 累计权重，按 (上限, 事件) 查找
+        self.event_table = []
+        total = 0
+        for event, weight in enumerate(event_weights):
+            total += weight
+            self.event_table.append((total, event))
+        self.event_total = total
+
+        # 统计信息：生成过的列数（同一列可能被生成多次）
+        self.generated = 0
+
+    def _raw_rows(self, col):
+        """不考虑相邻列时的格子数量，第一列固定为1（起点）"""
+        if col == 0:
+            return 1
+        return 1 + mix(self.seed, col) % self.max_rows
+
+    def num_rows(self, col):
+        """
+        某一列的格子数量
+
+        返回:
+            int: 格子数量，列不存在时为0
+        """
+        if not 0 <= col < self.length:
+            return 0
+        return max(self._raw_rows(col - k) - k for k in range(min(col, self.max_rows - 1) + 1))
+
+    def event_at(self, col, row):
+        """某个格子上的事件，起点没有事件"""
+        if col == 0:
+            return EVENT_NONE
+        roll = mix(self.seed, col, row) % self.event_total
+        for limit, event in self.event_table:
+            if roll < limit:
+                return event
+        return EVENT_NONE
+
+    def generate_column(self, col):
+        """
+        生成一列
+
+        返回:
+            tuple: (格子数量, 每个格子的事件bytes)
+        """
+        self.generated += 1
+        num_rows = self.num_rows(col)
+        return num_rows, bytes(self.event_at(col, row) for row in range(num_rows))
+
+    def is_valid(self, col, row):
+        """格子是否存在"""
+        return 0 <= row < self.num_rows(col)
+
+    def next_moves(self, col, row):
+        """
+        获取可以移动到的格子（规则与RoutePlanner相同）
+
+        返回:
+            list: [(列, 行), ...]
+        """
+        if not self.is_valid(col, row):
+            return []
+        next_rows = self.num_rows(col + 1)
+        return [(col + 1, next_row) for next_row in range(max(0, row - 1), min(next_rows, row + 2))]
+
+    def can_move(self, from_cell, to_cell):
+        """
+        是否可以从一个格子移动到另一个格子
+
+        参数:
+            from_cell (tuple): (列, 行)，为None时表示还没有出发，只能移动到起点(0, 0)
+            to_cell (tuple): (列, 行)
+        """
+        col, row = to_cell
+        if from_cell is None:
+            return col == 0 and row == 0 and self.is_valid(0, 0)
+        from_col, from_row = from_cell
+        return (col == from_col + 1 and abs(row - from_row) <= 1
+                and self.is_valid(from_col, from_row) and self.is_valid(col, row))
@@ -0,0 +1,218 @@
+"""
+路径网格的路线规划
+
+移动规则：每次前进一列，行号最多改变1（行号是格子在该列中的序号），目标行必须在下一列的格子数以内。
+这些移动构成一个有向无环图，RoutePlanner为一种列配置（cols_config）预先计算一次，之后的查询都是查表：
+
+    next_moves / can_move   某个格子可以移动到的格子
+    count_paths             从某个格子到终点（最后一列）的不同路线数
+    best_path               按格子奖励计算到终点的最佳路线
+    reachable               从某个格子出发每一列能到达的行范围
+
+所有表都是从最后一列往前逐列计算的（不使用递归），几千甚至几十万列的地图也不会超出递归深度，
+每次查询的时间只与路线长度有关。
+"""
+from collections import OrderedDict
+
+class RoutePlanner:
+    """
+    一种列配置的路线规划器
+    """
+
+    def __init__(self, cols_config, max_cached_starts=64):
+        """
+        预先计算每个格子的后继格子
+
+        参数:
+            cols_config (list): 每列的格子数量
+            max_cached_starts (int): reachable缓存的起点数量上限（按LRU淘汰）
+        """
+        self.cols_config = tuple(cols_config)
+        self.num_cols = len(self.cols_config)
+        # successors[col][row] -> 下一列可以到达的行范围 (起始行, 结束行)，不包含结束行
+        self.successors = []
+        for col, num_rows in enumerate(self.cols_config):
+            next_rows = self.cols_config[col + 1] if col + 1 < self.num_cols else 0
+            self.successors.append(tuple((max(0, row - 1), min(next_rows, row + 2)) for row in range(num_rows)))
+
+        # 到终点的路线数，第一次查询时计算
+        self._path_counts = None
+        # 最佳路线：每个格子到终点的最大奖励和下一步的行，set_rewards时计算
+        self._best_scores = None
+        self._best_next = None
+        # 起点 -> 每列可以到达的行范围（按需要的列数逐步计算）
+        self._reachable = OrderedDict()
+        self.max_cached_starts = max_cached_starts
+
+    def is_valid(self, col, row):
+        """格子是否存在"""
+        return 0 <= col < self.num_cols and 0 <= row < self.cols_config[col]
+
+    def next_moves(self, col, row):
+        """
+        获取可以移动到的格子
+
+        返回:
+            list: [(列, 行), ...]
+        """
+        if not self.is_valid(col, row):
+            return []
+        start, end = self.successors[col][row]
+        return [(col + 1, next_row) for next_row in range(start, end)]
+
+    def can_move(self, from_cell, to_cell):
+        """
+        是否可以从一个格子移动到另一个格子
+
+        参数:
+            from_cell (tuple): (列, 行)，为None时表示还没有出发，只能移动到起点(0, 0)
+            to_cell (tuple): (列, 行)
+        """
+        col, row = to_cell
+        if from_cell is None:
+            return col == 0 and row == 0 and self.is_valid(0, 0)
+        from_col, from_row = from_cell
+        if col != from_col + 1 or not self.is_valid(from_col, from_row):
+            return False
+        start, end = self.successors[from_col][from_row]
+        return start <= row < end
+
+    def _compute_path_counts(self):
+        """从最后一列往前计算每个格子到终点的路线数"""
+        counts = [None] * self.num_cols
+        if self.num_cols:
+            counts[-1] = [1] * self.cols_config[-1]
+        for col in range(self.num_cols - 2, -1, -1):
+            next_counts = counts[col + 1]
+            counts[col] = [sum(next_counts[start:end]) for start, end in self.successors[col]]
+        self._path_counts = counts
+
+    def count_paths(self, col, row):
+        """
+        从某个格子到终点（最后一列任意格子）的不同路线数
+
+        返回:
+            int: 路线数，格子不存在或无法到达终点时为0
+        """
+        if not self.is_valid(col, row):
+            return 0
+        if self._path_counts is None:
+            self._compute_path_counts()
+        return self._path_counts[col][row]
+
+    def set_rewards(self, rewards, default=0):
+        """
+        设置格子奖励并计算每个格子到终点的最佳路线
+
+        参数:
+            rewards (dict): (列, 行) -> 奖励，没有的格子使用default
+            default (int): 默认奖励
+        """
+        scores = [None] * self.num_cols
+        next_rows = [None] * self.num_cols
+        for col in range(self.num_cols - 1, -1, -1):
+            col_scores = []
+            col_next = []
+            for row, (start, end) in enumerate(self.successors[col]):
+                reward = rewards.get((col, row), default)
+                if col == self.num_cols - 1:
+                    col_scores.append(reward)
+                    col_next.append(-1)
+                    continue
+                # 在可以到达终点的后继格子中选择奖励最大的，相同时选择行号较小的
+                best_row = -1
+                best_score = None
+                following = scores[col + 1]
+                for next_row in range(start, end):
+                    score = following[next_row]
+                    if score is not None and (best_score is None or score > best_score):
+                        best_row, best_score = next_row, score
+                col_scores.append(None if best_score is None else reward + best_score)
+                col_next.append(best_row)
+            scores[col] = col_scores
+            next_rows[col] = col_next
+        self._best_scores = scores
+        self._best_next = next_rows
+
+    def best_path(self, col=0, row=0):
+        """
+        从某个格子到终点奖励最大的路线（需要先调用set_rewards，没有调用时每个格子奖励为0）
+
+        返回:
+            tuple: (总奖励, [(列, 行), ...])，无法到达终点时为 (None, [])
+        """
+        if not self.is_valid(col, row):
+            return None, []
+        if self._best_scores is None:
+            self.set_rewards({})
+        score = self._best_scores[col][row]
+        if score is None:
+            return None, []
+        path = [(col, row)]
+        while col < self.num_cols - 1:
+            row = self._best_next[col][row]
+            col += 1
+            path.append((col, row))
+        return score, path
+
+    def reachable(self, col, row, horizon=None):
+        """
+        从某个格子出发，之后每一列能到达的行范围
+
+        参数:
+            col (int): 起始列
+            row (int): 起始行
+            horizon (int): 最多向前看多少列，为None时到最后一列
+
+        返回:
+            list: [(列, 起始行, 结束行), ...]（包含结束行），从下一列开始，到某一列无法继续前进时停止
+        """
+        if not self.is_valid(col, row):
+            return []
+        key = (col, row)
+        entry = self._reachable.get(key)
+        if entry is None:
+            # [已计算的行范围, 是否已经到达最后一列或无法继续前进]
+            entry = self._reachable[key] = [[], False]
+            if len(self._reachable) > self.max_cached_starts:
+                self._reachable.popitem(last=False)
+        else:
+            self._reachable.move_to_end(key)
+        ranges, done = entry
+        wanted = self.num_cols if horizon is None else horizon
+        if not done and len(ranges) < wanted:
+            # 从已计算的最后一列继续向前计算，只计算到需要的列
+            next_col, low, high = ranges[-1] if ranges else (col, row, row)
+            while len(ranges) < wanted:
+                next_col += 1
+                if next_col >= self.num_cols:
+                    entry[1] = True
+                    break
+                low = max(0, low - 1)
+                high = min(self.cols_config[next_col] - 1, high + 1)
+                if low > high:
+                    entry[1] = True
+                    break
+                ranges.append((next_col, low, high))
+        return ranges if horizon is None else ranges[:horizon]
+
+    def reachable_cells(self, col, row, horizon=None):
+        """
+        从某个格子出发能到达的所有格子
+
+        返回:
+            set: {(列, 行), ...}
+        """
+        return {(next_col, next_row) for next_col, low, high in self.reachable(col, row, horizon)
+                for next_row in range(low, high + 1)}
+
+# 已创建的规划器: 列配置 -> RoutePlanner，相同列配置的网格共享同一个规划器
+_planners = {}
+
+def get_planner(cols_config):
+    """获取列配置对应的规划器（每种列配置只计算一次）"""
+    key = tuple(cols_config)
+    planner = _planners.get(key)
+    if planner is None:
+        planner = _planners[key] = RoutePlanner(key)
+    return planner
@@ -0,0 +1,166 @@
+import pygame
+
+class HitResult:
+    """
+    点击检测的结果
+    """
+    __slots__ = ("name", "component", "row", "col")
+
+    def __init__(self, name, component, row=None, col=None):
+        """
+        参数:
+            name (str): 区域名称
+            component: 区域对应的组件（按钮等没有组件的区域为None）
+            row (int): 格子行，不在格子上时为None
+            col (int): 格子列，不在格子上时为None
+        """
+        self.name = name
+        self.component = component
+        self.row = row
+        self.col = col
+
+    def cell(self):
+        """格子 (行, 列)，不在格子上时返回None"""
+        return None if self.row is None else (self.row, self.col)
+
+class HitRegion:
+    """
+    注册到索引中的区域
+    """
+    __slots__ = ("name", "component", "rect_source", "rect", "buckets")
+
+    def __init__(self, name, component, rect_source):
+        self.name = name
+        self.component = component
+        self.rect_source = rect_source  # 返回当前区域的函数
+        self.rect = None
+        self.buckets = ()
+
+class HitIndex:
+    """
+    界面点击检测的统一空间索引
+
+    屏幕按bucket_size划分为均匀的桶，每个桶记录与它重叠的区域（棋盘、背包、奖励盒子、路径网格、按钮等）。
+    查询时只需找到点所在的桶，检查其中的少数几个区域，再由组件的get_grid_position把点换算成格子，
+    所以无论注册了多少个面板，一次查询都是常数时间。
+
+    组件需要实现get_hit_rect（格子所在的区域）和get_grid_position（屏幕坐标 -> (行, 列)）。
+    每帧调用一次update，组件的位置或大小改变时只重新登记该组件所在的桶。
+    """
+    def __init__(self, bucket_size=64):
+        """
+        初始化索引
+
+        参数:
+            bucket_size (int): 桶的边长（像素）
+        """
+        self.bucket_size = bucket_size
+        self.regions = []   # 按注册顺序，同一个点有多个区域时先注册的优先
+        self.buckets = {}   # (桶x, 桶y) -> [区域, ...]
+
+        # 同一帧内对同一个点的重复查询直接返回上一次的结果
+        self.last_pos = None
+        self.last_result = None
+
+        # 统计信息
+        self.lookups = 0
+        self.rebuilds = 0
+
+    def add_component(self, name, component):
+        """
+        注册一个有格子的组件
+
+        参数:
+            name (str): 区域名称
+            component: 实现了get_hit_rect和get_grid_position的组件
+        """
+        self._add(HitRegion(name, component, component.get_hit_rect))
+
+    def add_rect(self, name, rect):
+        """
+        注册一个没有格子的区域（例如按钮）
+
+        参数:
+            name (str): 区域名称
+            rect (pygame.Rect): 区域，之后直接修改这个Rect对象也会在update时生效
+        """
+        self._add(HitRegion(name, None, lambda: rect))
+
+    def _add(self, region):
+        """注册区域并登记到桶中"""
+        self.regions.append(region)
+        self._place(region)
+
+    def _bucket_range(self, rect):
+        """区域覆盖的所有桶"""
+        size = self.bucket_size
+        return [(bucket_x, bucket_y)
+                for bucket_x in range(rect.left // size, (rect.right - 1) // size + 1)
+                for bucket_y in range(rect.top // size, (rect.bottom - 1) // size + 1)]
+
+    def _place(self, region):
+        """按区域的当前位置重新登记桶"""
+        for bucket in region.buckets:
+            entries = self.buckets[bucket]
+            entries.remove(region)
+            if not entries:
+                del self.buckets[bucket]
+        region.rect = pygame.Rect(region.rect_source())
+        region.buckets = tuple(self._bucket_range(region.rect)) if region.rect.width > 0 and region.rect.height > 0 else ()
+        for bucket in region.buckets:
+            entries = self.buckets.setdefault(bucket, [])
+            entries.append(region)
+            # 保持注册顺序
+            entries.sort(key=self.regions.index)
+        self.rebuilds += 1
+        self.last_pos = None
+
+    def update(self):
+        """检查所有区域的位置和大小，改变的区域重新登记（每帧调用一次）"""
+        # 组件的内容可能改变了格子的位置（例如路径网格滚动），上一帧的查询结果不再使用
+        self.last_pos = None
+        for region in self.regions:
+            if region.rect != region.rect_source():
+                self._place(region)
+
+    def lookup(self, pos):
+        """
+        查找屏幕坐标所在的区域和格子
+
+        返回:
+            HitResult: 没有命中任何区域时返回None
+        """
+        pos = (int(pos[0]), int(pos[1]))
+        if pos == self.last_pos:
+            return self.last_result
+        self.lookups += 1
+        result = None
+        for region in self.buckets.get((pos[0] // self.bucket_size, pos[1] // self.bucket_size), ()):
+            if region.rect.collidepoint(pos):
+                cell = region.component.get_grid_position(pos) if region.component is not None else None
+                result = HitResult(region.name, region.component, *(cell or (None, None)))
+                break
+        self.last_pos = pos
+        self.last_result = result
+        return result
+
+    def cell_on(self, pos, component):
+        """
+        屏幕坐标在指定组件上的格子（同一个点的多次查询只做一次查找）
+
+        返回:
+            tuple: (行, 列)，不在该组件的格子上时返回None
+        """
+        result = self.lookup(pos)
+        if result is None or result.component is not component:
+            return None
+        return result.cell()
+
+    def get_stats(self):
+        """获取统计信息"""
+        return {
+            'regions': len(self.regions),
+            'buckets': len(self.buckets),
+            'lookups': self.lookups,
+            'rebuilds': self.rebuilds
+        }
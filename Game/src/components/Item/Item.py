@@ -1,14 +1,24 @@
 import pygame
 import os
+from src.components.Asset.AssetManager import asset_manager
+from src.components.Replay.Replay import replay_recorder, KIND_ITEM
+from src.components.Entity.EntityWorld import entity_world
+from src.components.Entity.RenderSystem import render_system, item_sprite
 
 class Item:
+    """
+    物品类，攻击力、生命值、位置和图片保存在实体存储（entity_world）的组件数组中，绘制由渲染系统完成
+    """
+    __slots__ = ("entity", "ability", "image_path", "container", "__weakref__")  # 录像只保存弱引用
+    
     def __init__(self, attack=0, lifepoint=0, ability="", image_path=None):
-        self.attack = attack
-        self.lifepoint = lifepoint
+        self.entity = entity_world.create(KIND_ITEM, attack, lifepoint)
         self.ability = ability
-        self.image = None
+        self.image_path = None  # 当前图片路径，用于向资源管理器释放引用
         self.position = (0, 0)  # 在背包中的位置
-        self.size = None  # 物品大小，将在set_Pic中设置
+        
+        # 所在的容器，图片改变时通知容器重绘
+        self.container = None
         
         # 设置默认图片路径
         if image_path is None:
@@ -18,71 +28,103 @@ class Item:
         
         self.set_Pic(image_path)
     
+    def __del__(self):
+        """对象被回收时释放图片引用并回收实体"""
+        image_path = getattr(self, "image_path", None)
+        if image_path:
+            asset_manager.release_image(image_path)
+        entity = getattr(self, "entity", None)
+        if entity is not None:
+            entity_world.destroy(entity)
+    
+    @property
+    def attack(self):
+        """攻击力"""
+        return int(entity_world.attack[self.entity])
+    
+    @attack.setter
+    def attack(self, value):
+        entity_world.attack[self.entity] = value
+    
+    @property
+    def lifepoint(self):
+        """生命值"""
+        return int(entity_world.lifepoint[self.entity])
+    
+    @lifepoint.setter
+    def lifepoint(self, value):
+        entity_world.lifepoint[self.entity] = value
+    
+    @property
+    def position(self):
+        """在背包中的位置 (row, col)"""
+        return int(entity_world.row[self.entity]), int(entity_world.col[self.entity])
+    
+    @position.setter
+    def position(self, position):
+        entity_world.row[self.entity], entity_world.col[self.entity] = position
+    
+    @property
+    def image(self):
+        """物品图片（共享，不应直接修改）"""
+        return entity_world.get_sprite(self.entity)
+    
+    @property
+    def size(self):
+        """物品图片的原始大小"""
+        image = self.image
+        return image.get_size() if image is not None else None
+    
     def set_Pic(self, image_path):
         """设置物品图片"""
+        # 释放之前图片的引用
+        if self.image_path:
+            asset_manager.release_image(self.image_path)
+            self.image_path = None
+        
         try:
-            self.image = pygame.image.load(image_path)
-            # 获取图片原始大小
-            self.size = self.image.get_size()
+            # 通过资源管理器获取共享图片，同一路径只从磁盘读取一次
+            entity_world.set_sprite(self.entity, asset_manager.load_image(image_path))
+            self.image_path = image_path
         except:
             # 如果图片加载失败，创建一个默认的红色矩形
-            self.size = (80, 80)  # 默认大小
-            self.image = pygame.Surface(self.size)
-            self.image.fill((255, 0, 0))  # 红色
+            image = pygame.Surface((80, 80))  # 默认大小
+            image.fill((255, 0, 0))  # 红色
+            entity_world.set_sprite(self.entity, image)
+        
+        if self.container is not None:
+            self.container.invalidate()
     
     def set_position(self, row, col):
         """设置物品在背包中的位置"""
         self.position = (row, col)
     
-    def draw(self, screen, position, grid_size):
-        """绘制物品"""
-        if self.image:
-            # 计算物品在背包中的实际位置
-            x = position[0] + self.position[1] * grid_size
-            y = position[1] + self.position[0] * grid_size
-            
-            # 计算缩放比例
-            scale = grid_size / max(self.size)
-            new_size = (int(self.size[0] * scale), int(self.size[1] * scale))
-            
-            # 缩放图片
-            scaled_image = pygame.transform.scale(self.image, new_size)
-            
-            # 计算居中位置
-            x += (grid_size - new_size[0]) // 2
-            y += (grid_size - new_size[1]) // 2
-            
-            # 绘制图片
-            screen.blit(scaled_image, (x, y))
+    def prepare_sprite(self, grid_size):
+        """
+        预先生成适合格子大小的物品图片，在放置物品或布局改变时调用
+        
+        参数:
+            grid_size (int): 格子大小
             
-            # 计算屏幕大小和缩放比例
+        返回:
+            Surface: 缩放后的图片
+        """
+        return item_sprite(self.image, grid_size)
+    
+    def draw(self, screen, position, grid_size, scale_factor=None):
+        """
+        绘制物品（容器绘制多个物品时直接把它们一起交给渲染系统）
+        
+        参数:
+            screen: 绘制目标Surface
+            position: 背包左上角位置
+            grid_size: 格子大小
+            scale_factor: 缩放比例，为None时根据screen大小计算
+        """
+        if scale_factor is None:
             screen_width, screen_height = screen.get_size()
             scale_factor = min(screen_width / 1920, screen_height / 1200)
-            
-            # 计算物品中心位置（用于显示属性）
-            center_x = x + new_size[0] // 2
-            center_y = y + new_size[1]
-            
-            # 绘制物品属性（攻击力和生命值）
-            font = pygame.font.Font(None, int(20 * scale_factor))
-            attack_text = font.render(str(self.attack), True, (255, 0, 0))
-            lifepoint_text = font.render(str(self.lifepoint), True, (0, 255, 0))
-            
-            # 创建黑色背景使文字更清晰
-            text_bg_width = int(50 * scale_factor)
-            text_bg_height = int(20 * scale_factor)
-            text_bg = pygame.Surface((text_bg_width, text_bg_height))
-            text_bg.set_alpha(150)  # 半透明
-            text_bg.fill((0, 0, 0))
-            
-            # 计算背景位置（物品底部）
-            bg_x = center_x - text_bg_width // 2
-            bg_y = center_y - text_bg_height // 2
-            
-            # 绘制背景和文字
-            screen.blit(text_bg, (bg_x, bg_y))
-            screen.blit(attack_text, (bg_x + int(10 * scale_factor), bg_y + int(2 * scale_factor)))
-            screen.blit(lifepoint_text, (bg_x + int(30 * scale_factor), bg_y + int(2 * scale_factor)))
+        render_system.draw(screen, [self], position, grid_size, scale_factor)
     
     def apply_to_piece(self, piece):
         """将物品效果应用到棋子上"""
@@ -95,5 +137,8 @@ class Item:
                     piece.ability += f", {self.ability}"
                 else:
                     piece.ability = self.ability
+            # 记录到录像，并通知棋子所在的容器重绘
+            replay_recorder.record_item_applied(self, piece)
+            piece.mark_changed()
             return True
         return False 
\ No newline at end of file
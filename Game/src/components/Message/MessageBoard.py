@@ -1,5 +1,7 @@
 import pygame
 import os
+from src.components.Font.FontRegistry import font_registry
+from src.components.Replay.Replay import replay_recorder
 
 class MessageBoard:
     """消息板类，用于显示游戏信息：金币数量、当前回合和游戏消息"""
@@ -42,6 +44,15 @@ class MessageBoard:
         
         # 初始化字体
         self.initialize_font()
+        
+        # 消息排版缓存：在add_message时计算好换行/截断并渲染好每一行，绘制时只需blit
+        # 当前消息的排版 (消息文本, 每一行的Surface列表)
+        self.message_layout = None
+        # 历史消息的排版，与message_history一一对应，每项为 (消息文本, 截断后的Surface)
+        self.history_layouts = []
+        
+        # 脏矩形渲染相关：上一次报告时的状态
+        self.last_dirty_state = None
     
     def initialize_font(self):
         """初始化字体，尝试加载中文字体，如果失败则使用默认字体"""
@@ -59,10 +70,10 @@ class MessageBoard:
                 # 尝试使用系统字体路径
                 system_font_path = os.path.join("C:\\Windows\\Fonts", font_name)
                 if os.path.exists(system_font_path):
-                    self.title_font = pygame.font.Font(system_font_path, int(32 * self.scale_factor))
-                    self.info_font = pygame.font.Font(system_font_path, int(28 * self.scale_factor))
-                    self.message_font = pygame.font.Font(system_font_path, int(24 * self.scale_factor))
-                    self.history_font = pygame.font.Font(system_font_path, int(20 * self.scale_factor))
+                    self.title_font = font_registry.get_font(system_font_path, int(32 * self.scale_factor))
+                    self.info_font = font_registry.get_font(system_font_path, int(28 * self.scale_factor))
+                    self.message_font = font_registry.get_font(system_font_path, int(24 * self.scale_factor))
+                    self.history_font = font_registry.get_font(system_font_path, int(20 * self.scale_factor))
                     font_found = True
                     # 记录使用的字体名称
                     self.font_name = font_name
@@ -70,19 +81,19 @@ class MessageBoard:
             
             # 如果没有找到中文字体，使用默认字体
             if not font_found:
-                self.title_font = pygame.font.Font(None, int(32 * self.scale_factor))
-                self.info_font = pygame.font.Font(None, int(28 * self.scale_factor))
-                self.message_font = pygame.font.Font(None, int(24 * self.scale_factor))
-                self.history_font = pygame.font.Font(None, int(20 * self.scale_factor))
+                self.title_font = font_registry.get_font(None, int(32 * self.scale_factor))
+                self.info_font = font_registry.get_font(None, int(28 * self.scale_factor))
+                self.message_font = font_registry.get_font(None, int(24 * self.scale_factor))
+                self.history_font = font_registry.get_font(None, int(20 * self.scale_factor))
                 self.font_name = "默认字体"
                 
         except Exception as e:
             print(f"加载字体时出错: {e}")
             # 使用默认字体
-            self.title_font = pygame.font.Font(None, int(32 * self.scale_factor))
-            self.info_font = pygame.font.Font(None, int(28 * self.scale_factor))
-            self.message_font = pygame.font.Font(None, int(24 * self.scale_factor))
-            self.history_font = pygame.font.Font(None, int(20 * self.scale_factor))
+            self.title_font = font_registry.get_font(None, int(32 * self.scale_factor))
+            self.info_font = font_registry.get_font(None, int(28 * self.scale_factor))
+            self.message_font = font_registry.get_font(None, int(24 * self.scale_factor))
+            self.history_font = font_registry.get_font(None, int(20 * self.scale_factor))
             self.font_name = "默认字体"
     
     def update_position_relative_to_chessboard(self, chessboard):
@@ -94,24 +105,52 @@ class MessageBoard:
             chessboard_y-20  # 与棋盘顶部对齐
         )
     
+    def get_rect(self):
+        """获取消息板在屏幕上占据的区域"""
+        x, y = self.position
+        return pygame.Rect(x, y, self.width, self.height)
+    
+    def get_dirty_rects(self):
+        """
+        返回自上次调用以来发生变化的屏幕区域
+        
+        返回:
+            list: 需要重绘的pygame.Rect列表
+        """
+        state = (self.position, self.coins, self.current_turn, self.message, tuple(self.message_history))
+        if state == self.last_dirty_state:
+            return []
+        
+        rects = [self.get_rect()]
+        # 位置改变时，旧位置也需要重绘
+        if self.last_dirty_state and self.last_dirty_state[0] != self.position:
+            old_x, old_y = self.last_dirty_state[0]
+            rects.append(pygame.Rect(old_x, old_y, self.width, self.height))
+        self.last_dirty_state = state
+        return rects
+    
     def add_message(self, message):
         """添加新消息并更新当前消息"""
         # 将当前消息移至历史记录
         if self.message:
             self.message_history.insert(0, self.message)
+            self.history_layouts.insert(0, self.layout_history(self.message))
         
         # 设置新的当前消息
         self.message = message
+        self.message_layout = self.layout_message(message)
         
         # 如果历史消息过多，删除最早的
         if len(self.message_history) > self.max_messages:
             self.message_history = self.message_history[:self.max_messages]
+            self.history_layouts = self.history_layouts[:self.max_messages]
     
     def update_coins(self, amount):
         """更新金币数量"""
         new_value = self.coins + amount
         # 确保金币不会变为负数
         self.coins = max(0, new_value)
+        replay_recorder.record_coins(self.coins)
         
         # 添加消息
         if amount > 0:
@@ -124,31 +163,86 @@ class MessageBoard:
     def next_turn(self):
         """前进到下一回合"""
         self.current_turn += 1
+        replay_recorder.record_turn(self.current_turn)
         self.add_message(f"第 {self.current_turn} 回合开始!")
         return self.current_turn
     
+    def get_text_width(self):
+        """获取消息文字可用的最大宽度"""
+        return self.width - int(60 * self.scale_factor)
+    
+    def fit_length(self, text, font, max_width, start=0, suffix="", strict=False):
+        """
+        二分查找从start开始最多能放下多少个字符
+        
+        参数:
+            text (str): 文本
+            font (Font): 字体
+            max_width (int): 最大宽度
+            start (int): 起始字符位置
+            suffix (str): 附加在末尾一起测量的后缀，例如"..."
+            strict (bool): 为True时要求宽度严格小于max_width
+            
+        返回:
+            int: 满足宽度限制的最大结束位置end（text[start:end]），一个字符都放不下时返回start
+        """
+        def fits(end):
+            width = font.size(text[start:end] + suffix)[0]
+            return width < max_width if strict else width <= max_width
+        
+        low, high = start, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if fits(mid):
+                low = mid
+            else:
+                high = mid - 1
+        return low
+    
     def wrap_text(self, text, font, max_width):
         """将文本分成多行，确保每行不超过指定的最大宽度"""
         lines = []
-        # 对于中文，按字符拆分更合适
-        words = list(text)
-        current_line = ""
-        
-        for word in words:
-            test_line = current_line + word
-            # 检查这一行加上新字符是否会太长
-            if font.size(test_line)[0] < max_width:
-                current_line = test_line
-            else:
-                lines.append(current_line)
-                current_line = word
-        
-        # 添加最后一行
-        if current_line:
-            lines.append(current_line)
+        # 对于中文，按字符拆分更合适，每行用二分查找确定能放下的字符数
+        start = 0
+        while start < len(text):
+            end = self.fit_length(text, font, max_width, start, strict=True)
+            # 每行至少放一个字符，避免单个字符超宽时死循环
+            end = max(end, start + 1)
+            lines.append(text[start:end])
+            start = end
             
         return lines
     
+    def truncate_text(self, text, font, max_width):
+        """将文本截断到指定宽度以内，被截断时末尾添加"..." """
+        if font.size(text)[0] <= max_width:
+            return text
+        # 计算能显示多少字符
+        end = self.fit_length(text, font, max_width, suffix="...")
+        if end == 0:
+            return text
+        return text[:end] + "..."
+    
+    def layout_message(self, text):
+        """
+        对当前消息进行换行并渲染每一行
+        
+        返回:
+            tuple: (消息文本, 每一行的Surface列表)
+        """
+        lines = self.wrap_text(text, self.message_font, self.get_text_width()) if text else []
+        return text, [font_registry.render(self.message_font, line, self.TEXT_COLOR, True) for line in lines]
+    
+    def layout_history(self, text):
+        """
+        对历史消息进行截断并渲染
+        
+        返回:
+            tuple: (消息文本, 截断后的Surface)
+        """
+        truncated = self.truncate_text(text, self.history_font, self.get_text_width())
+        return text, font_registry.render(self.history_font, truncated, self.TEXT_COLOR, True)
+    
     def draw(self):
         """绘制消息板"""
         x, y = self.position
@@ -159,7 +253,7 @@ class MessageBoard:
         pygame.draw.rect(self.screen, self.BORDER, (x, y, self.width, self.height), 3)
         
         # 绘制标题
-        title = self.title_font.render("游戏信息", True, self.HIGHLIGHT_COLOR)
+        title = font_registry.render(self.title_font, "游戏信息", self.HIGHLIGHT_COLOR, True)
         title_rect = title.get_rect(center=(x + self.width // 2, y + int(25 * self.scale_factor)))
         self.screen.blit(title, title_rect)
         
@@ -173,8 +267,8 @@ class MessageBoard:
         )
         
         # 绘制金币和回合信息
-        coin_text = self.info_font.render(f"金币: {self.coins}", True, self.COIN_COLOR)
-        turn_text = self.info_font.render(f"回合: {self.current_turn}", True, self.TURN_COLOR)
+        coin_text = font_registry.render(self.info_font, f"金币: {self.coins}", self.COIN_COLOR, True)
+        turn_text = font_registry.render(self.info_font, f"回合: {self.current_turn}", self.TURN_COLOR, True)
         
         self.screen.blit(coin_text, (x + int(30 * self.scale_factor), y + int(70 * self.scale_factor)))
         self.screen.blit(turn_text, (x + int(30 * self.scale_factor), y + int(105 * self.scale_factor)))
@@ -189,20 +283,18 @@ class MessageBoard:
         )
         
         # 绘制当前消息标题
-        current_msg_title = self.info_font.render("当前消息:", True, self.HIGHLIGHT_COLOR)
+        current_msg_title = font_registry.render(self.info_font, "当前消息:", self.HIGHLIGHT_COLOR, True)
         self.screen.blit(current_msg_title, (x + int(30 * self.scale_factor), y + int(160 * self.scale_factor)))
         
-        # 绘制当前消息
-        if self.message:
-            max_text_width = self.width - int(60 * self.scale_factor)
-            lines = self.wrap_text(self.message, self.message_font, max_text_width)
-            
-            # 绘制消息的每一行
-            msg_y = y + int(195 * self.scale_factor)
-            for line in lines:
-                message_text = self.message_font.render(line, True, self.TEXT_COLOR)
-                self.screen.blit(message_text, (x + int(30 * self.scale_factor), msg_y))
-                msg_y += int(25 * self.scale_factor)
+        # 绘制当前消息（消息被直接修改而没有通过add_message时重新排版）
+        if self.message_layout is None or self.message_layout[0] != self.message:
+            self.message_layout = self.layout_message(self.message)
+        
+        # 绘制消息的每一行
+        msg_y = y + int(195 * self.scale_factor)
+        for message_text in self.message_layout[1]:
+            self.screen.blit(message_text, (x + int(30 * self.scale_factor), msg_y))
+            msg_y += int(25 * self.scale_factor)
         
         # 绘制第三条分隔线
         pygame.draw.line(
@@ -214,21 +306,14 @@ class MessageBoard:
         )
         
         # 绘制历史消息标题
-        history_title = self.info_font.render("历史消息:", True, self.HIGHLIGHT_COLOR)
+        history_title = font_registry.render(self.info_font, "历史消息:", self.HIGHLIGHT_COLOR, True)
         self.screen.blit(history_title, (x + int(30 * self.scale_factor), y + int(270 * self.scale_factor)))
         
-        # 绘制历史消息
+        # 绘制历史消息（历史记录被直接修改时重新排版）
+        if [layout[0] for layout in self.history_layouts] != self.message_history:
+            self.history_layouts = [self.layout_history(message) for message in self.message_history]
+        
         history_y = y + int(300 * self.scale_factor)
-        for i, message in enumerate(self.message_history):
-            # 对历史消息进行截断，确保不会太长
-            max_text_width = self.width - int(60 * self.scale_factor)
-            if self.history_font.size(message)[0] > max_text_width:
-                # 计算能显示多少字符
-                for j in range(len(message), 0, -1):
-                    if self.history_font.size(message[:j] + "...")[0] <= max_text_width:
-                        message = message[:j] + "..."
-                        break
-            
-            history_text = self.history_font.render(message, True, self.TEXT_COLOR)
+        for message, history_text in self.history_layouts:
             self.screen.blit(history_text, (x + int(30 * self.scale_factor), history_y))
             history_y += int(20 * self.scale_factor) 
\ No newline at end of file
@@ -1,4 +1,5 @@
 import pygame
+from src.components.Font.FontRegistry import font_registry
 
 class MessageBox:
     """消息盒子类，用于记录基本的游戏信息以及发生了什么"""
@@ -51,19 +52,19 @@ class MessageBox:
         pygame.draw.rect(self.screen, self.BORDER, (x, y, self.width, self.height), 2)
         
         # 创建字体
-        title_font = pygame.font.Font(None, int(30 * self.scale_factor))
-        info_font = pygame.font.Font(None, int(24 * self.scale_factor))
-        message_font = pygame.font.Font(None, int(20 * self.scale_factor))
+        title_font = font_registry.get_font(None, int(30 * self.scale_factor))
+        info_font = font_registry.get_font(None, int(24 * self.scale_factor))
+        message_font = font_registry.get_font(None, int(20 * self.scale_factor))
         
         # 绘制标题
-        title = title_font.render("Game Info", True, self.TEXT_COLOR)
+        title = font_registry.render(title_font, "Game Info", self.TEXT_COLOR, True)
         title_rect = title.get_rect(center=(x + self.width // 2, y + int(20 * self.scale_factor)))
         self.screen.blit(title, title_rect)
         
         # 绘制游戏基本信息
-        gold_text = info_font.render(f"Gold: {self.gold}", True, self.GOLD_COLOR)
-        round_text = info_font.render(f"Round: {self.round}", True, self.TEXT_COLOR)
-        reward_text = info_font.render(f"Rounds to Reward: {self.round_to_reward - (self.round % self.round_to_reward)}", True, self.TEXT_COLOR)
+        gold_text = font_registry.render(info_font, f"Gold: {self.gold}", self.GOLD_COLOR, True)
+        round_text = font_registry.render(info_font, f"Round: {self.round}", self.TEXT_COLOR, True)
+        reward_text = font_registry.render(info_font, f"Rounds to Reward: {self.round_to_reward - (self.round % self.round_to_reward)}", self.TEXT_COLOR, True)
         
         self.screen.blit(gold_text, (x + int(20 * self.scale_factor), y + int(50 * self.scale_factor)))
         self.screen.blit(round_text, (x + int(20 * self.scale_factor), y + int(80 * self.scale_factor)))
@@ -79,13 +80,13 @@ class MessageBox:
         )
         
         # 绘制消息标题
-        message_title = info_font.render("Messages:", True, self.TEXT_COLOR)
+        message_title = font_registry.render(info_font, "Messages:", self.TEXT_COLOR, True)
         self.screen.blit(message_title, (x + int(20 * self.scale_factor), y + int(150 * self.scale_factor)))
         
         # 绘制消息列表
         message_y = y + int(180 * self.scale_factor)
         for message in self.messages[-self.max_messages:]:  # 只显示最后max_messages条消息
-            message_text = message_font.render(message, True, self.TEXT_COLOR)
+            message_text = font_registry.render(message_font, message, self.TEXT_COLOR, True)
             self.screen.blit(message_text, (x + int(20 * self.scale_factor), message_y))
             message_y += int(15 * self.scale_factor)
     
@@ -0,0 +1,89 @@
+import pygame
+
+class DirtyRectRenderer:
+    """
+    脏矩形渲染器
+
+    每帧向注册的组件收集发生变化的屏幕区域（组件需实现get_dirty_rects方法），
+    只在有变化时重绘，并通过pygame.display.update(rects)只提交变化的区域。
+    没有任何变化的帧直接跳过绘制。关闭时退化为每帧全屏重绘并flip。
+    """
+    def __init__(self, screen, enabled=True):
+        """
+        初始化渲染器
+
+        参数:
+            screen: pygame屏幕对象
+            enabled (bool): 是否启用脏矩形模式，False时每帧全屏重绘
+        """
+        self.screen = screen
+        self.enabled = enabled
+        self.sources = []  # 提供get_dirty_rects方法的组件
+        self.pending_rects = []  # 主循环额外标记的脏区域
+        self.full_redraw = True  # 第一帧需要全屏绘制
+        self.frame_rects = []  # 当前帧需要提交的区域
+
+        # 统计信息
+        self.frames_drawn = 0
+        self.frames_skipped = 0
+
+    def add_source(self, component):
+        """注册一个会报告脏区域的组件"""
+        self.sources.append(component)
+
+    def add_rect(self, rect):
+        """标记一个需要重绘的屏幕区域"""
+        if rect:
+            self.pending_rects.append(pygame.Rect(rect))
+
+    def invalidate_all(self):
+        """下一帧全屏重绘（例如分辨率改变后）"""
+        self.full_redraw = True
+
+    def begin_frame(self):
+        """
+        收集本帧的脏区域并设置裁剪区域
+
+        返回:
+            bool: 本帧是否需要绘制
+        """
+        rects = self.pending_rects
+        self.pending_rects = []
+        for source in self.sources:
+            rects.extend(source.get_dirty_rects())
+
+        if not self.enabled or self.full_redraw:
+            self.full_redraw = False
+            self.frame_rects = None
+            self.screen.set_clip(None)
+            self.frames_drawn += 1
+            return True
+
+        screen_rect = self.screen.get_rect()
+        rects = [rect.clip(screen_rect) for rect in rects]
+        rects = [rect for rect in rects if rect.width > 0 and rect.height > 0]
+        if not rects:
+            self.frames_skipped += 1
+            return False
+
+        self.frame_rects = rects
+        # 所有组件在合并后的区域内重绘，区域外的像素保持不变
+        self.screen.set_clip(rects[0].unionall(rects[1:]))
+        self.frames_drawn += 1
+        return True
+
+    def end_frame(self):
+        """提交本帧绘制的内容到显示窗口"""
+        self.screen.set_clip(None)
+        if self.frame_rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.frame_rects)
+        self.frame_rects = []
+
+    def get_stats(self):
+        """获取渲染统计信息"""
+        return {
+            'frames_drawn': self.frames_drawn,
+            'frames_skipped': self.frames_skipped
+        }
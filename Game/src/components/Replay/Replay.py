@@ -0,0 +1,554 @@
+"""
+事件溯源的对局录像
+
+游戏中的每一次状态改变都记录为一条紧凑的二进制事件：容器格子的改变（棋盘、背包、奖励盒子之间的拖放）、
+棋子属性的改变、物品的使用、攻击、路径网格上的移动、回合和金币，以及对象被回收。
+每隔N个回合写入一个关键帧（完整的状态快照）。
+
+回放时不需要pygame：ReplayState只保存棋子的数值和各容器的格子，跳转到某个回合时
+从最近的关键帧开始，只重放它之后的事件，不播放动画。
+
+文件格式（小端）:
+    文件头 "<4sH": 魔数 b"AGRP"、版本
+    每条记录 "<BH": 事件类型、数据长度（为0xFFFF时后面再跟一个"<I"的实际长度），接着是数据
+    正常关闭时在末尾写入索引记录（关键帧的回合和文件偏移）和文件尾 "<4sQ": b"AGRX"、索引记录的偏移；
+    没有文件尾（例如游戏崩溃）时按顺序扫描记录重建索引，末尾不完整的记录被忽略。
+"""
+import bisect
+import struct
+import weakref
+from src.components.Battle.BattleEngine import BattlePiece
+
+MAGIC = b"AGRP"
+VERSION = 2
+HEADER = struct.Struct("<4sH")
+RECORD = struct.Struct("<BH")
+LONG_LENGTH = struct.Struct("<I")
+TRAILER = struct.Struct("<4sQ")
+TRAILER_MAGIC = b"AGRX"
+
+# 事件类型
+EVENT_SPAWN = 1        # 新的棋子或物品: "<IBiiB" 编号、种类、攻击力、生命值、是否融合，然后是职业和能力文本
+EVENT_CELL = 2         # 容器格子改变: "<BBBI" 容器、行、列、编号（0表示空）
+EVENT_STATS = 3        # 属性改变: "<Iii" 编号、攻击力、生命值
+EVENT_ITEM_APPLY = 4   # 使用物品: "<II" 物品编号、棋子编号
+EVENT_ATTACK = 5       # 攻击（只用于查看，状态改变由之后的属性和格子事件记录）: "<BBBBBBi"
+EVENT_PATH = 6         # 路径网格格子占用: "<IBB" 列、行、是否占用
+EVENT_TURN = 7         # 新的回合: "<I"
+EVENT_COINS = 8        # 金币数量: "<i"
+EVENT_KEYFRAME = 9     # 关键帧: 完整的状态快照
+EVENT_INDEX = 10       # 索引: 关键帧数量，然后每项 "<IQ" 回合、偏移
+EVENT_REMOVE = 11      # 棋子或物品被回收，之后不再出现: "<I" 编号
+
+EVENT_NAMES = {
+    EVENT_SPAWN: "spawn", EVENT_CELL: "cell", EVENT_STATS: "stats", EVENT_ITEM_APPLY: "item",
+    EVENT_ATTACK: "attack", EVENT_PATH: "path", EVENT_TURN: "turn", EVENT_COINS: "coins",
+    EVENT_KEYFRAME: "keyframe", EVENT_INDEX: "index", EVENT_REMOVE: "remove"
+}
+
+# 实体种类
+KIND_PIECE = 0
+KIND_ITEM = 1
+
+SPAWN = struct.Struct("<IBiiB")
+CELL = struct.Struct("<BBBI")
+STATS = struct.Struct("<Iii")
+ITEM_APPLY = struct.Struct("<II")
+ATTACK = struct.Struct("<BBBBBBi")
+PATH = struct.Struct("<IBB")
+TURN = struct.Struct("<I")
+COINS = struct.Struct("<i")
+COUNT = struct.Struct("<I")
+KEYFRAME_HEADER = struct.Struct("<Ii")
+INDEX_ENTRY = struct.Struct("<IQ")
+REMOVE = struct.Struct("<I")
+TEXT_LENGTH = struct.Struct("<H")
+
+def pack_text(text):
+    """文本编码为 长度 + UTF-8"""
+    data = (text or "").encode("utf-8")
+    return TEXT_LENGTH.pack(len(data)) + data
+
+def unpack_text(data, offset):
+    """读取文本，返回 (文本, 新的偏移)"""
+    (length,) = TEXT_LENGTH.unpack_from(data, offset)
+    offset += TEXT_LENGTH.size
+    return data[offset:offset + length].decode("utf-8"), offset + length
+
+class ReplayEntity:
+    """
+    回放中的棋子或物品，只保存数值
+    """
+    __slots__ = ("kind", "attack", "lifepoint", "is_fusion", "job", "ability")
+
+    def __init__(self, kind, attack, lifepoint, is_fusion, job, ability):
+        self.kind = kind
+        self.attack = attack
+        self.lifepoint = lifepoint
+        self.is_fusion = is_fusion
+        self.job = job
+        self.ability = ability
+
+    def pack(self, entity_id):
+        """编码为SPAWN事件的数据"""
+        return SPAWN.pack(entity_id, self.kind, self.attack, self.lifepoint, int(self.is_fusion)) \
+            + pack_text(self.job) + pack_text(self.ability)
+
+    @staticmethod
+    def unpack(data, offset=0):
+        """从SPAWN事件的数据解码，返回 (编号, 实体, 新的偏移)"""
+        entity_id, kind, attack, lifepoint, is_fusion = SPAWN.unpack_from(data, offset)
+        job, offset = unpack_text(data, offset + SPAWN.size)
+        ability, offset = unpack_text(data, offset)
+        return entity_id, ReplayEntity(kind, attack, lifepoint, bool(is_fusion), job, ability), offset
+
+class ReplayState:
+    """
+    不依赖pygame的游戏状态：实体数值、各容器的格子、路径网格上被占用的格子、回合和金币
+    """
+
+    def __init__(self):
+        self.entities = {}    # 编号 -> ReplayEntity
+        self.containers = {}  # 容器编号 -> {(行, 列): 实体编号}
+        self.path = set()     # 被占用的 (列, 行)
+        self.turn = 1
+        self.coins = 0
+        self.last_attack = None
+
+    def apply(self, event, data):
+        """应用一条事件"""
+        if event == EVENT_CELL:
+            container, row, col, entity_id = CELL.unpack(data)
+            cells = self.containers.setdefault(container, {})
+            if entity_id:
+                cells[(row, col)] = entity_id
+            else:
+                cells.pop((row, col), None)
+        elif event == EVENT_STATS:
+            entity_id, attack, lifepoint = STATS.unpack(data)
+            entity = self.entities[entity_id]
+            entity.attack, entity.lifepoint = attack, lifepoint
+        elif event == EVENT_SPAWN:
+            entity_id, entity, offset = ReplayEntity.unpack(data)
+            self.entities[entity_id] = entity
+        elif event == EVENT_ITEM_APPLY:
+            item_id, piece_id = ITEM_APPLY.unpack(data)
+            item, piece = self.entities[item_id], self.entities[piece_id]
+            piece.attack += item.attack
+            piece.lifepoint += item.lifepoint
+            if item.ability:
+                piece.ability = f"{piece.ability}, {item.ability}" if piece.ability else item.ability
+        elif event == EVENT_PATH:
+            col, row, occupied = PATH.unpack(data)
+            if occupied:
+                self.path.add((col, row))
+            else:
+                self.path.discard((col, row))
+        elif event == EVENT_TURN:
+            (self.turn,) = TURN.unpack(data)
+        elif event == EVENT_COINS:
+            (self.coins,) = COINS.unpack(data)
+        elif event == EVENT_ATTACK:
+            self.last_attack = ATTACK.unpack(data)
+        elif event == EVENT_KEYFRAME:
+            self.load_keyframe(data)
+        elif event == EVENT_REMOVE:
+            (entity_id,) = REMOVE.unpack(data)
+            self.entities.pop(entity_id, None)
+
+    def pack_keyframe(self):
+        """编码为关键帧数据"""
+        parts = [KEYFRAME_HEADER.pack(self.turn, self.coins), COUNT.pack(len(self.entities))]
+        parts.extend(entity.pack(entity_id) for entity_id, entity in sorted(self.entities.items()))
+        parts.append(COUNT.pack(len(self.containers)))
+        for container, cells in sorted(self.containers.items()):
+            parts.append(COUNT.pack(len(cells)))
+            parts.extend(CELL.pack(container, row, col, entity_id) for (row, col), entity_id in sorted(cells.items()))
+        parts.append(COUNT.pack(len(self.path)))
+        parts.extend(PATH.pack(col, row, 1) for col, row in sorted(self.path))
+        return b"".join(parts)
+
+    def load_keyframe(self, data):
+        """从关键帧数据恢复（替换当前状态）"""
+        self.turn, self.coins = KEYFRAME_HEADER.unpack_from(data, 0)
+        offset = KEYFRAME_HEADER.size
+        (count,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        self.entities = {}
+        for _ in range(count):
+            entity_id, entity, offset = ReplayEntity.unpack(data, offset)
+            self.entities[entity_id] = entity
+        (count,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        self.containers = {}
+        for _ in range(count):
+            (cell_count,) = COUNT.unpack_from(data, offset)
+            offset += COUNT.size
+            for _ in range(cell_count):
+                container, row, col, entity_id = CELL.unpack_from(data, offset)
+                offset += CELL.size
+                self.containers.setdefault(container, {})[(row, col)] = entity_id
+        (count,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        self.path = set()
+        for _ in range(count):
+            col, row, occupied = PATH.unpack_from(data, offset)
+            offset += PATH.size
+            self.path.add((col, row))
+
+    def summary(self):
+        """
+        状态的可比较表示：各容器格子上实体的 (种类, 攻击力, 生命值, 职业, 能力)、路径、回合和金币
+        """
+        containers = {}
+        for container, cells in self.containers.items():
+            entities = {}
+            for cell, entity_id in cells.items():
+                entity = self.entities[entity_id]
+                entities[cell] = (entity.kind, entity.attack, entity.lifepoint, entity.job, entity.ability)
+            if entities:
+                containers[container] = entities
+        return {'turn': self.turn, 'coins': self.coins, 'containers': containers, 'path': sorted(self.path)}
+
+class ReplayRecorder:
+    """
+    录像记录器，游戏中的各个组件在状态改变时调用对应的record_*方法；没有开始录像时这些方法什么也不做
+
+    记录器只保存实体的弱引用，不会阻止棋子和物品被回收（回收时归还实体存储中的编号和图片）。
+    实体被回收时先记下它的编号，在写入下一条记录之前补写REMOVE事件，避免在写入其他记录的中途写文件。
+    """
+
+    def __init__(self):
+        self.file = None
+        self.keyframe_interval = 10
+        self.containers = {}     # id(容器) -> (容器编号, 容器)
+        self.path_grid = None
+        self.message_board = None
+        self.entity_ids = {}     # id(实体) -> 编号（实体被回收时立即删除，id可能被新对象复用）
+        self.entities = {}       # 编号 -> 实体的弱引用
+        self.finalizers = {}     # 编号 -> weakref.finalize
+        self.collected = []      # 已被回收、还没有写入REMOVE事件的编号
+        self.next_entity_id = 1
+        self.last_stats = {}     # 编号 -> 上一次记录的 (攻击力, 生命值)
+        self.keyframes = []      # [(回合, 偏移)]
+        self.event_count = 0
+
+    def start(self, path, containers, path_grid=None, message_board=None, keyframe_interval=10):
+        """
+        开始录像，并写入当前状态作为第一个关键帧
+
+        参数:
+            path (str): 录像文件路径
+            containers (list): 要记录的容器（棋盘、背包、奖励盒子），按顺序编号为0, 1, 2...
+            path_grid (PathGrid): 路径网格
+            message_board (MessageBoard): 消息板（回合和金币）
+            keyframe_interval (int): 每隔多少个回合写入一个关键帧
+        """
+        self.stop()
+        self.containers = {id(container): (index, container) for index, container in enumerate(containers)}
+        self.path_grid = path_grid
+        self.message_board = message_board
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.last_stats = {}
+        self.keyframes = []
+        self.event_count = 0
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION))
+        self.write_keyframe()
+
+    def stop(self):
+        """结束录像，写入索引和文件尾"""
+        if self.file is None:
+            return
+        # 先写入的REMOVE事件在索引记录之前，文件尾指向索引记录本身
+        index_offset = self._write(EVENT_INDEX, COUNT.pack(len(self.keyframes))
+                                   + b"".join(INDEX_ENTRY.pack(turn, offset) for turn, offset in self.keyframes))
+        self.file.write(TRAILER.pack(TRAILER_MAGIC, index_offset))
+        self.file.close()
+        self.file = None
+        self._forget_entities()
+
+    def _forget_entities(self):
+        """不再跟踪任何实体（结束录像时）"""
+        for finalizer in self.finalizers.values():
+            finalizer.detach()
+        self.entity_ids = {}
+        self.entities = {}
+        self.finalizers = {}
+        self.collected = []
+        self.next_entity_id = 1
+
+    def _on_collected(self, entity_id, object_id):
+        """实体被回收（可能在任何时候被调用，只做最少的工作）"""
+        self.entity_ids.pop(object_id, None)
+        self.collected.append(entity_id)
+
+    def _write_removals(self):
+        """为已被回收的实体写入REMOVE事件"""
+        while self.collected:
+            entity_id = self.collected.pop(0)
+            self.entities.pop(entity_id, None)
+            self.finalizers.pop(entity_id, None)
+            self.last_stats.pop(entity_id, None)
+            self._write_record(EVENT_REMOVE, REMOVE.pack(entity_id))
+
+    def is_recording(self):
+        """是否正在录像"""
+        return self.file is not None
+
+    def _write(self, event, data):
+        """
+        写入一条记录（先补写已被回收的实体）
+
+        返回:
+            int: 这条记录在文件中的偏移（在补写的REMOVE事件之后）
+        """
+        if self.collected:
+            self._write_removals()
+        return self._write_record(event, data)
+
+    def _write_record(self, event, data):
+        """把一条记录写入文件，返回它的偏移"""
+        offset = self.file.tell()
+        if len(data) < 0xFFFF:
+            self.file.write(RECORD.pack(event, len(data)))
+        else:
+            self.file.write(RECORD.pack(event, 0xFFFF) + LONG_LENGTH.pack(len(data)))
+        self.file.write(data)
+        self.event_count += 1
+        return offset
+
+    def _entity_id(self, entity, announce=True):
+        """
+        获取实体编号
+
+        参数:
+            entity: 棋子或物品
+            announce (bool): 第一次出现的实体是否写入SPAWN事件（写入关键帧时不需要）
+        """
+        entity_id = self.entity_ids.get(id(entity))
+        if entity_id is None:
+            entity_id = self.next_entity_id
+            self.next_entity_id += 1
+            self.entity_ids[id(entity)] = entity_id
+            self.entities[entity_id] = weakref.ref(entity)
+            finalizer = self.finalizers[entity_id] = weakref.finalize(entity, self._on_collected, entity_id, id(entity))
+            finalizer.atexit = False
+            if announce:
+                self._write(EVENT_SPAWN, self._snapshot_entity(entity).pack(entity_id))
+            self.last_stats[entity_id] = (entity.attack, entity.lifepoint)
+        return entity_id
+
+    @staticmethod
+    def _snapshot_entity(entity):
+        """读取实体的当前数值"""
+        if isinstance(entity, BattlePiece):
+            return ReplayEntity(KIND_PIECE, entity.attack, entity.lifepoint, entity.isFusion,
+                                entity.job, getattr(entity, "ability", ""))
+        return ReplayEntity(KIND_ITEM, entity.attack, entity.lifepoint, False, "", entity.ability)
+
+    def capture(self):
+        """
+        从游戏对象读取当前的完整状态
+
+        返回:
+            ReplayState: 状态快照（包含录像中出现过、还没有被回收的所有实体，包括正在被拖拽的）
+        """
+        if self.collected:
+            self._write_removals()
+        state = ReplayState()
+        for index, container in self.containers.values():
+            cells = state.containers.setdefault(index, {})
+            for row, line in enumerate(container.grid):
+                for col, entity in enumerate(line):
+                    if entity is not None:
+                        cells[(row, col)] = self._entity_id(entity, announce=False)
+        for entity_id, reference in list(self.entities.items()):
+            entity = reference()
+            if entity is not None:
+                state.entities[entity_id] = self._snapshot_entity(entity)
+        if self.path_grid is not None:
+            state.path.update(self.path_grid.occupied_cells())
+        if self.message_board is not None:
+            state.turn = self.message_board.current_turn
+            state.coins = self.message_board.coins
+        return state
+
+    def write_keyframe(self):
+        """写入当前状态的关键帧"""
+        state = self.capture()
+        self.keyframes.append((state.turn, self._write(EVENT_KEYFRAME, state.pack_keyframe())))
+        self.file.flush()
+        for entity_id, entity in state.entities.items():
+            self.last_stats[entity_id] = (entity.attack, entity.lifepoint)
+
+    def record_cell(self, container, row, col, entity):
+        """容器格子的内容改变"""
+        if self.file is None:
+            return
+        registered = self.containers.get(id(container))
+        if registered is None:
+            return
+        entity_id = self._entity_id(entity) if entity is not None else 0
+        self._write(EVENT_CELL, CELL.pack(registered[0], row, col, entity_id))
+
+    def record_stats(self, entity):
+        """实体的攻击力或生命值可能改变（只记录真正改变的）"""
+        if self.file is None:
+            return
+        entity_id = self.entity_ids.get(id(entity))
+        if entity_id is None:
+            return
+        stats = (entity.attack, entity.lifepoint)
+        if self.last_stats.get(entity_id) != stats:
+            self.last_stats[entity_id] = stats
+            self._write(EVENT_STATS, STATS.pack(entity_id, *stats))
+
+    def record_item_applied(self, item, piece):
+        """物品已经应用到棋子上（在棋子通知属性改变之前调用）"""
+        if self.file is None:
+            return
+        item_id, piece_id = self._entity_id(item), self._entity_id(piece)
+        self._write(EVENT_ITEM_APPLY, ITEM_APPLY.pack(item_id, piece_id))
+        self.last_stats[piece_id] = (piece.attack, piece.lifepoint)
+
+    def record_attack(self, attacker_board, row, col, target_board, target_row, target_col, damage):
+        """发起一次攻击"""
+        if self.file is None:
+            return
+        attacker = self.containers.get(id(attacker_board))
+        target = self.containers.get(id(target_board))
+        if attacker is None or target is None:
+            return
+        self._write(EVENT_ATTACK, ATTACK.pack(attacker[0], row, col, target[0], target_row, target_col, damage))
+
+    def record_path(self, col, row, occupied):
+        """路径网格格子的占用状态改变"""
+        if self.file is None:
+            return
+        self._write(EVENT_PATH, PATH.pack(col, row, int(occupied)))
+
+    def record_turn(self, turn):
+        """进入新的回合，每隔keyframe_interval个回合写入关键帧"""
+        if self.file is None:
+            return
+        self._write(EVENT_TURN, TURN.pack(turn))
+        if turn % self.keyframe_interval == 0:
+            self.write_keyframe()
+        else:
+            # 每个回合都写到磁盘，游戏崩溃时录像最多只丢失当前回合
+            self.file.flush()
+
+    def record_coins(self, coins):
+        """金币数量改变"""
+        if self.file is None:
+            return
+        self._write(EVENT_COINS, COINS.pack(coins))
+
+class ReplayReader:
+    """
+    读取录像文件，支持跳转到任意回合
+    """
+
+    def __init__(self, path):
+        """
+        打开录像文件并读取关键帧索引
+
+        参数:
+            path (str): 录像文件路径
+        """
+        with open(path, "rb") as file:
+            self.data = file.read()
+        if len(self.data) < HEADER.size:
+            raise ValueError(f"不是有效的录像文件: {path}")
+        magic, version = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"不是有效的录像文件: {path}")
+        self.end = len(self.data)
+        self.keyframes = self._read_index()
+
+    def _read_index(self):
+        """从文件尾读取索引；没有文件尾或文件尾没有指向索引记录时扫描全部记录"""
+        data = self.data
+        if len(data) >= HEADER.size + TRAILER.size:
+            magic, index_offset = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+            if magic == TRAILER_MAGIC:
+                record = self._read_record(index_offset) if HEADER.size <= index_offset else None
+                if record is not None and record[0] == EVENT_INDEX and len(record[1]) >= COUNT.size:
+                    payload = record[1]
+                    (count,) = COUNT.unpack_from(payload, 0)
+                    if len(payload) == COUNT.size + count * INDEX_ENTRY.size:
+                        self.end = index_offset
+                        return [INDEX_ENTRY.unpack_from(payload, COUNT.size + i * INDEX_ENTRY.size)
+                                for i in range(count)]
+                # 文件尾没有指向有效的索引记录，扫描到文件尾之前
+                self.end = len(data) - TRAILER.size
+        keyframes = []
+        for offset, event, payload in self.records(HEADER.size):
+            if event == EVENT_KEYFRAME:
+                keyframes.append((KEYFRAME_HEADER.unpack_from(payload, 0)[0], offset))
+        return keyframes
+
+    def _read_record(self, offset):
+        """
+        读取一条记录
+
+        返回:
+            tuple: (事件类型, 数据, 下一条记录的偏移)，记录不完整时返回None
+        """
+        data = self.data
+        if offset + RECORD.size > len(data):
+            return None
+        event, length = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        if length == 0xFFFF:
+            if offset + LONG_LENGTH.size > len(data):
+                return None
+            (length,) = LONG_LENGTH.unpack_from(data, offset)
+            offset += LONG_LENGTH.size
+        if offset + length > len(data):
+            return None
+        return event, data[offset:offset + length], offset + length
+
+    def records(self, offset=None):
+        """
+        按顺序遍历记录
+
+        返回:
+            generator: (偏移, 事件类型, 数据)
+        """
+        offset = HEADER.size if offset is None else offset
+        while offset < self.end:
+            record = self._read_record(offset)
+            if record is None:
+                return
+            event, payload, next_offset = record
+            yield offset, event, payload
+            offset = next_offset
+
+    def seek(self, turn):
+        """
+        获取某个回合结束时（下一回合开始之前）的状态：从不晚于该回合的最近关键帧开始重放
+
+        返回:
+            ReplayState: 该回合的状态
+        """
+        index = bisect.bisect_right([keyframe_turn for keyframe_turn, offset in self.keyframes], turn) - 1
+        offset = self.keyframes[max(index, 0)][1]
+        state = ReplayState()
+        for record_offset, event, payload in self.records(offset):
+            if event == EVENT_TURN and TURN.unpack(payload)[0] > turn:
+                break
+            state.apply(event, payload)
+        return state
+
+    def last_turn(self):
+        """录像中的最后一个回合"""
+        turn = self.keyframes[-1][0] if self.keyframes else 1
+        for offset, event, payload in self.records(self.keyframes[-1][1] if self.keyframes else None):
+            if event == EVENT_TURN:
+                turn = TURN.unpack(payload)[0]
+        return turn
+
+# 全局录像记录器
+replay_recorder = ReplayRecorder()
@@ -1,6 +1,9 @@
 import pygame
 from src.components.Chess.ChessPiece import ChessPiece
 from src.components.Item.Item import Item
+from src.components.Font.FontRegistry import font_registry
+from src.components.Replay.Replay import replay_recorder
+from src.components.Entity.RenderSystem import render_system
 
 class RewardBox:
     """奖励盒子类，用于存储游戏奖励的物品和棋子"""
@@ -42,40 +45,96 @@ class RewardBox:
         self.dragging = False
         self.dragged_piece = None
         self.original_position = None
+        
+        # 版本号，奖励盒子内容（放置、移除、拖动、属性变化）改变时增加
+        self.version = 0
+        # 缓存的面板及其对应的 (版本号, 格子大小, 缩放比例)
+        self.panel = None
+        self.panel_key = None
+        
+        # 脏矩形渲染相关：上一次报告时的状态
+        self.last_dirty_state = None
     
-    def draw(self):
-        """绘制奖励盒子"""
+    def invalidate(self):
+        """奖励盒子内容改变时调用，增加版本号使缓存的面板在下次绘制时重建"""
+        self.version += 1
+    
+    def render_panel(self):
+        """将奖励盒子标题、背景、网格线以及其中的物品和棋子绘制到离屏面板上，面板区域与get_rect一致"""
+        rect = self.get_rect()
+        panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            panel = panel.convert_alpha()
+        
+        # 奖励盒子左上角在面板中的位置
+        x, y = self.position[0] - rect.x, self.position[1] - rect.y
+        
         # 绘制奖励盒子标题
-        font = pygame.font.Font(None, int(36 * self.scale_factor))
-        title = font.render("奖励盒子", True, self.BLACK)
-        title_rect = title.get_rect(center=(self.position[0] + self.width // 2, self.position[1] - int(30 * self.scale_factor)))
-        self.screen.blit(title, title_rect)
+        font = font_registry.get_font(None, int(36 * self.scale_factor))
+        title = font_registry.render(font, "奖励盒子", self.BLACK, True)
+        title_rect = title.get_rect(center=(x + self.width // 2, y - int(30 * self.scale_factor)))
+        panel.blit(title, title_rect)
         
         # 绘制奖励盒子背景
-        x, y = self.position
-        pygame.draw.rect(self.screen, self.GOLD, pygame.Rect(x, y, self.width, self.height))
-        pygame.draw.rect(self.screen, self.BLACK, pygame.Rect(x, y, self.width, self.height), max(1, int(2 * self.scale_factor)))
+        pygame.draw.rect(panel, self.GOLD, pygame.Rect(x, y, self.width, self.height))
+        pygame.draw.rect(panel, self.BLACK, pygame.Rect(x, y, self.width, self.height), max(1, int(2 * self.scale_factor)))
         
         # 绘制网格线
         for j in range(1, self.cols):
             # 垂直线
             pygame.draw.line(
-                self.screen, 
+                panel, 
                 self.BLACK, 
                 (x + j * self.grid_size, y), 
                 (x + j * self.grid_size, y + self.height), 
                 max(1, int(1 * self.scale_factor))
             )
         
-        # 绘制格子中的棋子和物品
-        for row in range(self.rows):
-            for col in range(self.cols):
-                piece = self.grid[row][col]
-                if piece:
-                    if isinstance(piece, ChessPiece):
-                        piece.draw(self.screen, self.position, self.grid_size)
-                    elif isinstance(piece, Item):
-                        piece.draw(self.screen, self.position, self.grid_size)
+        # 绘制格子中的物品和棋子：按行优先顺序一次交给渲染系统
+        pieces = [piece for line in self.grid for piece in line if isinstance(piece, (ChessPiece, Item))]
+        render_system.draw(panel, pieces, (x, y), self.grid_size, self.scale_factor)
+        
+        return panel
+    
+    def draw(self):
+        """绘制奖励盒子"""
+        # 版本号或布局改变时重建面板，否则直接使用缓存的面板
+        panel_key = (self.version, self.grid_size, self.scale_factor)
+        if self.panel is None or self.panel_key != panel_key:
+            self.panel = self.render_panel()
+            self.panel_key = panel_key
+        self.screen.blit(self.panel, self.get_rect())
+    
+    def get_rect(self):
+        """获取奖励盒子在屏幕上占据的区域（包括上方的标题和格子下方溢出的属性文字）"""
+        x, y = self.position
+        title_height = int(50 * self.scale_factor)
+        margin = int(20 * self.scale_factor)
+        return pygame.Rect(x - margin, y - title_height, self.width + margin * 2, self.height + title_height + margin)
+    
+    def get_hit_rect(self):
+        """获取格子所在的点击区域（与get_grid_position一致，包括右边和下边的边界）"""
+        x, y = self.position
+        return pygame.Rect(x, y, self.width + 1, self.height + 1)
+    
+    def get_dirty_rects(self):
+        """
+        返回自上次调用以来发生变化的屏幕区域
+        
+        返回:
+            list: 需要重绘的pygame.Rect列表
+        """
+        state = (self.position, self.version)
+        if state == self.last_dirty_state:
+            return []
+        
+        rects = [self.get_rect()]
+        # 位置改变时，旧位置也需要重绘
+        if self.last_dirty_state and self.last_dirty_state[0] != self.position:
+            old_x, old_y = self.last_dirty_state[0]
+            rects.append(self.get_rect().move(old_x - self.position[0], old_y - self.position[1]))
+        self.last_dirty_state = state
+        return rects
     
     def get_grid_position(self, mouse_pos):
         """根据鼠标位置返回对应的网格坐标"""
@@ -104,7 +163,7 @@ class RewardBox:
                 self.dragging = True
                 self.dragged_piece = piece
                 self.original_position = (row, col)
-                self.grid[row][col] = None
+                self.set_cell(row, col, None)
                 return True
         return False
     
@@ -119,20 +178,17 @@ class RewardBox:
             new_row, new_col = new_pos
             if self.grid[new_row][new_col] is None:
                 # 移动到奖励盒子新位置
-                self.grid[new_row][new_col] = self.dragged_piece
-                self.dragged_piece.set_position(new_row, new_col)
+                self.set_cell(new_row, new_col, self.dragged_piece)
             else:
                 # 如果目标位置有物品/棋子，恢复原位
                 if self.original_position:
                     orig_row, orig_col = self.original_position
-                    self.grid[orig_row][orig_col] = self.dragged_piece
-                    self.dragged_piece.set_position(orig_row, orig_col)
+                    self.set_cell(orig_row, orig_col, self.dragged_piece)
         else:
             # 如果拖到奖励盒子外，恢复原位
             if self.original_position:
                 orig_row, orig_col = self.original_position
-                self.grid[orig_row][orig_col] = self.dragged_piece
-                self.dragged_piece.set_position(orig_row, orig_col)
+                self.set_cell(orig_row, orig_col, self.dragged_piece)
         
         # 重置拖拽状态
         result = self.dragged_piece
@@ -154,8 +210,7 @@ class RewardBox:
         for row in range(self.rows):
             for col in range(self.cols):
                 if self.grid[row][col] is None:
-                    self.grid[row][col] = item
-                    item.set_position(row, col)
+                    self.set_cell(row, col, item)
                     return True
         return False  # 奖励盒子已满
     
@@ -171,11 +226,31 @@ class RewardBox:
             bool: 放置成功返回True，否则返回False
         """
         if 0 <= row < self.rows and 0 <= col < self.cols and self.grid[row][col] is None:
-            self.grid[row][col] = item
-            item.set_position(row, col)
+            self.set_cell(row, col, item)
             return True
         return False
     
+    def prepare_sprite(self, piece):
+        """放置物品或棋子时预先生成缩放后的图片，避免绘制时缩放"""
+        if isinstance(piece, ChessPiece):
+            piece.prepare_sprite(self.scale_factor)
+        elif isinstance(piece, Item):
+            piece.prepare_sprite(self.grid_size)
+    
+    def set_cell(self, row, col, piece):
+        """
+        直接设置指定格子的内容（可以为None），并使奖励盒子面板失效
+        
+        所有对grid的修改都应通过此方法，包括跨容器的拖放
+        """
+        self.grid[row][col] = piece
+        if piece is not None:
+            piece.container = self
+            piece.set_position(row, col)
+            self.prepare_sprite(piece)
+        self.invalidate()
+        replay_recorder.record_cell(self, row, col, piece)
+    
     def remove_item(self, row, col):
         """移除指定位置的物品或棋子
         
@@ -188,7 +263,9 @@ class RewardBox:
         """
         if 0 <= row < self.rows and 0 <= col < self.cols:
             item = self.grid[row][col]
-            self.grid[row][col] = None
+            self.set_cell(row, col, None)
+            if item is not None and item.container is self:
+                item.container = None
             return item
         return None
     
@@ -0,0 +1,582 @@
+"""
+存档和自动存档
+
+存档保存两个棋盘、背包、奖励盒子的内容，路径网格的格子状态，消息板的金币、回合和消息，以及玩家的位置。
+图片不保存像素，只保存资源编号：存档中有一张资源表（相对于项目根目录的图片路径），棋子和物品引用表中的编号。
+
+状态分为若干段（每个容器一段、路径网格、消息板、玩家位置、资源表），每段独立编码，
+自动存档时只写入改变了的段：
+
+    快照文件(.agsv): 文件头 + 所有段，先写入临时文件再替换，任何时候都是完整的
+    预写日志(.agwal): 文件头 + 快照之后改变的段，按顺序追加，每条记录带CRC32
+
+读取时先读快照，再按顺序应用日志中的记录，遇到不完整或校验失败的记录（写入时崩溃）就停止。
+日志的文件头记录它对应的快照代数，压缩（把当前状态写成新的快照并清空日志）时代数加一，
+所以压缩中途崩溃留下的旧日志会被忽略。
+
+主线程每隔一段时间读取一次游戏状态（只生成元组并与上一次比较），编码和写入都在后台线程中完成，
+存档不会造成卡顿。
+
+文件格式（小端）:
+    文件头 "<4sHI": 魔数（快照 b"AGSV"，日志 b"AGWL"）、版本、快照代数
+    每条记录 "<BBII": 段类型、子编号（容器编号）、数据长度、CRC32，接着是数据
+"""
+import os
+import sys
+import time
+import zlib
+import queue
+import struct
+import threading
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.components.Chess.ChessPiece import ChessPiece
+from src.components.Item.Item import Item
+from src.components.Grid.PathGrid import OCCUPIED, HIGHLIGHT
+from src.components.Replay.Replay import pack_text, unpack_text, KIND_PIECE, KIND_ITEM
+
+SNAPSHOT_MAGIC = b"AGSV"
+WAL_MAGIC = b"AGWL"
+VERSION = 2
+HEADER = struct.Struct("<4sHI")
+RECORD = struct.Struct("<BBII")
+
+# 段类型
+SECTION_ASSETS = 1      # 资源表: "<H" 数量，然后是每个图片路径
+SECTION_CONTAINER = 2   # 容器: "<BBH" 行数、列数、格子数，然后每个格子 "<BB" 行、列 + 实体
+SECTION_PATH = 3        # 路径网格: "<IH" 窗口第一列、格子数，然后每个格子 "<IBB" 列、行、标志（1占用，2高亮）
+SECTION_MESSAGES = 4    # 消息板: "<iI" 金币、回合，当前消息，"<H" 历史消息数量，然后是每条历史消息
+SECTION_PLAYER = 5      # 玩家位置: "<ii" 列、行（没有位置时为-1）
+
+SECTION_NAMES = {
+    SECTION_ASSETS: "assets", SECTION_CONTAINER: "container", SECTION_PATH: "path",
+    SECTION_MESSAGES: "messages", SECTION_PLAYER: "player"
+}
+
+# 实体: 种类、攻击力、生命值、是否融合、是否已攻击、颜色RGB、资源编号，然后是职业和能力文本
+ENTITY = struct.Struct("<BiiBBBBBH")
+NO_ASSET = 0xFFFF
+CONTAINER = struct.Struct("<BBH")
+CELL = struct.Struct("<BB")
+PATH_HEADER = struct.Struct("<IH")
+PATH_CELL = struct.Struct("<IBB")
+MESSAGES = struct.Struct("<iI")
+PLAYER = struct.Struct("<ii")
+COUNT = struct.Struct("<H")
+
+# 路径网格格子的状态标志，与PathGrid的标志位相同
+PATH_OCCUPIED = OCCUPIED
+PATH_HIGHLIGHT = HIGHLIGHT
+
+def asset_key(path):
+    """图片路径转为资源表中的键：项目根目录下的文件使用/分隔的相对路径"""
+    if not path:
+        return None
+    path = os.path.abspath(path)
+    if os.path.commonpath([path, project_root]) != project_root:
+        return path
+    return os.path.relpath(path, project_root).replace(os.sep, "/")
+
+def asset_path(key):
+    """资源表中的键转回图片路径"""
+    if not key:
+        return None
+    return os.path.join(project_root, *key.split("/"))
+
+def capture_entity(entity):
+    """
+    读取棋子或物品的可保存状态
+
+    返回:
+        tuple: (种类, 攻击力, 生命值, 是否融合, 是否已攻击, 颜色, 资源键, 职业, 能力)
+    """
+    if isinstance(entity, ChessPiece):
+        return (KIND_PIECE, entity.attack, entity.lifepoint, bool(entity.isFusion), bool(entity.isAttack),
+                tuple(entity.color[:3]), asset_key(entity.image_path), entity.job, entity.ability)
+    return (KIND_ITEM, entity.attack, entity.lifepoint, False, False, (0, 0, 0),
+            asset_key(entity.image_path), "", entity.ability)
+
+def capture_game(containers, path_grid=None, message_board=None, player=None):
+    """
+    读取游戏的可保存状态，只生成由基本类型组成的元组，可以直接比较，也可以交给其他线程编码
+
+    参数:
+        containers (list): 棋盘、背包、奖励盒子，按顺序编号为0, 1, 2...
+        path_grid (PathGrid): 路径网格
+        message_board (MessageBoard): 消息板
+        player (dict): 玩家信息，使用其中的'position'（列, 行）
+
+    返回:
+        dict: (段类型, 子编号) -> 段的内容
+    """
+    sections = {}
+    for index, container in enumerate(containers):
+        cells = tuple((row, col, capture_entity(entity))
+                      for row, cells_row in enumerate(container.grid)
+                      for col, entity in enumerate(cells_row) if entity is not None)
+        sections[(SECTION_CONTAINER, index)] = (len(container.grid), len(container.grid[0]), cells)
+    if path_grid is not None:
+        sections[(SECTION_PATH, 0)] = (path_grid.base_col, tuple(path_grid.iter_cells()))
+    if message_board is not None:
+        sections[(SECTION_MESSAGES, 0)] = (message_board.coins, message_board.current_turn,
+                                           message_board.message, tuple(message_board.message_history))
+    if player is not None:
+        sections[(SECTION_PLAYER, 0)] = player['position']
+    return sections
+
+class SaveCodec:
+    """
+    段的编码和解码，维护资源表（图片路径 <-> 资源编号）
+
+    资源表只会增加，同一个存档（快照和日志）中编号保持不变。
+    """
+
+    def __init__(self):
+        self.assets = []       # 资源编号 -> 资源键
+        self.asset_ids = {}    # 资源键 -> 资源编号
+
+    def asset_id(self, key):
+        """获取资源编号，新的资源加入资源表"""
+        if key is None:
+            return NO_ASSET
+        asset_id = self.asset_ids.get(key)
+        if asset_id is None:
+            asset_id = self.asset_ids[key] = len(self.assets)
+            self.assets.append(key)
+        return asset_id
+
+    def encode_assets(self):
+        """编码资源表"""
+        return COUNT.pack(len(self.assets)) + b"".join(pack_text(key) for key in self.assets)
+
+    def decode_assets(self, data):
+        """解码资源表（替换当前的资源表）"""
+        (count,) = COUNT.unpack_from(data, 0)
+        offset = COUNT.size
+        self.assets = []
+        for _ in range(count):
+            key, offset = unpack_text(data, offset)
+            self.assets.append(key)
+        self.asset_ids = {key: asset_id for asset_id, key in enumerate(self.assets)}
+
+    def encode(self, section, value):
+        """
+        编码一个段
+
+        返回:
+            bytes: 段的数据
+        """
+        if section == SECTION_CONTAINER:
+            rows, cols, cells = value
+            parts = [CONTAINER.pack(rows, cols, len(cells))]
+            for row, col, (kind, attack, lifepoint, is_fusion, is_attack, color, key, job, ability) in cells:
+                parts.append(CELL.pack(row, col))
+                parts.append(ENTITY.pack(kind, attack, lifepoint, is_fusion, is_attack, *color, self.asset_id(key)))
+                parts.append(pack_text(job))
+                parts.append(pack_text(ability))
+            return b"".join(parts)
+        if section == SECTION_PATH:
+            base_col, cells = value
+            return PATH_HEADER.pack(base_col, len(cells)) + b"".join(PATH_CELL.pack(*cell) for cell in cells)
+        if section == SECTION_MESSAGES:
+            coins, turn, message, history = value
+            return (MESSAGES.pack(coins, turn) + pack_text(message) + COUNT.pack(len(history))
+                    + b"".join(pack_text(text) for text in history))
+        if section == SECTION_PLAYER:
+            col, row = value if value is not None else (-1, -1)
+            return PLAYER.pack(col, row)
+        raise ValueError(f"未知的段类型: {section}")
+
+    def decode(self, section, data):
+        """解码一个段，返回与capture_game相同结构的内容"""
+        if section == SECTION_CONTAINER:
+            rows, cols, count = CONTAINER.unpack_from(data, 0)
+            offset = CONTAINER.size
+            cells = []
+            for _ in range(count):
+                row, col = CELL.unpack_from(data, offset)
+                kind, attack, lifepoint, is_fusion, is_attack, r, g, b, asset_id = ENTITY.unpack_from(data, offset + CELL.size)
+                job, offset = unpack_text(data, offset + CELL.size + ENTITY.size)
+                ability, offset = unpack_text(data, offset)
+                key = self.assets[asset_id] if asset_id != NO_ASSET else None
+                cells.append((row, col, (kind, attack, lifepoint, bool(is_fusion), bool(is_attack), (r, g, b),
+                                         key, job, ability)))
+            return rows, cols, tuple(cells)
+        if section == SECTION_PATH:
+            base_col, count = PATH_HEADER.unpack_from(data, 0)
+            return base_col, tuple(PATH_CELL.unpack_from(data, PATH_HEADER.size + i * PATH_CELL.size) for i in range(count))
+        if section == SECTION_MESSAGES:
+            coins, turn = MESSAGES.unpack_from(data, 0)
+            message, offset = unpack_text(data, MESSAGES.size)
+            (count,) = COUNT.unpack_from(data, offset)
+            offset += COUNT.size
+            history = []
+            for _ in range(count):
+                text, offset = unpack_text(data, offset)
+                history.append(text)
+            return coins, turn, message, tuple(history)
+        if section == SECTION_PLAYER:
+            col, row = PLAYER.unpack(data)
+            return (col, row) if col >= 0 else None
+        raise ValueError(f"未知的段类型: {section}")
+
+def pack_record(section, sub, data):
+    """编码一条记录"""
+    return RECORD.pack(section, sub, len(data), zlib.crc32(data)) + data
+
+def read_records(data, offset=HEADER.size):
+    """
+    按顺序读取记录，遇到不完整或校验失败的记录时停止
+
+    返回:
+        generator: (段类型, 子编号, 数据)
+    """
+    while offset + RECORD.size <= len(data):
+        section, sub, length, crc = RECORD.unpack_from(data, offset)
+        start = offset + RECORD.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+        yield section, sub, payload
+        offset = start + length
+
+def read_header(data, magic):
+    """读取文件头，返回快照代数；格式不符时返回None"""
+    if len(data) < HEADER.size:
+        return None
+    file_magic, version, generation = HEADER.unpack_from(data, 0)
+    if file_magic != magic or version != VERSION:
+        return None
+    return generation
+
+def wal_path(path):
+    """快照对应的预写日志路径"""
+    return os.path.splitext(path)[0] + ".agwal"
+
+def write_snapshot(path, codec, sections, generation=0):
+    """
+    把完整的状态写成快照（先写入临时文件再替换，不会留下不完整的快照）
+
+    参数:
+        path (str): 快照路径
+        codec (SaveCodec): 编码器
+        sections (dict): capture_game的结果
+        generation (int): 快照代数
+
+    返回:
+        int: 写入的字节数
+    """
+    body = [pack_record(section, sub, codec.encode(section, value)) for (section, sub), value in sorted(sections.items())]
+    # 资源表放在最前面，读取时先于引用它的容器
+    data = HEADER.pack(SNAPSHOT_MAGIC, VERSION, generation) + pack_record(SECTION_ASSETS, 0, codec.encode_assets()) + b"".join(body)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return len(data)
+
+def read_save(path):
+    """
+    读取存档：快照加上同一代数的预写日志
+
+    返回:
+        tuple: (capture_game结构的dict, 快照代数, 日志中应用的记录数)，快照不存在或格式不符时dict为None
+    """
+    try:
+        with open(path, "rb") as f:
+            snapshot = f.read()
+    except FileNotFoundError:
+        return None, 0, 0
+    generation = read_header(snapshot, SNAPSHOT_MAGIC)
+    if generation is None:
+        return None, 0, 0
+    codec = SaveCodec()
+    sections = {}
+
+    def apply(section, sub, payload):
+        if section == SECTION_ASSETS:
+            codec.decode_assets(payload)
+        else:
+            sections[(section, sub)] = codec.decode(section, payload)
+
+    for record in read_records(snapshot):
+        apply(*record)
+
+    applied = 0
+    try:
+        with open(wal_path(path), "rb") as f:
+            wal = f.read()
+    except FileNotFoundError:
+        wal = b""
+    if read_header(wal, WAL_MAGIC) == generation:
+        for record in read_records(wal):
+            apply(*record)
+            applied += 1
+    return sections, generation, applied
+
+def restore_entity(state):
+    """根据保存的状态创建棋子或物品"""
+    kind, attack, lifepoint, is_fusion, is_attack, color, key, job, ability = state
+    if kind == KIND_PIECE:
+        piece = ChessPiece(attack=attack, lifepoint=lifepoint, job=job, is_fusion=is_fusion, color=color,
+                           image_path=asset_path(key), ability=ability)
+        piece.isAttack = int(is_attack)
+        return piece
+    return Item(attack=attack, lifepoint=lifepoint, ability=ability, image_path=asset_path(key))
+
+def restore_game(sections, containers, path_grid=None, message_board=None, player=None):
+    """
+    把读取的状态恢复到游戏对象上（只恢复存档中有的段）
+
+    参数:
+        sections (dict): read_save或capture_game的结果
+        其余参数与capture_game相同
+    """
+    for index, container in enumerate(containers):
+        value = sections.get((SECTION_CONTAINER, index))
+        if value is None:
+            continue
+        rows, cols, cells = value
+        for row in range(len(container.grid)):
+            for col in range(len(container.grid[row])):
+                if container.grid[row][col] is not None:
+                    container.set_cell(row, col, None)
+        for row, col, state in cells:
+            if row < len(container.grid) and col < len(container.grid[row]):
+                container.set_cell(row, col, restore_entity(state))
+
+    value = sections.get((SECTION_PLAYER, 0), ...)
+    if player is not None and value is not ...:
+        player['position'] = value
+
+    value = sections.get((SECTION_PATH, 0))
+    if path_grid is not None and value is not None:
+        base_col, cells = value
+        # 长地图先把窗口滚动到存档时的位置
+        path_grid.set_window(base_col)
+        for col, row, flags in cells:
+            occupied = bool(flags & PATH_OCCUPIED)
+            path_grid.set_cell_state(col, row, occupied=occupied, player=player if occupied else None,
+                                     highlight=bool(flags & PATH_HIGHLIGHT))
+
+    value = sections.get((SECTION_MESSAGES, 0))
+    if message_board is not None and value is not None:
+        message_board.coins, message_board.current_turn, message_board.message, history = value
+        message_board.message_history = list(history)
+        # 绘制时发现排版缓存与消息不一致会重新排版
+        message_board.message_layout = None
+        message_board.history_layouts = []
+
+class AutoSaver:
+    """
+    增量自动存档
+
+    主线程调用tick，每隔interval_ms读取一次状态，把改变了的段交给后台线程；
+    后台线程编码并追加到预写日志，日志中的记录数达到compact_every时压缩为新的快照。
+    """
+
+    def __init__(self):
+        self.path = None
+        self.containers = []
+        self.path_grid = None
+        self.message_board = None
+        self.player = None
+        self.interval_ms = 1000
+        self.compact_every = 64
+        self.last_tick = 0
+        self.last_sections = {}   # 主线程上一次交给后台线程的状态
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # 以下只在后台线程中修改
+        self._codec = None
+        self._sections = {}
+        self._generation = 0
+        self._wal = None
+        self._wal_records = 0
+
+        # 统计信息（在锁内更新）
+        self.stats = {'captures': 0, 'capture_ms': 0.0, 'deltas': 0, 'records': 0,
+                      'bytes': 0, 'compactions': 0, 'write_ms': 0.0}
+
+    def bind(self, containers, path_grid=None, message_board=None, player=None):
+        """
+        绑定要保存的游戏对象（参数与capture_game相同）
+        """
+        self.containers = list(containers)
+        self.path_grid = path_grid
+        self.message_board = message_board
+        self.player = player
+
+    def start(self, path, interval_ms=1000, compact_every=64):
+        """
+        开始自动存档（需要先调用bind），并在后台写入当前状态作为第一个快照
+
+        参数:
+            path (str): 快照路径，预写日志保存在同名的.agwal文件中
+            interval_ms (int): 读取状态的间隔（毫秒）
+            compact_every (int): 预写日志中的记录数达到多少时压缩
+        """
+        self.stop()
+        self.path = path
+        self.interval_ms = interval_ms
+        self.compact_every = max(1, compact_every)
+        self.last_tick = 0
+        self.last_sections = self.capture()
+        self._thread = threading.Thread(target=self._run, args=(path, dict(self.last_sections)),
+                                        name="AutoSaver", daemon=True)
+        self._thread.start()
+
+    def is_running(self):
+        """是否正在自动存档"""
+        return self._thread is not None
+
+    def capture(self):
+        """读取当前状态"""
+        return capture_game(self.containers, self.path_grid, self.message_board, self.player)
+
+    def tick(self, now=None):
+        """
+        每帧调用，距离上次读取超过interval_ms时读取状态并把改变的段交给后台线程
+
+        参数:
+            now (int): 当前时间（毫秒），为None时使用time.perf_counter
+        """
+        if self._thread is None:
+            return
+        now = time.perf_counter() * 1000 if now is None else now
+        if now - self.last_tick < self.interval_ms:
+            return
+        self.last_tick = now
+        self.save_now()
+
+    def save_now(self):
+        """立即读取状态并把改变的段交给后台线程（例如回合结束时）"""
+        if self._thread is None:
+            return
+        start = time.perf_counter()
+        sections = self.capture()
+        changes = {key: value for key, value in sections.items() if self.last_sections.get(key) != value}
+        self.last_sections = sections
+        with self._lock:
+            self.stats['captures'] += 1
+            self.stats['capture_ms'] += (time.perf_counter() - start) * 1000
+        if changes:
+            self._queue.put(("delta", changes))
+
+    def save_as(self, path):
+        """
+        把当前的完整状态保存为单独的快照（例如快速存档），在后台线程中写入；没有开始自动存档时直接写入
+
+        参数:
+            path (str): 快照路径
+        """
+        sections = self.capture()
+        if self._thread is None:
+            write_snapshot(path, SaveCodec(), sections)
+        else:
+            self._queue.put(("save_as", (path, sections)))
+
+    def compact(self):
+        """请求后台线程立即压缩"""
+        if self._thread is not None:
+            self._queue.put(("compact", None))
+
+    def stop(self):
+        """写入最后的改变并停止后台线程"""
+        if self._thread is None:
+            return
+        self.save_now()
+        self._queue.put(("stop", None))
+        self._thread.join()
+        self._thread = None
+
+    def load(self, path=None):
+        """
+        读取存档并恢复到绑定的游戏对象上（自动存档会从恢复后的状态继续）
+
+        参数:
+            path (str): 快照路径，为None时读取自动存档
+
+        返回:
+            bool: 是否成功恢复
+        """
+        sections, generation, applied = read_save(path or self.path)
+        if sections is None:
+            return False
+        restore_game(sections, self.containers, self.path_grid, self.message_board, self.player)
+        return True
+
+    def get_stats(self):
+        """获取统计信息"""
+        with self._lock:
+            return dict(self.stats)
+
+    def _run(self, path, sections):
+        """后台线程：写入第一个快照，然后处理队列中的请求"""
+        self._codec = SaveCodec()
+        self._sections = sections
+        _, self._generation, _ = read_save(path)
+        self._compact()
+        while True:
+            job, changes = self._queue.get()
+            if job == "stop":
+                break
+            if job == "delta":
+                self._append(changes)
+            elif job == "save_as":
+                path, sections = changes
+                write_snapshot(path, SaveCodec(), sections)
+            if job == "compact" or self._wal_records >= self.compact_every:
+                self._compact()
+        self._wal.close()
+        self._wal = None
+
+    def _append(self, changes):
+        """把改变的段追加到预写日志"""
+        start = time.perf_counter()
+        self._sections.update(changes)
+        asset_count = len(self._codec.assets)
+        records = [pack_record(section, sub, self._codec.encode(section, value))
+                   for (section, sub), value in sorted(changes.items())]
+        if len(self._codec.assets) != asset_count:
+            # 出现了新的图片，资源表先于引用它的记录写入
+            records.insert(0, pack_record(SECTION_ASSETS, 0, self._codec.encode_assets()))
+        data = b"".join(records)
+        self._wal.write(data)
+        self._wal.flush()
+        os.fsync(self._wal.fileno())
+        self._wal_records += len(records)
+        with self._lock:
+            self.stats['deltas'] += 1
+            self.stats['records'] += len(records)
+            self.stats['bytes'] += len(data)
+            self.stats['write_ms'] += (time.perf_counter() - start) * 1000
+
+    def _compact(self):
+        """把当前状态写成新一代的快照，并清空预写日志"""
+        start = time.perf_counter()
+        self._generation += 1
+        size = write_snapshot(self.path, self._codec, self._sections, self._generation)
+        if self._wal is not None:
+            self._wal.close()
+        self._wal = open(wal_path(self.path), "wb")
+        self._wal.write(HEADER.pack(WAL_MAGIC, VERSION, self._generation))
+        self._wal.flush()
+        os.fsync(self._wal.fileno())
+        self._wal_records = 0
+        with self._lock:
+            self.stats['compactions'] += 1
+            self.stats['bytes'] += size
+            self.stats['write_ms'] += (time.perf_counter() - start) * 1000
+
+# 全局自动存档
+auto_saver = AutoSaver()
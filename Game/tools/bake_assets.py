@@ -0,0 +1,149 @@
+"""
+离线烘焙资源包
+
+把游戏启动时需要的图片预先解码、按每个屏幕分辨率对应的缩放比例缩放好，
+以屏幕像素格式（BGRA）写入一个带索引的资源包文件 assets/asset_pack.bin。
+游戏运行时由 AssetPack 内存映射该文件，直接在映射的内存上创建Surface。
+源图片修改后需要重新运行本脚本，否则过期的图片会回退到从磁盘解码。
+
+用法（在Game目录下运行）:
+    python tools/bake_assets.py [--screen 1440x700 ...] [--output 路径] [--benchmark]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pygame
+from src.components.Asset.AssetPack import AssetPack
+
+IMAGES_DIR = os.path.join(project_root, "assets", "images")
+
+def build_manifest(screen_sizes):
+    """
+    列出游戏启动时加载的 (图片路径, 目标尺寸) ，目标尺寸为None表示原始尺寸
+
+    与main.py、Chess和Item的加载方式保持一致：
+    背景和物品图片按原始尺寸加载，棋子图片缩放为80x80，回合结束按钮的帧缩放为400*scale_factor。
+    """
+    manifest = [
+        (os.path.join(IMAGES_DIR, "背景.jpg"), None),
+        (os.path.join(IMAGES_DIR, "coke.png"), None),
+    ]
+    for name in sorted(os.listdir(IMAGES_DIR)):
+        path = os.path.join(IMAGES_DIR, name)
+        if os.path.isfile(path) and name not in ("背景.jpg", "coke.png"):
+            manifest.append((path, (80, 80)))
+    for width, height in screen_sizes:
+        scale_factor = min(width / 1920, height / 1200)
+        frame_size = (int(400 * scale_factor), int(400 * scale_factor))
+        for i in range(1, 22):
+            manifest.append((os.path.join(IMAGES_DIR, "摇杆图片", f"{i}.png"), frame_size))
+    # 去掉重复项，保持顺序
+    return list(dict.fromkeys(manifest))
+
+def decode(path, size):
+    """按游戏的普通加载路径解码并缩放图片"""
+    image = pygame.image.load(path)
+    if size:
+        image = pygame.transform.scale(image, size)
+    return image
+
+def bake(manifest, output):
+    """
+    烘焙资源包
+
+    返回:
+        int: 写入的图片数量
+    """
+    sources = {}
+    images = {}
+    blobs = []
+    offset = 0
+    for path, size in manifest:
+        key = AssetPack.relative_key(path, project_root)
+        if key not in sources:
+            stat = os.stat(path)
+            sources[key] = {
+                "hash": AssetPack.hash_file(path),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns
+            }
+        image_key = AssetPack.image_key(sources[key]["hash"], size)
+        if image_key in images:
+            # 内容相同的图片只保存一份
+            continue
+
+        image = decode(path, size)
+        pixels = pygame.image.tobytes(image, AssetPack.PIXEL_FORMAT)
+        images[image_key] = {"offset": offset, "width": image.get_width(), "height": image.get_height()}
+        blobs.append((offset, pixels))
+        offset = AssetPack.align(offset + len(pixels))
+
+    index = json.dumps({"format": AssetPack.PIXEL_FORMAT, "sources": sources, "images": images},
+                       ensure_ascii=False).encode("utf-8")
+    data_start = AssetPack.align(AssetPack.HEADER.size + len(index))
+
+    # 先写入临时文件再替换，避免游戏读到写了一半的资源包
+    temp_output = output + ".tmp"
+    with open(temp_output, "wb") as f:
+        f.write(AssetPack.HEADER.pack(AssetPack.MAGIC, AssetPack.VERSION, len(index)))
+        f.write(index)
+        for blob_offset, pixels in blobs:
+            f.seek(data_start + blob_offset)
+            f.write(pixels)
+    os.replace(temp_output, output)
+    return len(images)
+
+def benchmark(manifest, output):
+    """比较从磁盘解码缩放和从资源包加载同一组图片的耗时"""
+    start = time.perf_counter()
+    for path, size in manifest:
+        decode(path, size).convert_alpha()
+    decode_time = time.perf_counter() - start
+
+    pack = AssetPack()
+    start = time.perf_counter()
+    pack.open(output, project_root)
+    surfaces = [pack.get_surface(path, size) for path, size in manifest]
+    pack_time = time.perf_counter() - start
+
+    missing = sum(1 for surface in surfaces if surface is None)
+    print(f"解码并缩放: {decode_time * 1000:8.1f} ms")
+    print(f"资源包加载: {pack_time * 1000:8.1f} ms（未命中 {missing} 张）")
+
+def parse_screen_size(text):
+    """解析 宽x高 格式的分辨率"""
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+def main():
+    parser = argparse.ArgumentParser(description="烘焙预缩放的资源包")
+    parser.add_argument("--screen", action="append", type=parse_screen_size,
+                        help="要烘焙的屏幕分辨率，例如1440x700，可以指定多次（默认1440x700）")
+    parser.add_argument("--output", default=os.path.join(project_root, "assets", "asset_pack.bin"),
+                        help="资源包输出路径")
+    parser.add_argument("--benchmark", action="store_true", help="烘焙后比较两种加载方式的耗时")
+    args = parser.parse_args()
+
+    pygame.init()
+    # 创建一个窗口，使基准测试中的convert_alpha与游戏一致
+    pygame.display.set_mode((1, 1))
+
+    manifest = build_manifest(args.screen or [(1440, 700)])
+    start = time.perf_counter()
+    count = bake(manifest, args.output)
+    print(f"已写入 {count} 张图片到 {args.output}（{os.path.getsize(args.output) / 1024 / 1024:.1f} MB，"
+          f"用时 {time.perf_counter() - start:.2f}s）")
+
+    if args.benchmark:
+        benchmark(manifest, args.output)
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+战斗模拟对拍和基准测试
+
+随机生成棋盘对，分别用逐个模拟的BattleEngine和向量化的BatchSimulator模拟，
+检查每一对的胜负和回合数完全一致，并比较两者每秒能模拟的战斗数。
+
+用法（在Game目录下运行）:
+    python tools/bench_battle.py [棋盘对数量] [随机种子]
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.components.Battle.BattleEngine import BattleBoard, BattlePiece, BattleEngine, ROWS, COLS
+from src.components.Battle.BatchSimulator import BatchSimulator
+
+WINNER_CODES = {"player": BatchSimulator.PLAYER_WIN, "enemy": BatchSimulator.ENEMY_WIN, "draw": BatchSimulator.DRAW}
+
+def random_board(rng):
+    """随机生成一个棋盘，包含攻击力为0、生命值<=0和已经攻击过的棋子等边界情况"""
+    board = BattleBoard()
+    density = rng.random()
+    for row in range(ROWS):
+        for col in range(COLS):
+            if rng.random() < density:
+                piece = BattlePiece(rng.randint(0, 15), rng.randint(-1, 25))
+                if rng.random() < 0.1:
+                    piece.mark_as_attacked()
+                board.set_cell(row, col, piece)
+    return board
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    rng = random.Random(seed)
+    pairs = [(random_board(rng), random_board(rng)) for _ in range(count)]
+
+    # 批量模拟（先转换，再计时，转换会复制棋子属性）
+    simulator = BatchSimulator.from_boards(pairs)
+    start = time.perf_counter()
+    winner, rounds = simulator.simulate()
+    batch_time = time.perf_counter() - start
+
+    # 逐个模拟
+    start = time.perf_counter()
+    results = [BattleEngine(player_board, enemy_board).simulate() for player_board, enemy_board in pairs]
+    scalar_time = time.perf_counter() - start
+
+    mismatches = [index for index, (result, result_rounds) in enumerate(results)
+                  if WINNER_CODES[result] != winner[index] or result_rounds != rounds[index]]
+
+    print(f"{count} 对棋盘，种子 {seed}: {BatchSimulator.summarize(winner)}")
+    print(f"逐个模拟: {count / scalar_time:12.0f} 场/秒")
+    print(f"批量模拟: {count / batch_time:12.0f} 场/秒")
+    print(f"不一致: {len(mismatches)}" + (f"，例如第 {mismatches[0]} 对" if mismatches else ""))
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+实体存储和系统的检查与基准测试
+
+创建几千个棋子和物品放在一个大网格中，检查:
+    - 渲染系统一次批量绘制和逐个调用draw的画面完全一致，并比较两者的耗时
+    - 战斗系统批量重置攻击状态、批量结算伤害的结果与逐个对象调用take_damage相同
+    - 对象被回收后实体编号全部归还
+并报告每个实体在组件数组和视图对象上占用的内存。
+
+用法（在Game目录下运行）:
+    python tools/bench_entity.py [实体数量] [随机种子]
+"""
+import os
+import sys
+import gc
+import time
+import random
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from src.components.Chess.ChessPiece import ChessPiece
+from src.components.Item.Item import Item
+from src.components.Entity.EntityWorld import entity_world
+from src.components.Entity.RenderSystem import render_system
+from src.components.Entity.CombatSystem import combat_system
+
+GRID_SIZE = 40
+SCALE_FACTOR = 0.5
+
+def create_entities(rng, count, cols):
+    """随机创建棋子和物品，按行优先顺序放在cols列的网格中"""
+    entities = []
+    for index in range(count):
+        if rng.random() < 0.7:
+            entity = ChessPiece(attack=rng.randint(1, 20), lifepoint=rng.randint(1, 30), job="战士",
+                                is_fusion=rng.random() < 0.2)
+        else:
+            entity = Item(attack=rng.randint(0, 10), lifepoint=rng.randint(0, 10))
+        entity.set_position(*divmod(index, cols))
+        entities.append(entity)
+    return entities
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    rng = random.Random(seed)
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    errors = 0
+
+    base_entities = len(entity_world)
+    cols = 100
+    tracemalloc.start()
+    start = time.perf_counter()
+    entities = create_entities(rng, count, cols)
+    create_time = time.perf_counter() - start
+    object_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    stats = entity_world.get_stats()
+    print(f"创建 {count} 个实体: {create_time * 1000:.1f} 毫秒，组件数组每个实体 {stats['bytes_per_entity']} 字节，"
+          f"视图对象和数组扩容约 {object_bytes / count:.0f} 字节，共享图片 {stats['sprites']} 张")
+
+    # 批量绘制和逐个绘制
+    size = (cols * GRID_SIZE, (count // cols + 1) * GRID_SIZE)
+    batch_surface = pygame.Surface(size, pygame.SRCALPHA)
+    single_surface = pygame.Surface(size, pygame.SRCALPHA)
+    render_system.draw(batch_surface, entities, (0, 0), GRID_SIZE, SCALE_FACTOR)
+    start = time.perf_counter()
+    render_system.draw(batch_surface, entities, (0, 0), GRID_SIZE, SCALE_FACTOR)
+    batch_time = time.perf_counter() - start
+    batch_surface.fill((0, 0, 0, 0))
+    render_system.draw(batch_surface, entities, (0, 0), GRID_SIZE, SCALE_FACTOR)
+    start = time.perf_counter()
+    for entity in entities:
+        entity.draw(single_surface, (0, 0), GRID_SIZE, SCALE_FACTOR)
+    single_time = time.perf_counter() - start
+    same = pygame.image.tobytes(batch_surface, "RGBA") == pygame.image.tobytes(single_surface, "RGBA")
+    errors += not same
+    print(f"绘制: 批量 {batch_time * 1000:.1f} 毫秒，逐个 {single_time * 1000:.1f} 毫秒，画面一致: {same}")
+
+    # 批量战斗和逐个对象
+    pieces = [entity for entity in entities if isinstance(entity, ChessPiece)]
+    for piece in pieces:
+        piece.mark_as_attacked()
+    hits = [(rng.randrange(len(pieces)), rng.randint(1, 10)) for _ in range(len(pieces) * 2)]
+    expected = [piece.lifepoint for piece in pieces]
+    for index, damage in hits:
+        expected[index] -= damage
+    # 预热NumPy（第一次调用有一次性的开销）
+    combat_system.apply_damage([pieces[0].entity], [0])
+    start = time.perf_counter()
+    combat_system.reset_attacks(pieces)
+    defeated = combat_system.apply_damage([pieces[index].entity for index, damage in hits],
+                                          [damage for index, damage in hits])
+    combat_time = time.perf_counter() - start
+    expected_defeated = sorted(piece.entity for piece, lifepoint in zip(pieces, expected) if lifepoint <= 0)
+    combat_ok = ([piece.lifepoint for piece in pieces] == expected and defeated.tolist() == expected_defeated
+                 and all(piece.can_attack() for piece in pieces))
+    errors += not combat_ok
+    start = time.perf_counter()
+    for index, damage in hits:
+        pieces[index].take_damage(damage)
+    single_combat_time = time.perf_counter() - start
+    print(f"战斗: 批量 {combat_time * 1000:.2f} 毫秒，逐个 {single_combat_time * 1000:.2f} 毫秒，"
+          f"被击败 {len(defeated)} 个，结果一致: {combat_ok}")
+
+    # 回收
+    del entities, pieces, defeated, entity, piece
+    gc.collect()
+    leaked = len(entity_world) - base_entities
+    errors += leaked != 0
+    print(f"回收后剩余实体: {leaked}，数组容量 {entity_world.capacity}")
+    pygame.quit()
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
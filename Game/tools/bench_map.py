@@ -0,0 +1,98 @@
+"""
+种子生成的长地图检查和基准测试
+
+检查ProceduralMap每一列的内容只由种子和列号决定（乱序重新生成结果相同），并且从任何格子出发都不会走进死路；
+然后在一张很长的地图上用PathGrid从起点一直走到终点，记录每一步的耗时、面板绘制的耗时和窗口保存的数据量，
+确认它们与已经走过的列数无关。
+
+用法（在Game目录下运行）:
+    python tools/bench_map.py [地图列数] [随机种子]
+"""
+import os
+import sys
+import time
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from src.components.Grid.ProceduralMap import ProceduralMap
+from src.components.Grid.PathGrid import PathGrid
+
+def check_map(game_map, rng, samples=2000):
+    """
+    检查地图的确定性和连通性
+
+    返回:
+        int: 不符合要求的列数
+    """
+    errors = 0
+    cols = [rng.randrange(game_map.length) for _ in range(samples)]
+    first = {col: game_map.generate_column(col) for col in cols}
+    rng.shuffle(cols)
+    for col in cols:
+        num_rows, events = game_map.generate_column(col)
+        if (num_rows, events) != first[col] or not 1 <= num_rows <= game_map.max_rows:
+            errors += 1
+        elif col + 1 < game_map.length and any(not game_map.next_moves(col, row) for row in range(num_rows)):
+            errors += 1
+    return errors
+
+def storage_size(path_grid):
+    """窗口中保存的格子数据的字节数"""
+    return (len(path_grid.flags) + len(path_grid.events) + path_grid.col_starts.itemsize * len(path_grid.col_starts)
+            + len(path_grid.players) + len(path_grid.highlighted))
+
+def main():
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    rng = random.Random(seed)
+
+    game_map = ProceduralMap(seed, length)
+    errors = check_map(game_map, rng)
+    print(f"{length} 列的地图，种子 {seed}: 抽查 2000 列，不符合要求: {errors}")
+
+    pygame.init()
+    screen = pygame.display.set_mode((1920, 1200))
+    path_grid = PathGrid(screen, procedural_map=ProceduralMap(seed, length))
+    player = {'color': (0, 100, 255), 'position': None}
+
+    # 与主循环相同的移动步骤：清除旧位置、高亮下一步、占据新格子
+    position = None
+    move_times = []
+    draw_times = []
+    sizes = []
+    for step in range(length):
+        moves = path_grid.planner.next_moves(*position) if position else [(0, 0)]
+        col, row = rng.choice(moves)
+        start = time.perf_counter()
+        if not path_grid.planner.can_move(position, (col, row)) or path_grid.get_cell_center(col, row) is None:
+            errors += 1
+            break
+        if position:
+            path_grid.clear_cell(*position)
+        path_grid.highlight_moves(col, row)
+        path_grid.occupy_cell(col, row, player)
+        move_times.append(time.perf_counter() - start)
+        position = (col, row)
+        if step % 1000 == 0 or step == length - 1:
+            start = time.perf_counter()
+            path_grid.draw()
+            draw_times.append(time.perf_counter() - start)
+            sizes.append(storage_size(path_grid))
+    pygame.quit()
+
+    quarter = len(move_times) // 4
+    early = sum(move_times[:quarter]) / quarter * 1e6
+    late = sum(move_times[-quarter:]) / quarter * 1e6
+    print(f"走到第 {position[0] + 1} 列，窗口 {path_grid.base_col + 1}-{path_grid.base_col + path_grid.view_cols}，"
+          f"生成了 {path_grid.map.generated} 列")
+    print(f"每一步: 前四分之一 {early:.1f} 微秒，后四分之一 {late:.1f} 微秒")
+    print(f"绘制面板: 第一次 {draw_times[0] * 1000:.2f} 毫秒，最后一次 {draw_times[-1] * 1000:.2f} 毫秒")
+    print(f"窗口数据: 最小 {min(sizes)} 字节，最大 {max(sizes)} 字节，无效的移动: {errors}")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+路线规划对拍和基准测试
+
+随机生成小地图，用穷举所有路线的方法检查RoutePlanner的路线数、最佳路线奖励和可到达格子完全一致，
+然后在一张很长的随机地图上测试预计算和查询的耗时。
+
+用法（在Game目录下运行）:
+    python tools/bench_route.py [长地图的列数] [随机种子]
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.components.Grid.RoutePlanner import RoutePlanner
+
+def random_config(rng, num_cols, max_rows=4):
+    """随机生成列配置"""
+    return [rng.randint(1, max_rows) for _ in range(num_cols)]
+
+def all_paths(planner, col, row):
+    """穷举从某个格子到终点的所有路线"""
+    if col == planner.num_cols - 1:
+        return [[(col, row)]]
+    return [[(col, row)] + path for next_col, next_row in planner.next_moves(col, row)
+            for path in all_paths(planner, next_col, next_row)]
+
+def check(planner, rng):
+    """
+    用穷举检查一张地图上所有格子的查询结果
+
+    返回:
+        int: 不一致的格子数
+    """
+    rewards = {(col, row): rng.randint(-3, 9) for col, num_rows in enumerate(planner.cols_config)
+               for row in range(num_rows) if rng.random() < 0.7}
+    planner.set_rewards(rewards)
+    mismatches = 0
+    for col, num_rows in enumerate(planner.cols_config):
+        for row in range(num_rows):
+            paths = all_paths(planner, col, row)
+            best = max((sum(rewards.get(cell, 0) for cell in path) for path in paths), default=None)
+            score, path = planner.best_path(col, row)
+            reachable = set()
+            frontier = {(col, row)}
+            while frontier:
+                frontier = {cell for current in frontier for cell in planner.next_moves(*current)}
+                reachable |= frontier
+            if (len(paths) != planner.count_paths(col, row) or best != score
+                    or (path and sum(rewards.get(cell, 0) for cell in path) != score)
+                    or reachable != planner.reachable_cells(col, row)):
+                mismatches += 1
+    return mismatches
+
+def main():
+    num_cols = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    rng = random.Random(seed)
+
+    mismatches = sum(check(RoutePlanner(random_config(rng, rng.randint(1, 10))), rng) for _ in range(300))
+    print(f"300 张随机小地图，种子 {seed}，不一致: {mismatches}")
+
+    config = random_config(rng, num_cols)
+    start = time.perf_counter()
+    planner = RoutePlanner(config)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    planner.count_paths(0, 0)
+    count_time = time.perf_counter() - start
+    start = time.perf_counter()
+    planner.set_rewards({(col, row): rng.randint(0, 9) for col, num_rows in enumerate(config) for row in range(num_rows)})
+    reward_time = time.perf_counter() - start
+
+    queries = [(col, rng.randrange(config[col])) for col in (rng.randrange(num_cols) for _ in range(1000))]
+    start = time.perf_counter()
+    for col, row in queries:
+        planner.next_moves(col, row)
+        planner.count_paths(col, row)
+        planner.reachable(col, row, horizon=8)
+    query_time = time.perf_counter() - start
+
+    print(f"{num_cols} 列的地图: 预计算后继 {build_time * 1000:.1f} 毫秒，路线数 {count_time * 1000:.1f} 毫秒，"
+          f"最佳路线 {reward_time * 1000:.1f} 毫秒")
+    print(f"查询（下一步、路线数、前方8列可到达范围）: 每次 {query_time / len(queries) * 1e6:.1f} 微秒")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+子弹拖尾绘制基准测试
+
+比较旧的绘制方式（每个拖尾位置每帧新建一个SRCALPHA表面）和使用拖尾图集的
+AnimationManager.draw，统计每帧创建的Surface数量、Python内存分配峰值（tracemalloc）和耗时。
+耗时包含tracemalloc的开销，只用于两种方式之间的相对比较。
+
+用法（在Game目录下运行）:
+    python tools/bench_trail.py [子弹数量] [帧数]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from src.components.Animation.AnimationManager import AnimationManager
+
+# 统计Surface的创建次数：替换pygame.Surface为计数的子类
+surface_count = [0]
+
+class CountingSurface(pygame.Surface):
+    def __init__(self, *args, **kwargs):
+        surface_count[0] += 1
+        super().__init__(*args, **kwargs)
+
+def legacy_draw(manager, screen):
+    """旧的绘制方式：每个拖尾位置每帧都新建一个带透明度的表面"""
+    bullets = manager.bullets
+    for slot in bullets.active_slots().tolist():
+        color = tuple(bullets.color[slot].tolist())
+        size = int(bullets.size[slot])
+        trail = bullets.get_trail(slot)
+        for i, pos in enumerate(trail):
+            alpha = int(255 * (i + 1) / len(trail))
+            s = int(size * (i + 1) / len(trail))
+            surf = pygame.Surface((s * 2, s * 2), pygame.SRCALPHA)
+            pygame.draw.circle(surf, (*color, alpha), (s, s), s)
+            screen.blit(surf, (pos[0] - s, pos[1] - s))
+        x, y = bullets.pos[slot].tolist()
+        pygame.draw.circle(screen, color, (int(x), int(y)), size)
+
+def spawn_bullets(manager, count, screen_size):
+    """在屏幕上发射count颗从左到右飞行的子弹"""
+    width, height = screen_size
+    colors = [(255, 0, 0), (0, 0, 255), (0, 255, 0), (255, 100, 100)]
+    for i in range(count):
+        y = (i * 7) % height
+        manager.add_bullet_animation((0, y), (width * 100, y), color=colors[i % len(colors)], size=8, speed=3)
+
+def run(name, draw, bullet_count, frames, screen):
+    """运行一次测试并打印每帧的平均统计"""
+    manager = AnimationManager()
+    spawn_bullets(manager, bullet_count, screen.get_size())
+    # 预热：填满拖尾并生成图集
+    for _ in range(10):
+        manager.update()
+        draw(manager, screen)
+
+    surface_count[0] = 0
+    peak_total = 0
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    for _ in range(frames):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        manager.update()
+        draw(manager, screen)
+        peak_total += tracemalloc.get_traced_memory()[1] - base
+    elapsed = time.perf_counter() - start_time
+    tracemalloc.stop()
+
+    print(f"{name:>8}: 每帧创建Surface {surface_count[0] / frames:8.1f} 个  "
+          f"每帧Python内存峰值 {peak_total / frames / 1024:8.1f} KB  每帧耗时 {elapsed / frames * 1000:7.3f} ms")
+
+def main():
+    bullet_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    pygame.init()
+    screen = pygame.display.set_mode((1440, 700))
+    pygame.Surface = CountingSurface
+
+    print(f"{bullet_count} 颗子弹, {frames} 帧")
+    run("旧方式", legacy_draw, bullet_count, frames, screen)
+    run("拖尾图集", lambda manager, target: manager.draw(target), bullet_count, frames, screen)
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+对局录像查看工具
+
+不需要pygame和动画：从最近的关键帧开始重放事件，跳转到任意回合并打印该回合结束时的状态。
+
+    --events        列出该回合内的所有事件
+    --verify        从头按顺序重放，检查每个关键帧处重放得到的状态与关键帧完全一致
+    --benchmark N   生成一段N回合的模拟录像（不需要打开游戏），测试随机跳转的耗时
+
+用法（在Game目录下运行）:
+    python tools/replay.py [录像文件] [--turn N] [--events] [--verify]
+    python tools/replay.py --benchmark 3600
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.components.Replay.Replay import (ReplayReader, ReplayRecorder, EVENT_NAMES, EVENT_KEYFRAME,
+                                          EVENT_TURN, ReplayState, TURN)
+from src.components.Battle.BattleEngine import BattleBoard, BattlePiece
+
+CONTAINER_NAMES = {0: "我方棋盘", 1: "对手棋盘", 2: "背包", 3: "奖励盒子"}
+
+def print_state(state):
+    """打印状态"""
+    print(f"回合 {state.turn}，金币 {state.coins}，路径 {sorted(state.path)}")
+    for container, cells in sorted(state.summary()['containers'].items()):
+        print(f"  {CONTAINER_NAMES.get(container, container)}:")
+        for (row, col), (kind, attack, lifepoint, job, ability) in sorted(cells.items()):
+            name = job or ability
+            print(f"    ({row}, {col}) {'物品' if kind else '棋子'} {name} 攻击力:{attack} 生命值:{lifepoint}")
+
+def print_events(reader, turn):
+    """列出某个回合内的事件"""
+    current = None
+    for offset, event, payload in reader.records():
+        if event == EVENT_TURN:
+            current = TURN.unpack(payload)[0]
+        elif event == EVENT_KEYFRAME:
+            continue
+        elif current is None:
+            current = 1
+        if current == turn:
+            print(f"  {offset:8d} {EVENT_NAMES.get(event, event):8s} {payload.hex()}")
+        elif current is not None and current > turn:
+            break
+
+def verify(reader):
+    """
+    从第一个关键帧开始按顺序重放全部事件，在之后的每个关键帧处比较状态
+
+    返回:
+        int: 不一致的关键帧数量
+    """
+    state = None
+    mismatches = 0
+    for offset, event, payload in reader.records():
+        if event == EVENT_KEYFRAME and state is not None:
+            keyframe = ReplayState()
+            keyframe.load_keyframe(payload)
+            if keyframe.summary() != state.summary():
+                mismatches += 1
+                print(f"偏移 {offset} 处的关键帧（回合 {keyframe.turn}）与重放的状态不一致")
+            continue
+        if state is None:
+            state = ReplayState()
+        state.apply(event, payload)
+    print(f"检查了 {len(reader.keyframes)} 个关键帧，不一致: {mismatches}")
+    return mismatches
+
+class _Counter:
+    """模拟录像用的消息板：只有回合和金币"""
+    def __init__(self):
+        self.current_turn = 1
+        self.coins = 100
+
+def synthesize(path, turns, seed=0):
+    """
+    生成一段模拟录像：两个3x3棋盘和一个背包之间随机移动棋子、造成伤害、增加金币
+
+    返回:
+        int: 写入的事件数
+    """
+    rng = random.Random(seed)
+    boards = [BattleBoard(), BattleBoard(), BattleBoard()]
+    for board in boards:
+        for row in range(3):
+            for col in range(3):
+                if rng.random() < 0.6:
+                    board.grid[row][col] = BattlePiece(rng.randint(1, 15), rng.randint(5, 30), f"棋子{rng.randint(1, 99)}")
+    counter = _Counter()
+    recorder = ReplayRecorder()
+    recorder.start(path, boards, message_board=counter, keyframe_interval=10)
+    for turn in range(turns):
+        # 每回合大约60个操作：拖放、伤害、移除、补充新棋子
+        for _ in range(60):
+            board = rng.choice(boards)
+            row, col = rng.randrange(3), rng.randrange(3)
+            piece = board.grid[row][col]
+            action = rng.random()
+            if piece is not None and action < 0.4:
+                piece.lifepoint -= rng.randint(1, 5)
+                recorder.record_stats(piece)
+                if piece.lifepoint <= 0:
+                    board.grid[row][col] = None
+                    recorder.record_cell(board, row, col, None)
+            elif action < 0.8:
+                target = rng.choice(boards)
+                target_row, target_col = rng.randrange(3), rng.randrange(3)
+                other = target.grid[target_row][target_col]
+                board.grid[row][col], target.grid[target_row][target_col] = other, piece
+                recorder.record_cell(board, row, col, other)
+                recorder.record_cell(target, target_row, target_col, piece)
+            elif piece is None:
+                board.grid[row][col] = BattlePiece(rng.randint(1, 15), rng.randint(5, 30), f"棋子{rng.randint(1, 99)}")
+                recorder.record_cell(board, row, col, board.grid[row][col])
+        counter.coins += 10
+        recorder.record_coins(counter.coins)
+        counter.current_turn += 1
+        recorder.record_turn(counter.current_turn)
+    events = recorder.event_count
+    recorder.stop()
+    return events
+
+def benchmark(turns, seeks=200):
+    """生成模拟录像并测试跳转耗时"""
+    path = os.path.join(tempfile.gettempdir(), "replay_benchmark.agr")
+    start = time.perf_counter()
+    events = synthesize(path, turns)
+    record_time = time.perf_counter() - start
+    size = os.path.getsize(path)
+    print(f"模拟 {turns} 回合，{events} 个事件，{size / 1024:.0f} KB，记录用时 {record_time * 1000:.0f} 毫秒"
+          f"（每个事件 {record_time / events * 1e6:.1f} 微秒）")
+
+    start = time.perf_counter()
+    reader = ReplayReader(path)
+    open_time = time.perf_counter() - start
+    rng = random.Random(1)
+    targets = [rng.randint(1, turns) for _ in range(seeks)]
+    start = time.perf_counter()
+    for turn in targets:
+        reader.seek(turn)
+    seek_time = (time.perf_counter() - start) / seeks
+    print(f"打开录像 {open_time * 1000:.1f} 毫秒，随机跳转平均 {seek_time * 1000:.2f} 毫秒")
+    mismatches = verify(reader)
+    os.remove(path)
+    return 1 if mismatches else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="对局录像查看工具")
+    parser.add_argument("path", nargs="?", default=os.path.join("replays", "last_session.agr"), help="录像文件")
+    parser.add_argument("--turn", type=int, help="跳转到的回合，默认为最后一个回合")
+    parser.add_argument("--events", action="store_true", help="列出该回合内的事件")
+    parser.add_argument("--verify", action="store_true", help="检查所有关键帧")
+    parser.add_argument("--benchmark", type=int, metavar="TURNS", help="生成模拟录像并测试跳转耗时")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        return benchmark(args.benchmark)
+
+    try:
+        reader = ReplayReader(args.path)
+    except (OSError, ValueError) as e:
+        print(f"无法打开录像: {e}")
+        return 1
+    if args.verify:
+        return 1 if verify(reader) else 0
+    turn = args.turn if args.turn is not None else reader.last_turn()
+    start = time.perf_counter()
+    state = reader.seek(turn)
+    elapsed = time.perf_counter() - start
+    print(f"{args.path}: {len(reader.keyframes)} 个关键帧，跳转到回合 {turn} 用时 {elapsed * 1000:.2f} 毫秒")
+    print_state(state)
+    if args.events:
+        print(f"回合 {turn} 的事件:")
+        print_events(reader, turn)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""
+阵容锦标赛
+
+用main.py中的玩家/敌方阵容和由它们生成的变体组成阵容池，按循环赛或瑞士制安排对局，
+把对局分块交给多个进程用BatchSimulator模拟，结果写入紧凑的二进制结果文件。
+
+    - 阵容池和对局表放在共享内存中，工作进程在启动时挂载一次，每个任务只传递块编号和范围；
+      模拟结果直接写回共享内存中的结果数组，进程之间不需要序列化大数组。
+    - 每完成一个块就追加到结果文件末尾并刷新到磁盘。中断后用相同的参数再次运行，
+      会读取已完成的块并跳过它们（末尾写了一半的块会被截掉重做）。
+    - 循环赛中每个阵容分别作为玩家和敌方与池中所有阵容（包括自己）各打一场，共 L×L 场；
+      瑞士制每轮按当前积分排序后相邻配对，尽量避免重复对局。
+
+结果文件格式（小端）:
+    文件头 "<4sIIIIIII": 魔数 b"AGTR"、版本、赛制、阵容数、随机种子、块大小、瑞士制轮数、最大回合数
+    每个块 "<III" 块编号、起始对局、对局数，接着是 对局数 个int8胜负和 对局数 个uint8回合数
+
+用法（在Game目录下运行）:
+    python tools/tournament.py [--pool 100] [--schedule roundrobin|swiss] [--rounds 7]
+                               [--workers N] [--chunk-size 1024] [--output tournament.bin] [--fresh]
+"""
+import os
+import sys
+import time
+import struct
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.components.Battle.BatchSimulator import BatchSimulator
+from src.components.Battle import Lineup
+
+MAGIC = b"AGTR"
+VERSION = 1
+HEADER = struct.Struct("<4sIIIIIII")
+BLOCK = struct.Struct("<III")
+SCHEDULES = {"roundrobin": 0, "swiss": 1}
+
+# 工作进程中挂载的共享内存和数组视图
+_worker_state = {}
+
+def _attach(name, shape, dtype):
+    """挂载已有的共享内存并返回 (共享内存, 数组视图)"""
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _init_worker(specs, max_rounds):
+    """工作进程初始化：挂载阵容池、对局表和结果数组"""
+    for key, (name, shape, dtype) in specs.items():
+        shm, array = _attach(name, shape, dtype)
+        _worker_state[key] = array
+        _worker_state[key + "_shm"] = shm
+    _worker_state["max_rounds"] = max_rounds
+
+def _run_chunk(chunk_id, start, stop):
+    """
+    模拟对局表中 [start, stop) 的对局，结果写入共享内存
+
+    返回:
+        tuple: (块编号, 起始对局, 结束对局)
+    """
+    pool = _worker_state["pool"]  # (3, L, 3, 3)：攻击力、生命值、是否有棋子
+    pairs = _worker_state["pairs"][start:stop]
+    player, enemy = pairs[:, 0], pairs[:, 1]
+    # 敌方棋盘上下翻转，使阵容的前排仍然最先被攻击
+    simulator = BatchSimulator(pool[0, player], pool[1, player],
+                               pool[0, enemy, ::-1], pool[1, enemy, ::-1],
+                               pool[2, player] != 0, pool[2, enemy, ::-1] != 0)
+    winner, rounds = simulator.simulate(_worker_state["max_rounds"])
+    _worker_state["winner"][start:stop] = winner
+    _worker_state["rounds"][start:stop] = rounds
+    return chunk_id, start, stop
+
+class SharedArrays:
+    """主进程中创建的一组共享内存数组，退出时统一释放"""
+
+    def __init__(self):
+        self.blocks = {}
+        self.arrays = {}
+
+    def create(self, key, shape, dtype):
+        """创建一个填充为0的共享数组"""
+        size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        array.fill(0)
+        self.blocks[key] = (shm, shape, np.dtype(dtype).str)
+        self.arrays[key] = array
+        return array
+
+    def specs(self):
+        """传给工作进程的挂载信息"""
+        return {key: (shm.name, shape, dtype) for key, (shm, shape, dtype) in self.blocks.items()}
+
+    def close(self):
+        """释放所有共享内存"""
+        self.arrays.clear()
+        for shm, shape, dtype in self.blocks.values():
+            shm.close()
+            shm.unlink()
+        self.blocks.clear()
+
+class ResultsFile:
+    """
+    只追加的结果文件，记录每个完成的块，用于中断后恢复
+    """
+
+    def __init__(self, path, header_values, fresh=False):
+        """
+        打开结果文件；文件不存在、参数不同或指定fresh时重新开始
+
+        参数:
+            path (str): 结果文件路径
+            header_values (tuple): 文件头中魔数之后的各项参数
+            fresh (bool): 是否丢弃已有结果
+        """
+        self.path = path
+        self.header = HEADER.pack(MAGIC, VERSION, *header_values)
+        self.blocks = []  # (块编号, 起始对局, 胜负数组, 回合数数组)
+        if not fresh and os.path.exists(path):
+            self._load()
+        if not self.blocks:
+            with open(path, "wb") as file:
+                file.write(self.header)
+        self.file = open(path, "r+b")
+        self.file.seek(0, os.SEEK_END)
+
+    def _load(self):
+        """读取已完成的块，截掉末尾不完整的块；参数不一致时丢弃旧结果"""
+        with open(self.path, "rb") as file:
+            data = file.read()
+        if data[:HEADER.size] != self.header:
+            print(f"{self.path} 的参数与本次运行不同，重新开始")
+            return
+        offset = HEADER.size
+        while offset + BLOCK.size <= len(data):
+            chunk_id, start, count = BLOCK.unpack_from(data, offset)
+            end = offset + BLOCK.size + 2 * count
+            if end > len(data):
+                break
+            body = offset + BLOCK.size
+            winner = np.frombuffer(data, dtype=np.int8, count=count, offset=body)
+            rounds = np.frombuffer(data, dtype=np.uint8, count=count, offset=body + count)
+            self.blocks.append((chunk_id, start, winner, rounds))
+            offset = end
+        if offset < len(data):
+            with open(self.path, "r+b") as file:
+                file.truncate(offset)
+
+    def completed(self):
+        """已完成的块编号"""
+        return {block[0] for block in self.blocks}
+
+    def append(self, chunk_id, start, winner, rounds):
+        """追加一个完成的块并刷新到磁盘"""
+        count = len(winner)
+        self.file.write(BLOCK.pack(chunk_id, start, count))
+        self.file.write(np.asarray(winner, dtype=np.int8).tobytes())
+        self.file.write(np.asarray(rounds, dtype=np.uint8).tobytes())
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        """关闭结果文件"""
+        self.file.close()
+
+def make_chunks(first_chunk, start, stop, chunk_size):
+    """把 [start, stop) 的对局切分为块，返回 (块编号, 起始, 结束) 列表"""
+    return [(first_chunk + index, chunk_start, min(chunk_start + chunk_size, stop))
+            for index, chunk_start in enumerate(range(start, stop, chunk_size))]
+
+def round_robin_pairs(count):
+    """循环赛对局表：每个阵容作为玩家与所有阵容（作为敌方）各打一场"""
+    player, enemy = np.divmod(np.arange(count * count, dtype=np.int32), count)
+    return np.stack([player, enemy], axis=1)
+
+def swiss_pairs(scores, played, round_index):
+    """
+    瑞士制配对：按积分从高到低排序，每个阵容与后面第一个还没交过手的阵容配对
+
+    参数:
+        scores (ndarray): 每个阵容的积分
+        played (set): 已经交过手的 (较小编号, 较大编号)
+        round_index (int): 轮次，用于轮换先后手
+
+    返回:
+        ndarray: (L // 2, 2) 的对局表，阵容数为奇数时积分最低的未配对阵容轮空
+    """
+    order = sorted(range(len(scores)), key=lambda index: (-scores[index], index))
+    pairs = []
+    while len(order) > 1:
+        first = order.pop(0)
+        partner = next((index for index in order if (min(first, index), max(first, index)) not in played), order[0])
+        order.remove(partner)
+        pairs.append((first, partner) if round_index % 2 == 0 else (partner, first))
+    return np.array(pairs, dtype=np.int32).reshape(-1, 2)
+
+def add_scores(scores, pairs, winner):
+    """按胜负累加积分：胜2分，平1分"""
+    np.add.at(scores, pairs[:, 0], np.where(winner == BatchSimulator.PLAYER_WIN, 2, winner == BatchSimulator.DRAW))
+    np.add.at(scores, pairs[:, 1], np.where(winner == BatchSimulator.ENEMY_WIN, 2, winner == BatchSimulator.DRAW))
+
+def describe(lineup):
+    """阵容的简短文字描述：按格子编号列出 攻击力/生命值"""
+    return " ".join(f"{index + 1}:{unit[0]}/{unit[1]}" for index, unit in enumerate(lineup) if unit is not None)
+
+def run_chunks(executor, chunks, results_file, shared):
+    """提交一组块，按完成顺序写入结果文件"""
+    pending = {executor.submit(_run_chunk, *chunk) for chunk in chunks}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            chunk_id, start, stop = future.result()
+            results_file.append(chunk_id, start, shared.arrays["winner"][start:stop],
+                                shared.arrays["rounds"][start:stop])
+
+def main():
+    parser = argparse.ArgumentParser(description="阵容锦标赛")
+    parser.add_argument("--pool", type=int, default=100, help="阵容数量")
+    parser.add_argument("--seed", type=int, default=0, help="生成阵容变体的随机种子")
+    parser.add_argument("--schedule", choices=sorted(SCHEDULES), default="roundrobin", help="赛制")
+    parser.add_argument("--rounds", type=int, default=7, help="瑞士制的轮数")
+    parser.add_argument("--max-rounds", type=int, default=50, help="每场战斗的最大回合数（不超过255）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="工作进程数")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="每个块的对局数")
+    parser.add_argument("--output", default="tournament.bin", help="结果文件")
+    parser.add_argument("--fresh", action="store_true", help="丢弃已有结果重新开始")
+    parser.add_argument("--top", type=int, default=10, help="显示积分最高的阵容数")
+    args = parser.parse_args()
+
+    lineups = Lineup.default_pool(max(2, args.pool), args.seed)
+    count = len(lineups)
+    max_rounds = min(args.max_rounds, 255)
+    swiss = args.schedule == "swiss"
+    per_round = count // 2
+    total = args.rounds * per_round if swiss else count * count
+
+    results_file = ResultsFile(args.output, (SCHEDULES[args.schedule], count, args.seed,
+                                             args.chunk_size, args.rounds if swiss else 0, max_rounds),
+                               fresh=args.fresh)
+    shared = SharedArrays()
+    try:
+        pool = shared.create("pool", (3, count, 3, 3), np.int64)
+        pool[0], pool[1], pool[2] = Lineup.to_arrays(lineups)
+        pairs = shared.create("pairs", (total, 2), np.int32)
+        winner = shared.create("winner", (total,), np.int8)
+        rounds = shared.create("rounds", (total,), np.uint8)
+
+        # 恢复已完成的块
+        for chunk_id, start, block_winner, block_rounds in results_file.blocks:
+            winner[start:start + len(block_winner)] = block_winner
+            rounds[start:start + len(block_rounds)] = block_rounds
+        completed = results_file.completed()
+        if completed:
+            print(f"从 {args.output} 恢复 {len(completed)} 个已完成的块")
+
+        scores = np.zeros(count, dtype=np.int64)
+        start_time = time.perf_counter()
+        simulated = 0
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                 initargs=(shared.specs(), max_rounds)) as executor:
+            if swiss:
+                played = set()
+                chunks_per_round = -(-per_round // args.chunk_size)
+                for round_index in range(args.rounds):
+                    # 配对只依赖之前各轮的结果，恢复时会得到相同的对局表
+                    offset = round_index * per_round
+                    round_pairs = swiss_pairs(scores, played, round_index)
+                    pairs[offset:offset + per_round] = round_pairs
+                    chunks = [chunk for chunk in make_chunks(round_index * chunks_per_round, offset,
+                                                             offset + per_round, args.chunk_size)
+                              if chunk[0] not in completed]
+                    run_chunks(executor, chunks, results_file, shared)
+                    simulated += sum(stop - start for chunk_id, start, stop in chunks)
+                    add_scores(scores, round_pairs, winner[offset:offset + per_round])
+                    played.update((min(a, b), max(a, b)) for a, b in round_pairs.tolist())
+            else:
+                pairs[:] = round_robin_pairs(count)
+                chunks = [chunk for chunk in make_chunks(0, 0, total, args.chunk_size) if chunk[0] not in completed]
+                run_chunks(executor, chunks, results_file, shared)
+                simulated = sum(stop - start for chunk_id, start, stop in chunks)
+                add_scores(scores, pairs, winner)
+        elapsed = time.perf_counter() - start_time
+
+        print(f"{count} 个阵容，{args.schedule}，{total} 场对局: {BatchSimulator.summarize(winner)}")
+        print(f"本次模拟 {simulated} 场，用时 {elapsed:.2f} 秒，{args.workers} 个进程，"
+              f"{simulated / elapsed if elapsed > 0 else 0:.0f} 场/秒")
+        for rank, index in enumerate(sorted(range(count), key=lambda i: (-scores[i], i))[:args.top], 1):
+            print(f"{rank:3d}. 阵容{index:<4d} 积分 {scores[index] / 2:7.1f}  {describe(lineups[index])}")
+    finally:
+        results_file.close()
+        shared.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())